@@ -15,10 +15,42 @@
    :members:
    :member-order: bysource
 
+.. automodule:: lux.core.compiler
+   :members:
+   :member-order: bysource
+
+.. automodule:: lux.core.manifest
+   :members:
+   :member-order: bysource
+
+.. automodule:: lux.core.cache
+   :members:
+   :member-order: bysource
+
+.. automodule:: lux.core.executor
+   :members:
+   :member-order: bysource
+
+.. automodule:: lux.core.dispatcher
+   :members:
+   :member-order: bysource
+
+.. automodule:: lux.core.codec
+   :members:
+   :member-order: bysource
+
 '''
 from .commands import *
 from .extension import *
 from .app import *
 from .wrappers import *
 from .engines import *
+from .loader import *
+from .context import *
+from .manifest import *
+from .cache import *
+from .executor import *
+from .dispatcher import *
+from .codec import *
+from .compiler import *
 from .mail import EmailBackend
@@ -1,22 +1,31 @@
 import sys
 import os
-import json
+from timeit import default_timer
 from inspect import isclass
+from types import MappingProxyType
 from collections import OrderedDict
 from importlib import import_module
 
 import pulsar
-from pulsar import ImproperlyConfigured
+from pulsar import ImproperlyConfigured, is_async, get_event_loop
 from pulsar.utils.httpurl import remove_double_slash
 from pulsar.apps.wsgi import (WsgiHandler, HtmlDocument, test_wsgi_environ,
                               LazyWsgi, wait_for_body_middleware)
 from pulsar.utils.log import lazyproperty
 from pulsar.utils.importer import module_attribute
 
-from .commands import ConsoleParser, CommandError
+from .commands import ConsoleParser, CommandError, commands_usage
 from .extension import Extension, Parameter, EventHandler, EventMixin
-from .wrappers import wsgi_request, HeadMeta, error_handler
+from .wrappers import (wsgi_request, HeadMeta, error_handler, clone_html,
+                       ErrorPages)
 from .engines import template_engine
+from .loader import TemplateLoader
+from .context import TemplateContext
+from .manifest import Manifest, manifest_path
+from .cache import create_cache
+from .executor import ExecutorPool, WsgiHandler as ExecutorWsgiHandler
+from .dispatcher import compile_middleware
+from .codec import json_codec
 from .cms import CMS
 
 
@@ -56,16 +65,33 @@ def execute_app(app, argv=None, **params):
     :parameter params: additional key-valued parameters to pass to the
         :class:`.Command` executing the ``app``.
     '''
+    start = default_timer()
     if argv is None:
         argv = app._argv or sys.argv
     app._argv = argv = list(argv)
     if argv:
         app._script = argv.pop(0)
+    manifest = app.load_manifest()
+    if manifest:
+        # Help and command resolution without loading the application
+        parser = manifest.get_parser(app._script, add_help=False)
+        opts, _ = parser.parse_known_args(argv)
+        if not opts.command:
+            parser = manifest.get_parser(app._script, nargs=1)
+            parser.parse_args(argv)
+        elif opts.command not in manifest:
+            print('\n'.join(("Unknown command '%s'." % opts.command,
+                             'Pass -h for list of commands')))
+            exit(1)
     try:
         application = app.commands()
     except ImproperlyConfigured as e:
         print('IMPROPERLY CONFUGURED: %s' % e)
         exit(1)
+    if not application.config['STARTUP_MANIFEST']:
+        app.remove_manifest()
+    elif not manifest:
+        app.save_manifest(application)
     # Parse for the command
     parser = application.get_parser(add_help=False)
     opts, _ = parser.parse_known_args(argv)
@@ -80,6 +106,10 @@ def execute_app(app, argv=None, **params):
         # Make sure the loop exists
         argv = list(argv)
         argv.remove(command.name)
+        application.startup_time = default_timer() - start
+        application.logger.debug('Command "%s" ready in %.1f ms',
+                                 command.name,
+                                 1000*application.startup_time)
         try:
             return command(argv, **params)
         except CommandError as e:
@@ -92,6 +122,7 @@ def execute_app(app, argv=None, **params):
 
 
 class App(LazyWsgi):
+    _manifest = None
 
     def __init__(self, config_file, script=None, argv=None, **params):
         self._params = params
@@ -105,6 +136,48 @@ class App(LazyWsgi):
     def commands(self):
         return Application(self, handler=False)
 
+    def load_manifest(self):
+        '''Load the startup :class:`.Manifest` of the config file.
+
+        Return ``None`` when the manifest is not available or out of date.
+        '''
+        self._manifest = None
+        path = self._manifest_path()
+        manifest = Manifest.load(path) if path else None
+        if manifest and manifest.is_valid():
+            self._manifest = manifest
+            return manifest
+
+    def save_manifest(self, application):
+        '''Build and save the startup :class:`.Manifest` of an
+        ``application``
+        '''
+        path = self._manifest_path()
+        if path:
+            manifest = Manifest.build(application, path)
+            if manifest.save():
+                self._manifest = manifest
+                return manifest
+
+    def remove_manifest(self):
+        '''Remove the startup :class:`.Manifest` of the config file, if
+        any, so that it is not loaded by later commands
+        '''
+        self._manifest = None
+        path = self._manifest_path(True)
+        if path and os.path.isfile(path):
+            os.remove(path)
+
+    def _manifest_path(self, enabled=None):
+        # No manifest when a different config file is given
+        argv = self._argv or ()
+        if enabled is None:
+            enabled = self._params.get('STARTUP_MANIFEST', True)
+        if enabled and not any(
+                a in ('-c', '--config') or a.startswith('--config=')
+                for a in argv):
+            return manifest_path(self._config_file)
+
 
 class Application(ConsoleParser, Extension, EventMixin):
     '''The :class:`.Application` is the WSGI callable for serving
@@ -138,14 +211,32 @@ class Application(ConsoleParser, Extension, EventMixin):
 
         Used by the sessions extension
 
+    .. attribute:: template_loader
+
+        The :class:`.TemplateLoader` which locates, loads and caches
+        templates for this application.
+
+    .. attribute:: executors
+
+        Dictionary of :class:`.ExecutorPool` created by the
+        :meth:`executor` method.
+
+    .. attribute:: green_handler
+
+        The :class:`.GreenWsgi` running the :attr:`handler` on a pool of
+        greenlets when :setting:`GREEN_WSGI` is on, ``None`` otherwise.
+
     '''
     cfg = None
     debug = False
     logger = None
     admin = None
     auth_backend = None
+    green_handler = None
+    executors = None
     _worker = None
-    _WsgiHandler = WsgiHandler
+    _WsgiHandler = ExecutorWsgiHandler
+    _TemplateLoader = TemplateLoader
     _config = [
         Parameter('EXTENSIONS', [],
                   'List of extension names to use in your application. '
@@ -158,6 +249,18 @@ class Application(ConsoleParser, Extension, EventMixin):
                   'Default encoding for text.'),
         Parameter('ERROR_HANDLER', error_handler,
                   'Handler of Http exceptions'),
+        Parameter('ERROR_PAGES_CACHE', True,
+                  'Serve the bodies of errors from memory when not in debug '
+                  'mode. Bodies are rendered once per status code and '
+                  'content type'),
+        Parameter('ERROR_PAGES', [404, 500],
+                  'Status codes of error pages rendered when workers warm '
+                  'up. Other error pages are rendered when first served'),
+        Parameter('ERROR_FRAGMENTS', {},
+                  'Dictionary of callables rendering request specific '
+                  'fragments of cached error pages. Callables are called '
+                  'with the request and the exception and their results '
+                  'are available in the context of error templates'),
         Parameter('HTML_TITLE', 'Lux',
                   'Default HTML Title'),
         Parameter('MEDIA_URL', '/media/',
@@ -196,7 +299,11 @@ class Application(ConsoleParser, Extension, EventMixin):
         Parameter('DATETIME_FORMAT', 'd MMM y, h:mm:ss a',
                   'Default formatting for dates in JavaScript', True),
         Parameter('DEFAULT_TEMPLATE_ENGINE', 'python',
-                  'Default template engine'),
+                  'Default template engine, ``python`` or ``lux``'),
+        Parameter('TEMPLATE_CACHE_DIR', None,
+                  'Directory where the ``lux`` template engine stores '
+                  'compiled templates. If not set compiled templates are '
+                  'only cached in memory'),
         Parameter('APP_NAME', 'Lux', 'Application site name', True),
         Parameter('SITE_URL', None,
                   'Web site url'),
@@ -206,9 +313,9 @@ class Application(ConsoleParser, Extension, EventMixin):
                    'pulsar': 'http://pythonhosted.org/pulsar'},
                   'Links used throughout the web site'),
         Parameter('CACHE_SERVER', None,
-                  ('Cache server, can be a connection string to a valid '
-                   'datastore which support the cache protocol or an object '
-                   'supporting the cache protocol')),
+                  ('Cache server, can be a connection string, '
+                   '``memory://``, ``file:///path`` or a pulsar datastore, '
+                   'or an object supporting the cache protocol')),
         Parameter('DEFAULT_FROM_EMAIL', '',
                   'Default email address to send email from'),
         Parameter('LOCALE', 'en_GB', 'Default locale', True),
@@ -224,7 +331,51 @@ class Application(ConsoleParser, Extension, EventMixin):
         Parameter('MD_EXTENSIONS', ['extra', 'meta', 'toc'],
                   'List/tuple of markdown extensions'),
         Parameter('GREEN_WSGI', 0,
-                  'Run the WSGI handle in a pool of greenlet')
+                  'Run the WSGI handle in a pool of greenlet'),
+        Parameter('GREEN_WSGI_MAX', 0,
+                  'Maximum number of greenlets. When greater than '
+                  ':setting:`GREEN_WSGI` the pool grows and shrinks between '
+                  'the two bounds from the time requests wait for a '
+                  'greenlet'),
+        Parameter('GREEN_WSGI_TARGET_WAIT', 0.05,
+                  'Mean time, in seconds, requests can wait for a greenlet '
+                  'before an adaptive green pool grows'),
+        Parameter('GREEN_WSGI_MAX_QUEUE', 0,
+                  'Maximum number of requests waiting for a greenlet. When '
+                  'exceeded requests are served a 503 response straight '
+                  'away. Unlimited by default'),
+        Parameter('GREEN_WSGI_STATS_URL', None,
+                  'Url of the JSON endpoint serving statistics of the '
+                  'green pool. Disabled by default'),
+        Parameter('EXECUTOR_POOLS', {'default': 10},
+                  'Dictionary of executor pool names and number of threads. '
+                  'Pools run blocking router handlers decorated with '
+                  ':func:`.in_executor`'),
+        Parameter('JSON_CODEC', 'json',
+                  'JSON encoder and decoder, ``json`` for the standard '
+                  'library, ``ujson``, ``rapidjson``, ``simplejson`` or '
+                  '``auto`` for the first one installed. It can also be the '
+                  'dotted path of a module with ``dumps`` and ``loads``'),
+        Parameter('ROUTER_TRIE', False,
+                  'Dispatch requests to routers via a trie of their routes '
+                  'compiled once the application is loaded. Recommended '
+                  'for applications with many routers'),
+        Parameter('WARM_UP', False,
+                  'Warm up each worker before it starts serving requests. '
+                  'Extensions prime their caches and database pools via the '
+                  '``on_warm_up`` event and :setting:`WARM_UP_PATHS` are '
+                  'served in-process'),
+        Parameter('WARM_UP_PATHS', ['/'],
+                  'List of paths served in-process when a worker warms up'),
+        Parameter('STARTUP_MANIFEST', True,
+                  'Write a startup manifest next to the config file when '
+                  'running commands. The manifest is used to resolve '
+                  'commands and print help without loading extensions. '
+                  'When switched off an existing manifest is removed'),
+        Parameter('EVENT_TIMING', False,
+                  'Collect timing statistics of event handlers. '
+                  'Statistics are available via the '
+                  ':meth:`~.EventMixin.event_stats` method of the application')
         ]
 
     def __init__(self, callable, handler=True):
@@ -232,20 +383,20 @@ class Application(ConsoleParser, Extension, EventMixin):
         self.meta.argv = callable._argv
         self.meta.script = callable._script
         self.config = self._build_config(callable._config_file)
+        self.event_timing = self.config['EVENT_TIMING']
         self.fire('on_config')
+        self.template_loader = self._build_template_loader()
         if handler:
             self._worker = pulsar.get_actor()
             self.cms = CMS(self)
             self.handler = self._build_handler()
+            self.compile_events()
             self.fire('on_loaded')
+            if self.config['ROUTER_TRIE']:
+                self.handler.dispatch = compile_middleware(
+                    self.handler.middleware)
             if self.config['GREEN_WSGI']:
-                from pulsar.apps.greenio import WsgiGreen
-
-                green = WsgiGreen(self.handler,
-                                  max_workers=self.config['GREEN_WSGI'])
-                self.logger.info('Setup green Wsgi handler')
-                self.handler = WsgiHandler((wait_for_body_middleware, green),
-                                           async=True)
+                self._build_green_handler()
 
     def __call__(self, environ, start_response):
         '''The WSGI thing.'''
@@ -310,9 +461,46 @@ class Application(ConsoleParser, Extension, EventMixin):
     def html_document(self, request):
         '''Build the HTML document.
 
+        The document is a clone of the :attr:`html_prototype` which
+        extensions can customise for the ``request`` via the
+        ``on_html_document`` event. :setting:`HTML_LINKS` are added last.
         Usually there is no need to call directly this method.
         Instead one can use the :attr:`.WsgiRequest.html_document`.
         '''
+        doc = clone_html(self.html_prototype)
+        doc.meta = HeadMeta(doc.head)
+        self.fire('on_html_document', request, doc)
+        #
+        # Add links last
+        links = doc.head.links
+        for link in self.config['HTML_LINKS']:
+            if isinstance(link, dict):
+                links.append(**link)
+            else:
+                links.append(link)
+        return doc
+
+    @lazyproperty
+    def json_codec(self):
+        '''The :class:`.JsonCodec` selected by :setting:`JSON_CODEC`'''
+        return json_codec(self.config['JSON_CODEC'])
+
+    @lazyproperty
+    def error_pages(self):
+        '''The :class:`.ErrorPages` of this application, rendering and
+        counting errors served by the default :setting:`ERROR_HANDLER`.
+        '''
+        return ErrorPages(self)
+
+    @lazyproperty
+    def html_prototype(self):
+        '''The prototype of all HTML documents served by this application.
+
+        Built once per worker from the application :attr:`config`
+        and the ``on_html_prototype`` event, where extensions add
+        contributions which do not depend on the request.
+        Should not be modified once built.
+        '''
         cfg = self.config
         site_url = cfg['SITE_URL']
         media_path = cfg['MEDIA_URL']
@@ -346,20 +534,15 @@ class Application(ConsoleParser, Extension, EventMixin):
         for entry in cfg['HTML_META'] or ():
             head.add_meta(**entry)
 
-        self.fire('on_html_document', request, doc)
-        #
-        # Add links last
-        links = head.links
-        for link in cfg['HTML_LINKS']:
-            if isinstance(link, dict):
-                links.append(**link)
-            else:
-                links.append(link)
+        self.fire('on_html_prototype', doc)
         return doc
 
     @lazyproperty
     def commands(self):
         '''Load all commands from installed applications'''
+        manifest = self.callable._manifest
+        if manifest:
+            return manifest.commands
         cmnds = OrderedDict()
         for e in self.config['EXTENSIONS']:
             try:
@@ -379,6 +562,16 @@ class Application(ConsoleParser, Extension, EventMixin):
                 pass    # No management module
         return cmnds
 
+    @lazyproperty
+    def cache_server(self):
+        '''The cache server for this application, built from the
+        :setting:`CACHE_SERVER` parameter via :func:`.create_cache`
+        '''
+        cache = self.config['CACHE_SERVER']
+        if isinstance(cache, str):
+            cache = create_cache(cache)
+        return cache
+
     @lazyproperty
     def email_backend(self):
         '''Email backend for this application
@@ -399,17 +592,8 @@ class Application(ConsoleParser, Extension, EventMixin):
 
     def get_usage(self):
         '''Returns the script's main help text, as a string.'''
-        description = self.config['DESCRIPTION'] or 'Lux toolkit'
-        usage = ['', '', description, '',
-                 "Type '%s <command> --help' for help on a specific command." %
-                 (self.meta.script or ''),
-                 '', '', "Available commands:", ""]
-        for name, commands in self.commands.items():
-            usage.append(name)
-            usage.extend(('    %s' % cmd for cmd in sorted(commands)))
-            usage.append('')
-        text = '\n'.join(usage)
-        return text
+        return commands_usage(self.config['DESCRIPTION'], self.meta.script,
+                              self.commands)
 
     def get_parser(self, with_commands=True, nargs='?', **params):
         '''Return a python :class:`argparse.ArgumentParser` for parsing
@@ -427,6 +611,63 @@ class Application(ConsoleParser, Extension, EventMixin):
 
     def on_start(self, server):
         self.fire('on_start', server)
+        if self.config['WARM_UP']:
+            if server.cfg.workers:
+                when_ready = server.cfg.when_ready
+                if not isinstance(when_ready, WarmUpWorker):
+                    server.cfg.set('when_ready', WarmUpWorker(when_ready))
+            else:
+                warm_up_worker(pulsar.get_actor(), server.cfg)
+
+    def executor(self, name='default'):
+        '''The :class:`.ExecutorPool` ``name`` from the
+        :setting:`EXECUTOR_POOLS` dictionary, created on first access
+        '''
+        if self.executors is None:
+            self.executors = {}
+        pool = self.executors.get(name)
+        if pool is None:
+            sizes = self.config['EXECUTOR_POOLS']
+            if name not in sizes:
+                raise ImproperlyConfigured('Executor pool "%s" not in '
+                                           'EXECUTOR_POOLS' % name)
+            pool = ExecutorPool(name, sizes[name])
+            self.executors[name] = pool
+        return pool
+
+    def run_in_executor(self, pool, func, *args):
+        '''Run ``func`` with ``args`` in the executor ``pool``.
+
+        Return a future, or the result when called from a greenlet of
+        the :attr:`green_handler`.
+        '''
+        result = self.executor(pool).run(func, *args, loop=self._loop)
+        if self.green_handler:
+            from pulsar.apps.greenio import greenlet, wait
+            if greenlet.getcurrent().parent:
+                return wait(result)
+        return result
+
+    def warm_up(self, worker=None):
+        '''Warm up this application before it serves requests.
+
+        Load the :setting:`HTML_TEMPLATES`, fire the ``on_warm_up`` event,
+        render the :setting:`ERROR_PAGES` and serve the
+        :setting:`WARM_UP_PATHS` in-process.
+        Return the time taken in seconds.
+        '''
+        start = default_timer()
+        self.template_loader.preload(self.config['HTML_TEMPLATES'].values())
+        self.fire('on_warm_up')
+        if not self.debug and self.config['ERROR_PAGES_CACHE']:
+            self.error_pages.prerender(self.config['ERROR_PAGES'])
+        paths = self.config['WARM_UP_PATHS'] or ()
+        for path in paths:
+            self._warm_up_path(path)
+        elapsed = default_timer() - start
+        self.logger.info('%s warmed up in %.1f ms, %d paths',
+                         worker or self, 1000*elapsed, len(paths))
+        return elapsed
 
     def load_extension(self, dotted_path):
         '''Load an :class:`.Extension` class into this :class:`App`.
@@ -461,19 +702,13 @@ class Application(ConsoleParser, Extension, EventMixin):
         '''Return the template full path or None.
 
         Loops through all :attr:`extensions` in reversed order and
-        check for ``name`` within the ``templates`` directory
+        check for ``name`` within the ``templates`` directory.
+        The lookup is performed on the index of the :attr:`template_loader`.
         '''
-        if not isinstance(names, (list, tuple)):
-            names = (names,)
-        for name in names:
-            for ext in reversed(tuple(self.extensions.values())):
-                filename = os.path.join(ext.meta.path, 'templates', name)
-                if os.path.exists(filename):
-                    return filename
-            filename = os.path.join(LUX_CORE, 'templates', name)
-            if os.path.exists(filename):
-                return filename
-        self.logger.error('Template %s not found' % name)
+        filename = self.template_loader.full_path(names)
+        if not filename:
+            self.logger.error('Template %s not found' % (names,))
+        return filename
 
     def template(self, name):
         '''Load a template from the file system.
@@ -487,8 +722,7 @@ class Application(ConsoleParser, Extension, EventMixin):
         '''
         filename = self.template_full_path(name)
         if filename:
-            with open(filename, 'r') as file:
-                return file.read()
+            return self.template_loader.source(filename)
         return ''
 
     def context(self, request, context=None):
@@ -498,11 +732,13 @@ class Application(ConsoleParser, Extension, EventMixin):
         :meth:`render_template` method is used and a the wsgi ``request``
         is passed as key-valued parameter.
 
-        The initial ``context`` is updated with contribution from
-        all :setting:`EXTENSIONS` which expose the ``context`` method.
+        The context is a :class:`.TemplateContext` with the initial
+        ``context`` as the request layer and a read-only view of the
+        :attr:`config` as the bottom layer. It is updated with contribution
+        from all :setting:`EXTENSIONS` which expose the ``context`` method.
         '''
-        context = context if context is not None else {}
-        context.update(request.app.config)
+        context = TemplateContext(context if context is not None else {},
+                                  MappingProxyType(self.config))
         for ext in self.extensions.values():
             if hasattr(ext, 'context'):
                 context = ext.context(request, context) or context
@@ -513,21 +749,24 @@ class Application(ConsoleParser, Extension, EventMixin):
         '''
         if request:
             context = self.context(request, context)
-        template = self.template(name)
-        rnd = self.template_engine(engine)
-        return rnd(template, context)
+        filename = self.template_full_path(name)
+        return self.template_loader.render(filename, context, engine)
 
     def template_engine(self, engine=None):
         engine = engine or self.config['DEFAULT_TEMPLATE_ENGINE']
         return template_engine(engine)
 
     def html_response(self, request, template_name, context=None,
-                      jscontext=None, title=None, status_code=None):
+                      jscontext=None, title=None, status_code=None,
+                      stream=False):
         '''Html response via a template.
 
         :param request: the :class:`.WsgiRequest`
         :param template_name: the template file name to load
         :param context: optional context dictionary
+        :param stream: if ``True`` the response is streamed. The ``head``
+            element is sent to the client as soon as the response starts
+            while the body is rendered in chunks by the template engine.
         '''
         if 'text/html' in request.content_types:
             request.response.content_type = 'text/html'
@@ -541,9 +780,12 @@ class Application(ConsoleParser, Extension, EventMixin):
                 request.response.status_code = status_code
             context = self.context(request, context)
             if doc.jscontext:
-                jscontext = json.dumps(doc.jscontext)
+                jscontext = self.json_codec.dumps(doc.jscontext)
                 doc.head.embedded_js.insert(
                     0, 'var lux = {context: %s};\n' % jscontext)
+            if stream:
+                return self._stream_html(request, doc, template_name,
+                                         context)
             body = self.render_template(template_name, context)
             doc.body.append(body)
             return doc.http_response(request)
@@ -620,6 +862,35 @@ class Application(ConsoleParser, Extension, EventMixin):
                 extension.setup(config, config_module, self.params)
         return config
 
+    def _build_template_loader(self):
+        directories = [os.path.join(ext.meta.path, 'templates')
+                       for ext in reversed(tuple(self.extensions.values()))]
+        directories.append(os.path.join(LUX_CORE, 'templates'))
+        index = None
+        manifest = self.callable._manifest
+        if manifest and manifest.templates['directories'] == directories:
+            index = manifest.templates['index']
+        return self._TemplateLoader(self, directories, index)
+
+    def _stream_html(self, request, doc, template_name, context):
+        response = request.response
+        response.encoding = doc.charset
+        response.content = self._html_chunks(request, doc, template_name,
+                                             context)
+        return response
+
+    def _html_chunks(self, request, doc, template_name, context):
+        # The body tag is rendered with a marker where the template goes
+        marker = '<!-- lux-body-%s -->' % id(doc)
+        doc.body.append(marker)
+        head = doc.head.render(request)
+        body_start, body_end = doc.body.render(request).split(marker)
+        yield '<!DOCTYPE html>\n<html%s>\n%s%s' % (doc.flatatt(), head,
+                                                   body_start)
+        filename = self.template_full_path(template_name)
+        yield from self.template_loader.stream(filename, context)
+        yield '%s</html>' % body_end
+
     def _build_handler(self):
         '''The WSGI application handler for this :class:`App`.
 
@@ -641,6 +912,44 @@ class Application(ConsoleParser, Extension, EventMixin):
         rmiddleware = list(reversed(rmiddleware))
         return self._WsgiHandler(middleware, response_middleware=rmiddleware)
 
+    def _build_green_handler(self):
+        from .green import GreenWsgi, GreenStatsRouter
+
+        cfg = self.config
+        size = cfg['GREEN_WSGI']
+        green = GreenWsgi(self.handler,
+                          max_workers=max(size, cfg['GREEN_WSGI_MAX']),
+                          min_workers=size,
+                          max_queue=cfg['GREEN_WSGI_MAX_QUEUE'],
+                          target_wait=cfg['GREEN_WSGI_TARGET_WAIT'])
+        self.green_handler = green
+        middleware = [wait_for_body_middleware, green]
+        if cfg['GREEN_WSGI_STATS_URL']:
+            middleware.insert(0, GreenStatsRouter(cfg['GREEN_WSGI_STATS_URL'],
+                                                  green=green))
+        self.logger.info('Setup green Wsgi handler')
+        self.handler = WsgiHandler(middleware, async=True)
+
+    def _warm_up_path(self, path):
+        request = self.wsgi_request(path=path,
+                                    extra={'HTTP_ACCEPT': 'text/html'})
+        try:
+            response = self(request.environ, _start_response)
+            if is_async(response):
+                loop = get_event_loop()
+                if loop.is_running():
+                    # served in the background
+                    return
+                response = loop.run_until_complete(response)
+            for _ in response:
+                pass
+        except Exception:
+            self.logger.exception('Could not warm up %s', path)
+        else:
+            if response.status_code >= 500:
+                self.logger.warning('Warm up of %s returned %s', path,
+                                    response.status_code)
+
     def _setup_logger(self, config, module, opts):
         debug = opts.debug or self.params.get('debug', False)
         cfg = pulsar.Config()
@@ -651,6 +960,34 @@ class Application(ConsoleParser, Extension, EventMixin):
         self.logger = cfg.configured_logger('lux')
 
 
+class WarmUpWorker:
+    '''The ``when_ready`` hook of pulsar workers when :setting:`WARM_UP`
+    is on.
+
+    Call the ``when_ready`` hook it replaces and warm up the worker via
+    :func:`warm_up_worker`.
+    '''
+    def __init__(self, when_ready=None):
+        self.when_ready = when_ready
+
+    def __call__(self, actor):
+        if self.when_ready:
+            self.when_ready(actor)
+        warm_up_worker(actor)
+
+
+def warm_up_worker(actor, cfg=None):
+    '''Warm up the :class:`.Application` served by a pulsar ``actor``.
+    '''
+    cfg = cfg or actor.cfg
+    app = cfg.callable.handler()
+    app.warm_up(actor)
+
+
+def _start_response(status, headers, exc_info=None):
+    pass
+
+
 def add_app(apps, name, pos=None):
     try:
         apps.remove(name)
@@ -0,0 +1,394 @@
+'''Cache servers implementing the cache protocol used by lux.
+
+A cache server is created from a connection string via :func:`create_cache`,
+usually from the :setting:`CACHE_SERVER` parameter:
+
+* ``memory://?max_entries=1000&timeout=300`` an in-process bounded LRU cache
+* ``file:///path/to/dir?max_entries=10000`` a file system cache shared by all
+  processes on a host
+* any other scheme is a pulsar data store, for example
+  ``redis://127.0.0.1:6379``
+
+All cache servers implement the same protocol: :meth:`~Cache.get`,
+:meth:`~Cache.set`, :meth:`~Cache.add`, :meth:`~Cache.delete`,
+:meth:`~Cache.get_many`, :meth:`~Cache.set_many` and :meth:`~Cache.clear`.
+The ``timeout`` of an entry is given in seconds, ``None`` for the
+default timeout of the cache and ``0`` for entries which never expire.
+'''
+import os
+import pickle
+import hashlib
+import tempfile
+from time import time
+from threading import Lock
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl
+
+from pulsar import ImproperlyConfigured, is_async, get_event_loop
+from pulsar.utils.importer import module_attribute
+
+
+__all__ = ['Cache',
+           'MemoryCache',
+           'FileCache',
+           'PulsarCache',
+           'create_cache',
+           'register_cache']
+
+
+cache_servers = {}
+
+
+def register_cache(scheme, dotted_path):
+    '''Register a :class:`.Cache` class for connection strings with
+    ``scheme``, the class is found at the python ``dotted_path``.
+    '''
+    cache_servers[scheme] = dotted_path
+
+
+def create_cache(url, **params):
+    '''Create a :class:`.Cache` from a connection string ``url``.
+
+    Schemes not registered via :func:`register_cache` are handled by
+    :class:`.PulsarCache` via pulsar data stores.
+    '''
+    scheme, netloc, path, query, _ = urlsplit(url)
+    if not scheme:
+        raise ImproperlyConfigured('No scheme in cache server "%s"' % url)
+    options = dict(parse_qsl(query))
+    options.update(params)
+    dotted_path = cache_servers.get(scheme)
+    if not dotted_path:
+        url = urlunsplit((scheme, netloc, path, '', ''))
+        return PulsarCache(url, **options)
+    cache_class = module_attribute(dotted_path)
+    return cache_class(location=netloc + path, **options)
+
+
+class Cache:
+    '''Base class for cache servers.
+
+    .. attribute:: timeout
+
+        Default timeout in seconds, ``0`` for entries which never expire.
+    '''
+    def __init__(self, location=None, timeout=0, **params):
+        self.location = location
+        self.timeout = float(timeout)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, self.location or '')
+    __str__ = __repr__
+
+    def get(self, key, default=None):
+        '''Get the value at ``key``, ``default`` if not available
+        '''
+        raise NotImplementedError
+
+    def set(self, key, value, timeout=None):
+        '''Set ``value`` at ``key``
+        '''
+        raise NotImplementedError
+
+    def add(self, key, value, timeout=None):
+        '''Set ``value`` at ``key`` only if ``key`` is not available.
+
+        Return ``True`` if the value was set.
+        '''
+        raise NotImplementedError
+
+    def delete(self, key):
+        '''Delete ``key`` from the cache
+        '''
+        raise NotImplementedError
+
+    def clear(self):
+        '''Remove all entries
+        '''
+        raise NotImplementedError
+
+    def get_many(self, keys):
+        '''Dictionary of available values for ``keys``
+        '''
+        missing = object()
+        values = {}
+        for key in keys:
+            value = self.get(key, missing)
+            if value is not missing:
+                values[key] = value
+        return values
+
+    def set_many(self, mapping, timeout=None):
+        '''Set all key-value pairs in ``mapping``
+        '''
+        for key, value in mapping.items():
+            self.set(key, value, timeout)
+
+    def stats(self):
+        '''Dictionary of statistics for this cache
+        '''
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions}
+
+    def expiry(self, timeout):
+        '''Expiry timestamp for ``timeout``, ``0`` for no expiry
+        '''
+        if timeout is None:
+            timeout = self.timeout
+        return time() + timeout if timeout else 0
+
+
+class MemoryCache(Cache):
+    '''In-process least recently used cache with expiry of entries.
+
+    .. attribute:: max_entries
+
+        Maximum number of entries, when exceeded the least recently used
+        entries are evicted.
+    '''
+    def __init__(self, max_entries=1000, **params):
+        super().__init__(**params)
+        self.max_entries = int(max_entries)
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._set(key, value, timeout)
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            if self._get(key) is None:
+                self._set(key, value, timeout)
+                return True
+            return False
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        stats = super().stats()
+        stats['entries'] = len(self._data)
+        stats['max_entries'] = self.max_entries
+        return stats
+
+    def _get(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[0] and entry[0] <= time():
+            self._data.pop(key)
+            entry = None
+        return entry
+
+    def _set(self, key, value, timeout):
+        data = self._data
+        data[key] = (self.expiry(timeout), value)
+        data.move_to_end(key)
+        while len(data) > self.max_entries:
+            data.popitem(last=False)
+            self.evictions += 1
+
+
+class FileCache(Cache):
+    '''Cache storing entries as files in a directory.
+
+    Entries are shared by all processes on the same host, for example
+    pulsar workers. The number of files is checked every
+    ``cull_frequency`` writes and, when it exceeds ``max_entries``,
+    the least recently written are evicted.
+    '''
+    def __init__(self, location=None, max_entries=10000, cull_frequency=50,
+                 **params):
+        if not location:
+            raise ImproperlyConfigured('File cache requires a directory')
+        super().__init__(os.path.abspath(location), **params)
+        self.max_entries = int(max_entries)
+        self.cull_frequency = int(cull_frequency)
+        self._writes = 0
+        os.makedirs(self.location, exist_ok=True)
+
+    def get(self, key, default=None):
+        entry = self._read(self._path(key))
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, timeout=None):
+        self._write(self._path(key), value, timeout)
+
+    def add(self, key, value, timeout=None):
+        path = self._path(key)
+        if self._read(path) is None:
+            self._write(path, value, timeout)
+            return True
+        return False
+
+    def delete(self, key):
+        self._remove(self._path(key))
+
+    def clear(self):
+        for filename in self._files():
+            self._remove(filename)
+
+    def stats(self):
+        stats = super().stats()
+        stats['entries'] = len(self._files())
+        stats['max_entries'] = self.max_entries
+        return stats
+
+    def _path(self, key):
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.location, '%s.cache' % name)
+
+    def _files(self):
+        try:
+            return [os.path.join(self.location, f)
+                    for f in os.listdir(self.location) if f.endswith('.cache')]
+        except OSError:
+            return []
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as file:
+                entry = pickle.load(file)
+        except (OSError, EOFError, pickle.PickleError):
+            return None
+        if entry[0] and entry[0] <= time():
+            self._remove(path)
+            return None
+        return entry
+
+    def _write(self, path, value, timeout):
+        fd, tmp = tempfile.mkstemp(dir=self.location, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                pickle.dump((self.expiry(timeout), value), file,
+                            pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except Exception:
+            self._remove(tmp)
+            raise
+        self._writes += 1
+        if not self._writes % self.cull_frequency:
+            self._cull()
+
+    def _cull(self):
+        files = self._files()
+        excess = len(files) - self.max_entries
+        if excess > 0:
+            files = sorted(files, key=_mtime)
+            for filename in files[:excess]:
+                self._remove(filename)
+                self.evictions += 1
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class PulsarCache(Cache):
+    '''Cache using a pulsar data store supporting the redis protocol.
+
+    Commands are executed on the store asynchronously, this cache waits
+    for results when called from a greenlet (:setting:`GREEN_WSGI`) or
+    when the event loop is not running. Otherwise it raises
+    :class:`~pulsar.ImproperlyConfigured` since results could not be
+    waited for.
+    '''
+    def __init__(self, url, timeout=0, **params):
+        from pulsar.apps.data import create_store
+        super().__init__(url, timeout=timeout)
+        self.store = create_store(url, **params)
+        self.client = self.store.client()
+
+    def get(self, key, default=None):
+        value = self._wait(self.client.execute('get', key))
+        if value is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return pickle.loads(value)
+
+    def set(self, key, value, timeout=None):
+        self._wait(self.client.execute('set', key,
+                                       *self._args(value, timeout)))
+
+    def add(self, key, value, timeout=None):
+        args = self._args(value, timeout) + ('nx',)
+        return bool(self._wait(self.client.execute('set', key, *args)))
+
+    def delete(self, key):
+        self._wait(self.client.execute('del', key))
+
+    def clear(self):
+        self._wait(self.client.execute('flushdb'))
+
+    def get_many(self, keys):
+        keys = list(keys)
+        values = self._wait(self.client.execute('mget', *keys))
+        result = {}
+        for key, value in zip(keys, values):
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                result[key] = pickle.loads(value)
+        return result
+
+    def _args(self, value, timeout):
+        if timeout is None:
+            timeout = self.timeout
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return (value, 'px', int(1000*timeout)) if timeout else (value,)
+
+    def _wait(self, result):
+        if not is_async(result):
+            return result
+        try:
+            from pulsar.apps.greenio import greenlet, wait
+        except ImportError:     # greenlet not installed
+            greenlet = None
+        if greenlet and greenlet.getcurrent().parent:
+            return wait(result)
+        loop = get_event_loop()
+        if not loop.is_running():
+            return loop.run_until_complete(result)
+        raise ImproperlyConfigured('Cache server "%s" can only be used from '
+                                   'a greenlet while the event loop is '
+                                   'running, set GREEN_WSGI' % self)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0
+
+
+register_cache('memory', 'lux.core.cache.MemoryCache')
+register_cache('file', 'lux.core.cache.FileCache')
@@ -0,0 +1,106 @@
+'''JSON encoding and decoding via the codec selected by the
+:setting:`JSON_CODEC` setting.
+
+The default codec uses the standard library :mod:`json` module. Faster
+implementations are used when installed and selected by name,
+``ujson``, ``rapidjson`` or ``simplejson``, or via ``auto`` which picks
+the first one available. A codec can also be the dotted path of a
+module or object with ``dumps`` and ``loads`` functions.
+
+The codec of an application is available via the
+:attr:`.Application.json_codec` attribute::
+
+    data = request.app.json_codec.loads(text)
+'''
+import json
+from importlib import import_module
+
+from pulsar import ImproperlyConfigured
+from pulsar.apps import wsgi
+from pulsar.utils.importer import module_attribute
+
+
+__all__ = ['JsonCodec', 'json_codec', 'Json']
+
+
+FAST_CODECS = ('ujson', 'rapidjson', 'simplejson')
+
+_codecs = {}
+
+
+class JsonCodec:
+    '''Encode and decode JSON with ``module``
+    '''
+    def __init__(self, module=json, name=None):
+        self.module = module
+        self.name = name or module.__name__
+        self._dumps = module.dumps
+        self._loads = module.loads
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, self.name)
+    __str__ = __repr__
+
+    def dumps(self, data):
+        '''Encode ``data`` into a JSON string'''
+        return self._dumps(data)
+
+    def loads(self, text):
+        '''Decode a JSON string or bytes'''
+        if isinstance(text, bytes):
+            text = text.decode('utf-8')
+        return self._loads(text)
+
+
+def json_codec(name=None):
+    '''The :class:`.JsonCodec` for ``name``, the stdlib codec when
+    ``name`` is not given
+    '''
+    name = name or 'json'
+    codec = _codecs.get(name)
+    if codec is None:
+        if name == 'auto':
+            codec = _auto_codec()
+        elif name == 'json' or name in FAST_CODECS:
+            try:
+                codec = JsonCodec(import_module(name))
+            except ImportError:
+                raise ImproperlyConfigured('JSON codec "%s" not installed'
+                                           % name) from None
+        else:
+            try:
+                module = import_module(name)
+            except ImportError:
+                module = module_attribute(name, safe=True)
+            if not (hasattr(module, 'dumps') and hasattr(module, 'loads')):
+                raise ImproperlyConfigured('Unknown JSON codec "%s"' % name)
+            codec = JsonCodec(module, name)
+        _codecs[name] = codec
+    return codec
+
+
+def _auto_codec():
+    for name in FAST_CODECS:
+        try:
+            return JsonCodec(import_module(name))
+        except ImportError:
+            pass
+    return json_codec()
+
+
+class Json(wsgi.Json):
+    '''A :class:`~pulsar.apps.wsgi.content.Json` encoded with the
+    application codec
+    '''
+    codec = None
+
+    def http_response(self, request, *stream):
+        self.codec = request.app.json_codec
+        return super().http_response(request, *stream)
+
+    def to_string(self, stream):
+        codec = self.codec or json_codec()
+        if len(stream) == 1 and not self.as_list:
+            return codec.dumps(stream[0])
+        else:
+            return codec.dumps(stream)
@@ -18,7 +18,8 @@ from lux import __version__
 
 __all__ = ['ConsoleParser',
            'CommandError',
-           'Command']
+           'Command',
+           'commands_usage']
 
 
 class CommandError(ImproperlyConfigured):
@@ -62,6 +63,22 @@ class ConsoleParser(object):
         return parser
 
 
+def commands_usage(description, script, commands):
+    '''The main help text of a lux script.
+
+    :param commands: ordered mapping of extension names to command names
+    '''
+    usage = ['', '', description or 'Lux toolkit', '',
+             "Type '%s <command> --help' for help on a specific command." %
+             (script or ''),
+             '', '', "Available commands:", ""]
+    for name, cmnds in commands.items():
+        usage.append(name)
+        usage.extend(('    %s' % cmd for cmd in sorted(cmnds)))
+        usage.append('')
+    return '\n'.join(usage)
+
+
 class LuxApp(Application):
     name = 'lux'
     cfg = Config(include=('loglevel', 'loghandlers', 'debug', 'config'))
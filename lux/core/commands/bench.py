@@ -0,0 +1,163 @@
+import json
+import asyncio
+import threading
+from time import perf_counter, time
+from concurrent.futures import ThreadPoolExecutor
+
+from pulsar import Setting, is_async, new_event_loop
+from pulsar.apps.wsgi import Router
+
+import lux
+from lux import CommandError
+from lux.utils import percentile
+
+
+def discover_paths(handler):
+    '''Paths of :class:`.Router` in the wsgi ``handler`` which serve
+    ``GET`` requests and do not require url variables
+    '''
+    paths = []
+    for middleware in getattr(handler, 'middleware', None) or ():
+        if isinstance(middleware, Router):
+            _router_paths(middleware, paths)
+        elif hasattr(middleware, 'wsgi'):   # green wsgi
+            paths.extend(discover_paths(middleware.wsgi))
+    return paths
+
+
+def _router_paths(router, paths):
+    if (not router.full_route.variables and
+            ('get' in router.__dict__ or hasattr(type(router), 'get'))):
+        path = router.path()
+        if path not in paths:
+            paths.append(path)
+    for child in router.routes:
+        _router_paths(child, paths)
+
+
+class Command(lux.Command):
+    help = ('Benchmark the application by serving synthetic requests and '
+            'report requests per second and latency percentiles per route.')
+    option_list = (
+        Setting('paths',
+                ['--paths'],
+                nargs='*',
+                default=None,
+                desc=('Paths to benchmark. If not given, paths are '
+                      'discovered from the routers of the application.')),
+        Setting('requests',
+                ['--requests'],
+                type=int,
+                default=100,
+                desc='Number of requests to serve for each path.'),
+        Setting('concurrency',
+                ['--concurrency'],
+                type=int,
+                default=1,
+                desc='Number of threads serving requests concurrently.'),
+        Setting('warmup',
+                ['--warmup'],
+                type=int,
+                default=5,
+                desc='Number of requests served before timing each path.'),
+        Setting('accept',
+                ['--accept'],
+                default='text/html',
+                desc='Value of the Accept header of requests.'),
+        Setting('output',
+                ['--output'],
+                default='',
+                desc='Write results as JSON to this file.'))
+
+    def run(self, options, **params):
+        app = self.app
+        if not getattr(app, 'handler', None):
+            app = app.callable.setup()
+        paths = options.paths or discover_paths(app.handler)
+        if not paths:
+            raise CommandError('No paths to benchmark')
+        concurrency = max(options.concurrency, 1)
+        self._local = threading.local()
+        results = []
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for path in paths:
+                results.append(self.bench(app, executor, path, options))
+        self.write('%-30s %8s %6s %10s %10s %10s %10s %10s' %
+                   ('path', 'requests', 'errors', 'req/s', 'mean ms',
+                    'p50 ms', 'p95 ms', 'p99 ms'))
+        for r in results:
+            self.write('%-30s %8d %6d %10.1f %10.3f %10.3f %10.3f %10.3f' %
+                       (r['path'], r['requests'], r['errors'],
+                        r['requests_per_second'], r['mean'], r['p50'],
+                        r['p95'], r['p99']))
+        if options.output:
+            data = {'timestamp': time(),
+                    'lux': lux.__version__,
+                    'config': app.config_module,
+                    'concurrency': concurrency,
+                    'requests': options.requests,
+                    'accept': options.accept,
+                    'results': results}
+            with open(options.output, 'w') as file:
+                json.dump(data, file, indent=4)
+            self.write('Results written to %s' % options.output)
+        return results
+
+    def bench(self, app, executor, path, options):
+        '''Benchmark a single ``path`` and return a dictionary of results
+        '''
+        for _ in range(options.warmup):
+            self.serve(app, path, options.accept)
+        start = perf_counter()
+        timings = list(executor.map(
+            lambda _: self.serve(app, path, options.accept),
+            range(options.requests)))
+        elapsed = perf_counter() - start
+        times = sorted(1000*t for t in timings if t is not None)
+        return {'path': path,
+                'requests': len(timings),
+                'errors': len(timings) - len(times),
+                'elapsed': elapsed,
+                'requests_per_second': len(timings)/elapsed if elapsed else 0,
+                'mean': sum(times)/len(times) if times else 0,
+                'max': times[-1] if times else 0,
+                'p50': percentile(times, 50),
+                'p95': percentile(times, 95),
+                'p99': percentile(times, 99)}
+
+    def serve(self, app, path, accept):
+        '''Serve a request at ``path``, return the time taken or ``None``
+        if the request failed
+        '''
+        loop = self.event_loop()
+        start = perf_counter()
+        try:
+            request = app.wsgi_request(path=path, loop=loop,
+                                       extra={'HTTP_ACCEPT': accept})
+            response = app(request.environ, self.start_response)
+            if is_async(response):
+                response = loop.run_until_complete(response)
+            for _ in response:
+                pass
+        except Exception:
+            self.logger.exception('Could not serve %s', path)
+            return
+        if response.status_code >= 500:
+            return
+        return perf_counter() - start
+
+    def event_loop(self):
+        '''The event loop of the current thread
+        '''
+        loop = getattr(self._local, 'loop', None)
+        if loop is None:
+            if threading.current_thread() is threading.main_thread():
+                loop = asyncio.get_event_loop()
+            else:
+                loop = new_event_loop()
+                asyncio.set_event_loop(loop)
+            self._local.loop = loop
+        return loop
+
+    def start_response(self, status, headers, exc_info=None):
+        pass
@@ -0,0 +1,48 @@
+from pulsar import Setting
+
+import lux
+
+
+class Command(lux.Command):
+    help = ('Show timing statistics of event handlers collected while '
+            'serving synthetic requests.')
+    option_list = (
+        Setting('requests',
+                ['--requests'],
+                type=int,
+                default=100,
+                desc='Number of requests to serve.'),
+        Setting('path',
+                ['--path'],
+                default='/',
+                desc='Path of requests.'),
+        Setting('event',
+                ['--event'],
+                desc='Show statistics for this event only.'))
+
+    def run(self, options, **params):
+        app = self.app
+        if not getattr(app, 'handler', None):
+            app = app.callable.setup()
+        app.event_timing = True
+        app.compile_events()
+        for _ in range(options.requests):
+            request = app.wsgi_request(path=options.path,
+                                       extra={'HTTP_ACCEPT': 'text/html'})
+            try:
+                app(request.environ, self.start_response)
+            except Exception:
+                self.logger.exception('Could not serve %s', options.path)
+                break
+        stats = app.event_stats(options.event)
+        self.write('%-20s %-45s %8s %12s %12s %12s' %
+                   ('event', 'handler', 'calls', 'total ms', 'mean ms',
+                    'max ms'))
+        for s in stats:
+            self.write('%-20s %-45s %8d %12.3f %12.3f %12.3f' %
+                       (s['event'], s['handler'], s['calls'],
+                        1000*s['total'], 1000*s['mean'], 1000*s['max']))
+        return stats
+
+    def start_response(self, status, headers, exc_info=None):
+        pass
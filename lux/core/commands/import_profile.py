@@ -0,0 +1,157 @@
+import sys
+import subprocess
+
+from pulsar import Setting
+
+import lux
+from lux import CommandError
+
+
+IMPORT_TIMER = '''\
+import sys
+import time
+
+
+class TimedLoader:
+
+    def __init__(self, loader, name, stack):
+        self.loader = loader
+        self.name = name
+        self.stack = stack
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        create = getattr(self.loader, 'create_module', None)
+        return create(spec) if create else None
+
+    def exec_module(self, module):
+        self.timed(self.loader.exec_module, module)
+
+    def load_module(self, fullname):
+        return self.timed(self.loader.load_module, fullname)
+
+    def timed(self, load, arg):
+        stack = self.stack
+        level = len(stack)
+        stack.append(0)
+        start = time.perf_counter()
+        try:
+            return load(arg)
+        finally:
+            cumulative = int(1000000*(time.perf_counter() - start))
+            children = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            sys.stderr.write('import time: %9d | %10d | %s%s\\n' %
+                             (cumulative - children, cumulative,
+                              '  '*level, self.name))
+
+
+class ImportTimer:
+
+    def __init__(self):
+        self.stack = []
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None:
+                    spec.loader = TimedLoader(spec.loader, name, self.stack)
+                return spec
+
+
+sys.meta_path.insert(0, ImportTimer())
+'''
+
+
+def parse_importtime(text):
+    '''Parse the import times written by :data:`IMPORT_TIMER`, in the
+    format of ``python -X importtime``.
+
+    Return a list of ``(module, self, cumulative, level)`` tuples,
+    times are in microseconds.
+    '''
+    modules = []
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        bits = line[12:].split('|')
+        if len(bits) != 3:
+            continue
+        try:
+            self_time, cumulative = int(bits[0]), int(bits[1])
+        except ValueError:  # header
+            continue
+        name = bits[2].lstrip()
+        level = (len(bits[2]) - len(name) - 1) // 2
+        modules.append((name, self_time, cumulative, level))
+    return modules
+
+
+class Command(lux.Command):
+    help = ('Report the cumulative import time of modules loaded when '
+            'the application starts.')
+    option_list = (
+        Setting('handler',
+                ['--handler'],
+                action='store_true',
+                default=False,
+                desc='Build the wsgi handler as well.'),
+        Setting('top',
+                ['--top'],
+                type=int,
+                default=30,
+                desc='Number of modules to display.'),
+        Setting('prefix',
+                ['--prefix'],
+                default='',
+                desc='Display modules starting with this prefix only.'),
+        Setting('max_time',
+                ['--max-time'],
+                type=float,
+                default=0,
+                desc=('Fail if the total import time, in milliseconds, '
+                      'exceeds this value.')))
+
+    def run(self, options, **params):
+        modules = self.profile(options.handler)
+        total = sum((m[2] for m in modules if not m[3]))/1000
+        self.write('Total import time %.1f ms, %d modules' %
+                   (total, len(modules)))
+        self.write('%12s %12s  %s' % ('cumul. ms', 'self ms', 'module'))
+        selected = sorted((m for m in modules if
+                           m[0].startswith(options.prefix)),
+                          key=lambda m: m[2], reverse=True)
+        for name, self_time, cumulative, _ in selected[:options.top]:
+            self.write('%12.1f %12.1f  %s' % (cumulative/1000,
+                                              self_time/1000, name))
+        if options.max_time and total > options.max_time:
+            raise CommandError('Import time %.1f ms exceeds %.1f ms' %
+                               (total, options.max_time))
+        return selected
+
+    def profile(self, handler=False):
+        '''Start the application in a new interpreter and return the
+        import times of all modules.
+
+        Imports are timed by a :data:`sys.meta_path` finder wrapping the
+        loaders of the other finders, ``python -X importtime`` is only
+        available from python 3.7.
+        '''
+        script = ("%simport lux\n"
+                  "app = lux.App(%r, argv=['--log-level', 'none'])\n"
+                  "app.%s()" % (IMPORT_TIMER, self.app.config_module,
+                                'setup' if handler else 'commands'))
+        process = subprocess.Popen([sys.executable, '-c', script],
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   universal_newlines=True)
+        _, err = process.communicate()
+        if process.returncode:
+            raise CommandError('Could not start the application:\n%s' % err)
+        return parse_importtime(err)
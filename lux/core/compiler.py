@@ -0,0 +1,281 @@
+'''A template engine which compiles templates into python code objects.
+
+The syntax is a superset of python :class:`string.Template`, therefore
+all templates written for the ``python`` engine can be rendered by the
+``lux`` engine without changes:
+
+* ``$name`` and ``${name}`` are substituted with the ``name`` value
+  in the context, unknown names are left untouched (as in
+  :meth:`string.Template.safe_substitute`) and ``$$`` is an escape for ``$``
+* ``{% extends "base.html" %}`` renders the template ``base.html``
+  replacing its blocks with the blocks defined in the current template
+* ``{% block name %}...{% endblock %}`` defines a block which can be
+  overwritten by templates extending the current one
+* ``{% include "name.html" %}`` renders the template ``name.html``
+  with the current context
+
+Compiled code objects are cached in memory and, when the
+:setting:`TEMPLATE_CACHE_DIR` is set, on disk so that they survive
+worker restarts.
+'''
+import os
+import re
+import marshal
+import hashlib
+import tempfile
+from importlib.util import MAGIC_NUMBER
+
+from .engines import TemplateEngine, register_template_engine
+
+
+__all__ = ['LuxEngine', 'TemplateError']
+
+
+VERSION = b'1'
+
+_tag = r'{%\s*(?P<tag>[a-z]+)(?:\s+(?P<arg>.*?))?\s*%}'
+_identifier = r'[_a-z][_a-z0-9]*'
+_pattern = re.compile(r'''
+    \$(?:
+      (?P<escaped>\$)                 |   # escape sequence of two $
+      (?P<named>%(id)s)               |   # $ and a python identifier
+      {(?P<braced>%(id)s)}                # $ and a brace delimited identifier
+    ) |
+    %(tag)s
+    ''' % {'id': _identifier, 'tag': _tag},
+    re.IGNORECASE | re.ASCII | re.VERBOSE | re.DOTALL)
+
+
+class TemplateError(Exception):
+    '''Raised when a template cannot be compiled or rendered
+    '''
+
+
+def template_name(arg):
+    if arg and len(arg) > 1 and arg[0] == arg[-1] and arg[0] in '\'"':
+        return arg[1:-1]
+    raise TemplateError('Expected a quoted template name, got %s' % arg)
+
+
+class Code:
+    '''A python function in the generated source
+    '''
+    def __init__(self, name):
+        self.name = name
+        self.lines = ['def %s(context, blocks):' % name,
+                      '    get = context.get']
+        self.parts = []
+        self.args = []
+
+    def text(self, text):
+        if text:
+            self.parts.append(text)
+
+    def variable(self, name, raw):
+        self.parts.append(None)
+        self.args.append('get(%r, %r)' % (name, raw))
+
+    def line(self, line):
+        self.flush()
+        self.lines.append('    %s' % line)
+
+    def flush(self):
+        if self.args:
+            fmt = ''.join('%s' if part is None else part.replace('%', '%%')
+                          for part in self.parts)
+            self.lines.append('    yield %r %% (%s,)' %
+                              (fmt, ', '.join(self.args)))
+        elif self.parts:
+            self.lines.append('    yield %r' % ''.join(self.parts))
+        self.parts = []
+        self.args = []
+
+    def source(self):
+        self.flush()
+        if len(self.lines) == 2:
+            self.lines.append("    yield ''")
+        return '\n'.join(self.lines)
+
+
+def generate(text):
+    '''Generate the python source code for template ``text``
+    '''
+    root = Code('_root')
+    functions = [root]
+    stack = [root]
+    blocks = []
+    extends = None
+    pos = 0
+    for match in _pattern.finditer(text):
+        code = stack[-1]
+        code.text(text[pos:match.start()])
+        pos = match.end()
+        tag = match.group('tag')
+        if tag is None:
+            if match.group('escaped') is not None:
+                code.text('$')
+            else:
+                name = match.group('named') or match.group('braced')
+                code.variable(name, match.group())
+        elif tag == 'block':
+            name = match.group('arg')
+            if not name or not re.match('^%s$' % _identifier, name, re.I):
+                raise TemplateError('Invalid block name %s' % name)
+            if name in blocks:
+                raise TemplateError('Block %s defined twice' % name)
+            blocks.append(name)
+            code.line('yield from blocks[%r](context, blocks)' % name)
+            block = Code('_block_%s' % name)
+            functions.append(block)
+            stack.append(block)
+        elif tag == 'endblock':
+            if len(stack) == 1:
+                raise TemplateError('endblock without a block')
+            stack.pop()
+        elif tag == 'include':
+            name = template_name(match.group('arg'))
+            code.line('yield from _include(%r, context)' % name)
+        elif tag == 'extends':
+            if extends:
+                raise TemplateError('extends tag used twice')
+            extends = template_name(match.group('arg'))
+        else:
+            raise TemplateError('Unknown tag %s' % tag)
+    if len(stack) > 1:
+        raise TemplateError('Block %s not closed' % stack[-1].name[7:])
+    stack[-1].text(text[pos:])
+    source = [f.source() for f in functions]
+    source.append('_extends = %r' % extends)
+    source.append('_blocks = {%s}' % ', '.join('%r: _block_%s' % (b, b)
+                                               for b in blocks))
+    return '\n\n'.join(source)
+
+
+class Template:
+    '''A compiled template
+
+    .. attribute:: blocks
+
+        Dictionary of blocks defined by this template
+
+    .. attribute:: extends
+
+        The name of the template extended by this template or ``None``
+    '''
+    def __init__(self, engine, code, loader=None):
+        namespace = {'_include': self._include}
+        exec(code, namespace)
+        self.engine = engine
+        self.loader = loader
+        self.blocks = namespace['_blocks']
+        self.extends = namespace['_extends']
+        self._root = namespace['_root']
+
+    def __call__(self, context=None):
+        return self.render(context)
+
+    def render(self, context=None):
+        '''Render the template as a string
+        '''
+        return ''.join(self.stream(context))
+
+    def stream(self, context=None, blocks=None):
+        '''Render the template as an iterator over strings
+        '''
+        if context is None:
+            context = {}
+        if blocks:
+            all_blocks = self.blocks.copy()
+            all_blocks.update(blocks)
+        else:
+            all_blocks = self.blocks
+        if self.extends:
+            return self._load(self.extends).stream(context, all_blocks)
+        else:
+            return self._root(context, all_blocks)
+
+    def _load(self, name):
+        loader = self.loader
+        if loader is None:
+            raise TemplateError('Cannot load %s without a template loader' %
+                                name)
+        filename = loader.full_path(name)
+        if not filename:
+            raise TemplateError('Template %s not found' % name)
+        return loader.compiled(filename, self.engine.name)
+
+    def _include(self, name, context):
+        return self._load(name).stream(context)
+
+
+class LuxEngine(TemplateEngine):
+    '''Template engine compiling templates into python code objects
+
+    .. attribute:: cache_size
+
+        Maximum number of code objects kept in memory
+    '''
+    name = 'lux'
+    cache_size = 500
+
+    def __init__(self):
+        self._codes = {}
+
+    def __call__(self, text, context, loader=None):
+        return self.compile(text, loader).render(context)
+
+    def compile(self, text, loader=None):
+        cache_dir = None
+        if loader:
+            cache_dir = loader.app.config['TEMPLATE_CACHE_DIR']
+        return Template(self, self.code(text, cache_dir), loader)
+
+    def code(self, text, cache_dir=None):
+        '''The python code object for template ``text``.
+        '''
+        code = self._codes.get(text)
+        if code is None:
+            filename = None
+            if cache_dir:
+                key = hashlib.sha1(text.encode('utf-8') + VERSION)
+                filename = os.path.join(cache_dir,
+                                        '%s.luxc' % key.hexdigest())
+                code = self._load_bytecode(filename)
+            if code is None:
+                code = compile(generate(text), '<lux template>', 'exec')
+                if filename:
+                    self._store_bytecode(filename, code)
+            if len(self._codes) >= self.cache_size:
+                self._codes.pop(next(iter(self._codes)))
+            self._codes[text] = code
+        return code
+
+    def _load_bytecode(self, filename):
+        try:
+            with open(filename, 'rb') as fp:
+                data = fp.read()
+        except OSError:
+            return
+        magic = len(MAGIC_NUMBER)
+        if data[:magic] == MAGIC_NUMBER:
+            try:
+                return marshal.loads(data[magic:])
+            except (EOFError, ValueError, TypeError):
+                pass
+
+    def _store_bytecode(self, filename, code):
+        dirname = os.path.dirname(filename)
+        try:
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname)
+            # write to a temporary file first so that concurrent workers
+            # never read a partially written file
+            fd, tmp = tempfile.mkstemp(dir=dirname)
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(MAGIC_NUMBER + marshal.dumps(code))
+            os.replace(tmp, filename)
+        except OSError:
+            pass
+
+
+register_template_engine(LuxEngine.name, LuxEngine())
@@ -0,0 +1,46 @@
+from collections import ChainMap
+
+
+__all__ = ['TemplateContext']
+
+
+class TemplateContext(ChainMap):
+    '''A layered context dictionary for rendering templates.
+
+    Lookups fall through the layers in :attr:`~collections.ChainMap.maps`,
+    the first being the request layer where all writes go, the last
+    usually a read-only view of the application config.
+    Layers are never copied.
+
+    Extensions can add layers via the :meth:`add_layer` method and
+    keys which are evaluated only when used via the :meth:`lazy` method.
+    '''
+    def __init__(self, *maps):
+        super().__init__(*maps)
+        self._lazy = {}
+
+    def __contains__(self, key):
+        return key in self._lazy or super().__contains__(key)
+
+    def __missing__(self, key):
+        factory = self._lazy.pop(key, None)
+        if factory is None:
+            raise KeyError(key)
+        value = self.maps[0][key] = factory()
+        return value
+
+    def add_layer(self, mapping):
+        '''Add a ``mapping`` layer just below the request layer
+        '''
+        self.maps.insert(1, mapping)
+
+    def lazy(self, key, factory):
+        '''Add a ``key`` whose value is obtained by calling ``factory``,
+        with no arguments, the first time the key is accessed.
+        '''
+        self._lazy[key] = factory
+
+    def new_child(self, m=None):
+        child = super().new_child(m)
+        child._lazy = self._lazy
+        return child
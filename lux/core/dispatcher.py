@@ -0,0 +1,180 @@
+'''Dispatch requests to routers via a trie of their routes.
+
+When :setting:`ROUTER_TRIE` is on, consecutive :class:`.Router` in the
+wsgi handler middleware are compiled, once the application is loaded,
+into a :class:`.RouterDispatcher`. Routers, and their children, are
+indexed by the leading static segments of their routes so that only
+routers which can match a path are tried, in the same order as the
+middleware list. Catch-all routes, without a static prefix, are tried in
+their original position.
+
+The original middleware list is left untouched, routers added after the
+application is loaded are not dispatched until :func:`compile_middleware`
+is called again.
+'''
+import re
+from heapq import merge
+
+from pulsar.apps.wsgi import Router
+from pulsar.apps.wsgi.routers import update_args
+
+
+__all__ = ['RouteTrie', 'RouterDispatcher', 'compile_middleware']
+
+
+_static_segment = re.compile(r'^[\w\-]+$')
+
+
+def compile_middleware(middleware):
+    '''Return a new middleware list where groups of consecutive
+    :class:`.Router` are replaced by a :class:`.RouterDispatcher`
+    '''
+    compiled = []
+    routers = []
+    for m in middleware:
+        if dispatchable(m):
+            routers.append(m)
+            continue
+        if routers:
+            compiled.append(RouterDispatcher(routers))
+            routers = []
+        compiled.append(m)
+    if routers:
+        compiled.append(RouterDispatcher(routers))
+    return compiled
+
+
+def dispatchable(router):
+    '''Check if ``router`` resolves paths via the standard
+    :class:`.Router` algorithm
+    '''
+    cls = type(router)
+    return (isinstance(router, Router) and
+            cls.__call__ is Router.__call__ and
+            cls.resolve is Router.resolve)
+
+
+class RouteTrie:
+    '''A trie of path segments.
+
+    Each value is added with the static segments which prefix all the
+    paths it can match and an ``order``. The :meth:`candidates` method
+    returns the values which can match a path ordered by ``order``.
+    '''
+    __slots__ = ('children', 'values')
+
+    def __init__(self):
+        self.children = {}
+        self.values = []
+
+    def add(self, segments, order, value):
+        node = self
+        for segment in segments:
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = RouteTrie()
+            node = child
+        node.values.append((order, value))
+
+    def candidates(self, path):
+        '''List of values which can match ``path``, without the leading
+        slash
+        '''
+        node = self
+        found = [node.values] if node.values else []
+        for segment in path.split('/'):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.values:
+                found.append(node.values)
+        if len(found) == 1:
+            return [v for _, v in found[0]]
+        return [v for _, v in merge(*found)]
+
+
+class _Node:
+    '''A compiled :class:`.Router` with its route and the trie of
+    its children'''
+    __slots__ = ('router', 'route', 'children', 'plain')
+
+    def __init__(self, router):
+        self.router = router
+        self.route = router.route
+        self.plain = dispatchable(router)
+        self.children = None
+        if self.plain and router.routes:
+            self.children = _trie(router.routes)
+
+    def resolve(self, path, urlargs=None):
+        if not self.plain:
+            return self.router.resolve(path, urlargs)
+        # same algorithm as pulsar Router.resolve
+        route = self.route
+        match = route.match(path)
+        if match is None:
+            if not route.is_leaf:
+                return
+        elif '__remaining__' in match:
+            path = match.pop('__remaining__')
+            urlargs = update_args(urlargs, match)
+        else:
+            return self.router, update_args(urlargs, match)
+        if self.children:
+            for child in self.children.candidates(path):
+                args = child.resolve(path, urlargs)
+                if args is not None:
+                    return args
+
+
+def _prefix(route):
+    prefix = []
+    for dynamic, bit in route.breadcrumbs:
+        if dynamic or not _static_segment.match(bit):
+            break
+        prefix.append(bit)
+    return prefix
+
+
+def _trie(routers):
+    trie = RouteTrie()
+    for order, router in enumerate(routers):
+        node = _Node(router)
+        trie.add(_prefix(node.route), order, node)
+    return trie
+
+
+class RouterDispatcher:
+    '''Wsgi middleware dispatching requests to a list of
+    :class:`.Router` via a :class:`.RouteTrie`
+
+    .. attribute:: routers
+
+        The routers, in order of priority
+    '''
+    def __init__(self, routers):
+        self.routers = tuple(routers)
+        self.trie = _trie(self.routers)
+
+    def __repr__(self):
+        return '%s(%d routers)' % (self.__class__.__name__,
+                                   len(self.routers))
+
+    def __call__(self, environ, start_response=None):
+        path = (environ.get('PATH_INFO') or '/')[1:]
+        for node in self.trie.candidates(path):
+            args = node.resolve(path)
+            if args:
+                router, urlargs = args
+                response = router.response(environ, urlargs)
+                if response is not None:
+                    return response
+
+    def resolve(self, path):
+        '''Resolve ``path``, without the leading slash, into a
+        ``(router, urlargs)`` tuple or ``None``
+        '''
+        for node in self.trie.candidates(path):
+            args = node.resolve(path)
+            if args:
+                return args
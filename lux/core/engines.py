@@ -2,7 +2,7 @@ from string import Template
 
 from pulsar import ImproperlyConfigured
 
-__all__ = ['register_template_engine', 'template_engine']
+__all__ = ['register_template_engine', 'template_engine', 'TemplateEngine']
 
 default_engine = 'python'
 template_engines = {}
@@ -21,8 +21,36 @@ def register_template_engine(name, engine):
     template_engines[name] = engine
 
 
-def render(text, context):
-    return Template(text).safe_substitute(context) if context else text
+class TemplateEngine:
+    '''Base class for template engines.
+
+    A template engine is a callable accepting a template ``text``, a
+    ``context`` dictionary and an optional :class:`.TemplateLoader`
+    resolving included templates. Engines which can compile a template
+    implement the :meth:`compile` method so that compiled templates
+    can be cached by the :class:`.TemplateLoader`.
+    '''
+    def __call__(self, text, context, loader=None):
+        return self.compile(text, loader)(context) if context else text
+
+    def compile(self, text, loader=None):
+        '''Compile ``text`` into a callable accepting a context dictionary.
+
+        :param loader: optional :class:`.TemplateLoader` compiling the
+            template, used by engines supporting template inclusion.
+        '''
+        raise NotImplementedError
+
+
+class PythonEngine(TemplateEngine):
+    '''Template engine based on python :class:`string.Template`
+    '''
+    def compile(self, text, loader=None):
+        substitute = Template(text).safe_substitute
+        return lambda context: substitute(context) if context else text
+
+
+render = PythonEngine()
 
 
 register_template_engine(default_engine, render)
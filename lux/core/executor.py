@@ -0,0 +1,188 @@
+'''Run blocking router handlers in bounded pools of threads.
+
+Router methods which block, such as database sessions, calls to remote
+services or password hashing, can be executed in an :class:`.ExecutorPool`
+so that the event loop keeps serving other requests. Pools are created
+on demand from the :setting:`EXECUTOR_POOLS` dictionary.
+
+Use the :func:`in_executor` decorator on router methods::
+
+    class Reports(lux.Router):
+
+        @in_executor('db')
+        def get(self, request):
+            ...
+
+or :func:`executor_wrapper` as the ``response_wrapper`` of a router and
+all its children::
+
+    Router('reports', response_wrapper=executor_wrapper('db'))
+'''
+import threading
+from functools import wraps
+from time import perf_counter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from pulsar import Http404, isfuture, chain_future, get_event_loop
+from pulsar.apps import wsgi
+from pulsar.apps.wsgi import WsgiResponse
+from pulsar.apps.wsgi.utils import handle_wsgi_error
+
+from lux.utils import percentile
+
+
+__all__ = ['ExecutorPool', 'WsgiHandler', 'in_executor', 'executor_wrapper']
+
+
+def in_executor(pool='default'):
+    '''Decorator running a :class:`.Router` method in the executor
+    ``pool``
+    '''
+    def _(method):
+
+        @wraps(method)
+        def _method(router, request):
+            return request.app.run_in_executor(pool, method, router, request)
+
+        _method.executor = pool
+        return _method
+
+    return _
+
+
+def executor_wrapper(pool='default'):
+    '''A ``response_wrapper`` for :class:`.Router` running all handlers
+    in the executor ``pool``
+    '''
+    def response_wrapper(handler, request):
+        return request.app.run_in_executor(pool, handler, request)
+
+    return response_wrapper
+
+
+class ExecutorPool:
+    '''A bounded pool of threads collecting statistics.
+
+    .. attribute:: pending
+
+        Number of tasks waiting for a thread.
+
+    .. attribute:: active
+
+        Number of tasks running.
+    '''
+    def __init__(self, name, max_workers=10, window=1000):
+        self.name = name
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers)
+        self.pending = 0
+        self.active = 0
+        self.served = 0
+        self._waits = deque(maxlen=window)
+        self._times = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '%s(%s, %d)' % (self.__class__.__name__, self.name,
+                               self.max_workers)
+    __str__ = __repr__
+
+    def run(self, func, *args, loop=None):
+        '''Run ``func`` in a thread and return a future
+        '''
+        loop = loop or get_event_loop()
+        with self._lock:
+            self.pending += 1
+        return loop.run_in_executor(self.executor, self._run, perf_counter(),
+                                    func, args)
+
+    def stats(self):
+        '''Dictionary of statistics, times are in milliseconds'''
+        with self._lock:
+            waits = sorted(self._waits)
+            times = sorted(self._times)
+            stats = {'name': self.name,
+                     'size': self.max_workers,
+                     'queue': self.pending,
+                     'active': self.active,
+                     'served': self.served}
+        stats.update({'wait_mean': 1000*sum(waits)/len(waits) if waits else 0,
+                      'wait_p50': 1000*percentile(waits, 50),
+                      'wait_p99': 1000*percentile(waits, 99),
+                      'wait_max': 1000*waits[-1] if waits else 0,
+                      'time_p50': 1000*percentile(times, 50),
+                      'time_p99': 1000*percentile(times, 99)})
+        return stats
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait)
+
+    def _run(self, queued, func, args):
+        start = perf_counter()
+        with self._lock:
+            self.pending -= 1
+            self.active += 1
+            self._waits.append(start - queued)
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.served += 1
+                self._times.append(perf_counter() - start)
+
+
+class WsgiHandler(wsgi.WsgiHandler):
+    '''A synchronous :class:`~pulsar.apps.wsgi.WsgiHandler` accepting
+    futures from middleware, such as router handlers running in an
+    :class:`.ExecutorPool`.
+
+    The response middleware is applied once the future is done.
+
+    .. attribute:: dispatch
+
+        Optional list of middleware served in place of
+        :attr:`middleware`, such as the compiled routers of
+        :func:`.compile_middleware`.
+    '''
+    dispatch = None
+
+    def __call__(self, environ, start_response):
+        response = None
+        try:
+            for middleware in self.dispatch or self.middleware:
+                response = middleware(environ, start_response)
+                if response is not None:
+                    break
+            if response is None:
+                raise Http404
+
+        except Exception as exc:
+            response = handle_wsgi_error(environ, exc)
+
+        if isfuture(response):
+            return self.response_future(environ, start_response, response)
+        return self.finish_response(environ, start_response, response)
+
+    def finish_response(self, environ, start_response, response):
+        '''Apply the response middleware and start the ``response``'''
+        if isinstance(response, WsgiResponse) and not response.started:
+            for middleware in self.response_middleware:
+                response = middleware(environ, response) or response
+            response.start(start_response)
+        return response
+
+    def response_future(self, environ, start_response, future):
+        '''Chain :meth:`finish_response` to the ``future`` response
+        '''
+        def callback(response):
+            if response is None:
+                response = handle_wsgi_error(environ, Http404())
+            return self.finish_response(environ, start_response, response)
+
+        def errback(exc):
+            response = handle_wsgi_error(environ, exc)
+            return self.finish_response(environ, start_response, response)
+
+        return chain_future(future, callback=callback, errback=errback)
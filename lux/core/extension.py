@@ -2,6 +2,7 @@ import os
 import sys
 import logging
 from copy import copy
+from time import perf_counter
 from inspect import getfile, getmodule
 
 from pulsar import HttpException
@@ -15,7 +16,9 @@ __all__ = ['Extension', 'Parameter']
 ALL_EVENTS = ('on_config',  # Config ready.
               'on_loaded',  # Wsgi handler ready.
               'on_start',  # Wsgi server starts. Extra args: server
+              'on_warm_up',  # Worker warms up before serving requests
               'on_request',  # Fired when a new request arrives
+              'on_html_prototype',  # Html prototype built. Extra args: html
               'on_html_document',  # Html doc built. Extra args: request, html
               'on_form',  # Form constructed. Extra args: form
               )
@@ -233,9 +236,74 @@ class EventHandler:
     def __call__(self, *args):
         return getattr(self.extension, self.name)(*args)
 
+    def compile(self):
+        '''The bound method handling the event
+        '''
+        return getattr(self.extension, self.name)
+
+
+class EventStats:
+    '''Timing statistics of an event handler
+    '''
+    __slots__ = ('event', 'handler', 'calls', 'total', 'max')
+
+    def __init__(self, event, handler):
+        self.event = event
+        self.handler = handler
+        self.calls = 0
+        self.total = 0
+        self.max = 0
+
+    def as_dict(self):
+        return {'event': self.event,
+                'handler': self.handler,
+                'calls': self.calls,
+                'total': self.total,
+                'max': self.max,
+                'mean': self.total/self.calls if self.calls else 0}
+
+
+class TimedHandler:
+    '''An event handler recording its :class:`EventStats`
+    '''
+    __slots__ = ('handler', 'stats')
+
+    def __init__(self, handler, stats):
+        self.handler = handler
+        self.stats = stats
+
+    def __repr__(self):
+        return self.stats.handler
+    __str__ = __repr__
+
+    def __call__(self, *args):
+        start = perf_counter()
+        try:
+            return self.handler(*args)
+        finally:
+            elapsed = perf_counter() - start
+            stats = self.stats
+            stats.calls += 1
+            stats.total += elapsed
+            if elapsed > stats.max:
+                stats.max = elapsed
+
 
 class EventMixin:
+    '''Bind and fire events.
+
+    Event handlers are compiled into a tuple of bound methods per event
+    the first time an event is fired after handlers are bound.
+
+    .. attribute:: event_timing
+
+        When ``True``, compiled handlers collect timing statistics
+        available via the :meth:`event_stats` method.
+    '''
     events = None
+    event_timing = False
+    _compiled_events = None
+    _event_stats = None
 
     def bind_events(self, extension, all_events=None, exclude=None):
         if self.events is None:
@@ -251,10 +319,39 @@ class EventMixin:
             handlers = events[name]
             if hasattr(extension, name):
                 handlers.append(EventHandler(extension, name))
+        self._compiled_events = None
+
+    def compile_events(self):
+        '''Compile event handlers into tuples of bound methods.
+
+        Called when an event is fired after new handlers are bound.
+        '''
+        compiled = {}
+        if self._event_stats is None:
+            self._event_stats = {}
+        all_stats = self._event_stats
+        for event, handlers in (self.events or {}).items():
+            callables = []
+            for handler in handlers:
+                method = handler.compile()
+                if self.event_timing:
+                    key = (event, str(handler))
+                    stats = all_stats.get(key)
+                    if stats is None:
+                        stats = EventStats(event, str(handler))
+                        all_stats[key] = stats
+                    method = TimedHandler(method, stats)
+                callables.append(method)
+            compiled[event] = tuple(callables)
+        self._compiled_events = compiled
+        return compiled
 
     def fire(self, event, *args):
         '''Fire an ``event``.'''
-        handlers = self.events.get(event) if self.events else None
+        compiled = self._compiled_events
+        if compiled is None:
+            compiled = self.compile_events()
+        handlers = compiled.get(event)
         if handlers:
             for handler in handlers:
                 try:
@@ -265,3 +362,15 @@ class EventMixin:
                     self.logger.critical(
                         'Unhandled exception while firing event %s', handler,
                         exc_info=True)
+
+    def event_stats(self, event=None):
+        '''List of timing statistics of event handlers, ordered by total
+        time spent in the handler.
+
+        Statistics are collected only when :attr:`event_timing` is ``True``.
+
+        :param event: optional event name to filter statistics
+        '''
+        stats = (s.as_dict() for s in (self._event_stats or {}).values()
+                 if not event or s.event == event)
+        return sorted(stats, key=lambda s: s['total'], reverse=True)
@@ -0,0 +1,169 @@
+'''Green pool serving the wsgi handler when :setting:`GREEN_WSGI` is on.
+
+It extends the pulsar green pool with statistics (queue depth, active
+greenlets and wait times of requests before a greenlet picks them up)
+and an optional adaptive mode which resizes the pool between
+:setting:`GREEN_WSGI` and :setting:`GREEN_WSGI_MAX` greenlets from the
+observed wait times.
+'''
+from time import perf_counter
+from collections import deque
+
+from pulsar.apps.wsgi import WsgiResponse
+from pulsar.apps.greenio import GreenPool, GreenletWorker, WsgiGreen
+
+from lux.utils import percentile
+
+from .wrappers import JsonRouter
+
+
+class AdaptiveGreenPool(GreenPool):
+    '''A :class:`~pulsar.apps.greenio.GreenPool` collecting statistics
+    and, optionally, adapting its size to the load.
+
+    When ``max_workers`` is greater than ``min_workers`` the pool grows
+    when the mean wait time of the last ``window`` tasks exceeds
+    ``target_wait`` seconds and shrinks, retiring idle greenlets, when it
+    is well below it.
+    '''
+    def __init__(self, max_workers=None, loop=None, min_workers=None,
+                 target_wait=0.05, window=100, **kw):
+        super().__init__(max_workers, loop=loop, **kw)
+        self.min_workers = min(min_workers or self._max_workers,
+                               self._max_workers)
+        self.max_workers = self._max_workers
+        self._max_workers = self.min_workers
+        self.target_wait = target_wait
+        self.pending = 0
+        self.served = 0
+        self.resized = 0
+        self._waits = deque(maxlen=window)
+
+    @property
+    def adaptive(self):
+        return self.max_workers > self.min_workers
+
+    @property
+    def size(self):
+        '''Current maximum number of greenlets'''
+        return self._max_workers
+
+    def submit(self, func, *args, **kwargs):
+        self.pending += 1
+        return super().submit(self._run_task, perf_counter(), func, args,
+                              kwargs)
+
+    def stats(self):
+        '''Dictionary of statistics, wait times are in milliseconds'''
+        waits = sorted(self._waits)
+        greenlets = len(self._greenlets)
+        return {'size': self.size,
+                'min_size': self.min_workers,
+                'max_size': self.max_workers,
+                'greenlets': greenlets,
+                'active': greenlets - len(self._available),
+                'queue': self.pending,
+                'served': self.served,
+                'resized': self.resized,
+                'wait_mean': 1000*sum(waits)/len(waits) if waits else 0,
+                'wait_p50': 1000*percentile(waits, 50),
+                'wait_p99': 1000*percentile(waits, 99),
+                'wait_max': 1000*waits[-1] if waits else 0}
+
+    def resize(self):
+        '''Adapt the size of the pool to the observed wait times.
+
+        Run in the main greenlet of the event loop thread.
+        '''
+        waits = self._waits
+        if not waits:
+            return
+        mean = sum(waits)/len(waits)
+        size = self._max_workers
+        if mean > self.target_wait and size < self.max_workers:
+            size = min(size + max(size // 4, 1), self.max_workers)
+        elif (mean < 0.25*self.target_wait and size > self.min_workers and
+                len(self._available) > 1):
+            size = max(size - len(self._available) // 2, self.min_workers)
+        if size != self._max_workers:
+            self._max_workers = size
+            self.resized += 1
+            waits.clear()
+            self._retire()
+            self._start_greenlets()
+
+    # INTERNALS
+    def _run_task(self, queued, func, args, kwargs):
+        # Run in a greenlet of the pool
+        self.pending -= 1
+        self._waits.append(perf_counter() - queued)
+        self.served += 1
+        if self.adaptive and not self.served % self._waits.maxlen:
+            self._loop.call_soon(self.resize)
+        return func(*args, **kwargs)
+
+    def _check_queue(self):
+        self._retire()
+        super()._check_queue()
+
+    def _start_greenlets(self):
+        # Start a greenlet for each queued task not picked up by an idle
+        # greenlet, up to the pool size. New greenlets become available
+        # and pick a task from the queue
+        count = min(self.pending - len(self._available),
+                    self._max_workers - len(self._greenlets))
+        for _ in range(count):
+            greenlet = GreenletWorker(self._green_run)
+            self._greenlets.add(greenlet)
+            greenlet.switch()
+
+    def _retire(self):
+        # Kill idle greenlets in excess of the pool size
+        while (len(self._greenlets) > self._max_workers and
+               self._available):
+            greenlet = self._available.pop()
+            self._greenlets.discard(greenlet)
+            greenlet.throw()
+
+
+class GreenWsgi(WsgiGreen):
+    '''Serve a wsgi handler on an :class:`.AdaptiveGreenPool`.
+
+    When ``max_queue`` is positive, requests arriving while more than
+    ``max_queue`` requests wait for a greenlet are served a ``503``
+    response straight away.
+    '''
+    def __init__(self, wsgi, max_workers=None, min_workers=None,
+                 max_queue=0, target_wait=0.05):
+        super().__init__(wsgi, max_workers)
+        self.min_workers = min_workers
+        self.max_queue = max_queue
+        self.target_wait = target_wait
+        self.rejected = 0
+
+    def __call__(self, environ, start_response):
+        if self.pool is None:
+            self.pool = AdaptiveGreenPool(max_workers=self.max_workers,
+                                          min_workers=self.min_workers,
+                                          target_wait=self.target_wait)
+        elif self.max_queue and self.pool.pending >= self.max_queue:
+            self.rejected += 1
+            return WsgiResponse(503, b'Service Unavailable',
+                                response_headers=[('Retry-After', '1')],
+                                content_type='text/plain')
+        return self.pool.submit(self._green_handler, environ, start_response)
+
+    def stats(self):
+        stats = self.pool.stats() if self.pool else {}
+        stats['rejected'] = self.rejected
+        return stats
+
+
+class GreenStatsRouter(JsonRouter):
+    '''Serve the statistics of the :class:`.GreenWsgi` handler'''
+    green = None
+
+    def get(self, request):
+        response = request.response
+        response.content = request.app.json_codec.dumps(self.green.stats())
+        return response
@@ -0,0 +1,154 @@
+import os
+
+from .engines import template_engine
+
+
+__all__ = ['TemplateLoader']
+
+
+class TemplateLoader:
+    '''Load and cache templates for an :class:`.Application`.
+
+    The loader maintains an index of template names to file locations,
+    built once by walking the ``templates`` directories of all
+    :setting:`EXTENSIONS` and of lux core. Template sources and
+    compiled templates (for engines supporting compilation) are cached
+    in memory. When the application runs in debug mode, cached entries
+    are invalidated when the modification time of a template file changes.
+
+    .. attribute:: directories
+
+        List of template directories in order of priority, the first
+        directory containing a template name wins.
+
+    An ``index`` of template names, usually from the startup
+    :class:`.Manifest`, can be passed to avoid walking the directories.
+
+    .. attribute:: tracking
+
+        When a set, the file names of templates used while rendering are
+        added to it. Used by incremental builds to record the templates
+        a page depends on. Default ``None``.
+    '''
+    tracking = None
+
+    def __init__(self, app, directories, index=None):
+        self.app = app
+        self.directories = list(directories)
+        self._sources = {}
+        self._compiled = {}
+        if index is None:
+            self.index()
+        else:
+            self._index = dict(index)
+
+    def index(self):
+        '''Build the index of template names from :attr:`directories`
+        '''
+        index = {}
+        for directory in reversed(self.directories):
+            for dirpath, _, filenames in os.walk(directory):
+                rel_dir = os.path.relpath(dirpath, directory)
+                for filename in filenames:
+                    name = (filename if rel_dir == os.curdir else
+                            os.path.join(rel_dir, filename))
+                    index[name] = os.path.join(dirpath, filename)
+        self._index = index
+
+    def full_path(self, names):
+        '''Return the full path of the first template in ``names`` found
+        in the index or ``None``
+        '''
+        if not isinstance(names, (list, tuple)):
+            names = (names,)
+        for name in names:
+            filename = self._index.get(name)
+            if filename is None and self.app.debug:
+                # templates could have been added while developing
+                self.index()
+                filename = self._index.get(name)
+            if filename:
+                return filename
+
+    def source(self, filename):
+        '''The source text of template ``filename``
+        '''
+        if self.tracking is not None:
+            self.tracking.add(filename)
+        entry = self._sources.get(filename)
+        debug = self.app.debug
+        if entry is not None:
+            if not debug or entry[0] == os.stat(filename).st_mtime:
+                return entry[1]
+        mtime = os.stat(filename).st_mtime if debug else None
+        with open(filename, 'r') as file:
+            text = file.read()
+        self._sources[filename] = (mtime, text)
+        return text
+
+    def last_modified(self):
+        '''Latest modification time of the templates loaded so far'''
+        mtimes = [os.stat(f).st_mtime for f in tuple(self._sources)
+                  if os.path.isfile(f)]
+        return max(mtimes) if mtimes else 0
+
+    def compiled(self, filename, engine=None):
+        '''The compiled template ``filename`` for a template ``engine``.
+
+        Return ``None`` if the engine does not support compilation.
+        '''
+        engine = engine or self.app.config['DEFAULT_TEMPLATE_ENGINE']
+        text = self.source(filename)
+        key = (engine, filename)
+        entry = self._compiled.get(key)
+        # The source text is a new object when the file was reloaded
+        if entry is None or entry[0] is not text:
+            compile = getattr(template_engine(engine), 'compile', None)
+            try:
+                compiled = compile(text, loader=self) if compile else None
+            except NotImplementedError:
+                compiled = None
+            entry = (text, compiled)
+            self._compiled[key] = entry
+        return entry[1]
+
+    def preload(self, names, engine=None):
+        '''Load and compile templates ``names`` found in the index.
+
+        Return the number of templates loaded
+        '''
+        loaded = 0
+        for name in set(names):
+            filename = self.full_path(name)
+            if filename:
+                self.compiled(filename, engine)
+                loaded += 1
+        return loaded
+
+    def render(self, filename, context=None, engine=None):
+        '''Render template ``filename`` with ``context``
+        '''
+        if not filename:
+            return ''
+        engine = engine or self.app.config['DEFAULT_TEMPLATE_ENGINE']
+        compiled = self.compiled(filename, engine)
+        if compiled is not None:
+            return compiled(context)
+        else:
+            return template_engine(engine)(self.source(filename), context)
+
+    def stream(self, filename, context=None, engine=None):
+        '''Render template ``filename`` with ``context`` as an iterator
+        over strings.
+
+        Compiled templates with a ``stream`` method are rendered in chunks,
+        otherwise the whole template is rendered at once.
+        '''
+        if filename:
+            engine = engine or self.app.config['DEFAULT_TEMPLATE_ENGINE']
+            compiled = self.compiled(filename, engine)
+            stream = getattr(compiled, 'stream', None)
+            if stream:
+                yield from stream(context)
+            else:
+                yield self.render(filename, context, engine)
@@ -0,0 +1,172 @@
+import os
+import sys
+import json
+from collections import OrderedDict
+from importlib.util import find_spec
+
+from lux import __version__
+
+from .commands import ConsoleParser, commands_usage
+
+
+__all__ = ['Manifest', 'manifest_path']
+
+
+MANIFEST_VERSION = 1
+
+
+def manifest_path(config_module):
+    '''Path of the startup manifest for ``config_module``.
+
+    The manifest is located in the directory of the config module.
+    Return ``None`` if the config module is not a python file.
+    '''
+    try:
+        spec = find_spec(config_module)
+    except (ImportError, ValueError):
+        return None
+    if spec and spec.origin and os.path.isfile(spec.origin):
+        name = config_module.split('.')[-1]
+        return os.path.join(os.path.dirname(spec.origin),
+                            '.%s.manifest.json' % name)
+
+
+class Manifest(ConsoleParser):
+    '''Startup manifest of an :class:`.Application`.
+
+    A json file written next to the config module by :func:`.execute_app`
+    which contains the commands available in each extension, parameter
+    defaults, the template index and media directories.
+    It is valid as long as the modification times of the config module,
+    extensions, commands and template directories are unchanged.
+
+    With a valid manifest, help and command resolution on the command line
+    do not need to import extensions and their commands packages.
+    '''
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+
+    def __contains__(self, command):
+        return any(command in cmnds for cmnds in self.commands.values())
+
+    @classmethod
+    def load(cls, path):
+        '''Load a manifest from ``path``, return ``None`` if not available
+        '''
+        try:
+            with open(path, 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if isinstance(data, dict):
+            return cls(path, data)
+
+    @classmethod
+    def build(cls, app, path):
+        '''Build the manifest of an :class:`.Application`
+        '''
+        config = app.config
+        loader = app.template_loader
+        mtimes = [app.meta.file]
+        for ext in app.extensions.values():
+            mtimes.extend((ext.meta.path, ext.meta.file))
+        for name in app.commands:
+            modname = name + ('.core' if name == 'lux' else '') + '.commands'
+            mtimes.append(sys.modules[modname].__path__[0])
+        for directory in loader.directories:
+            mtimes.extend((dirpath for dirpath, _, _ in os.walk(directory)))
+        parameters = OrderedDict()
+        for p in config['_parameters'].values():
+            parameters[p.name] = dict(default=p.default, doc=p.doc,
+                                      extension=getattr(p, 'extension', None))
+        data = {'manifest': MANIFEST_VERSION,
+                'lux': __version__,
+                'python': list(sys.version_info[:2]),
+                'version': app.get_version(),
+                'config_module': app.config_module,
+                'description': config['DESCRIPTION'],
+                'extensions': list(config['EXTENSIONS']),
+                'commands': [[name, list(cmnds)]
+                             for name, cmnds in app.commands.items()],
+                'parameters': parameters,
+                'templates': {'directories': loader.directories,
+                              'index': loader._index},
+                'media': dict(((ext.meta.name, ext.meta.media_dir)
+                               for ext in app.extensions.values()
+                               if ext.meta.media_dir)),
+                'mtimes': dict(((p, _mtime(p)) for p in mtimes))}
+        return cls(path, json.loads(json.dumps(data, default=repr)))
+
+    def is_valid(self):
+        '''Check if this manifest is up to date
+        '''
+        data = self.data
+        if (data.get('manifest') != MANIFEST_VERSION or
+                data.get('lux') != __version__ or
+                data.get('python') != list(sys.version_info[:2])):
+            return False
+        for path, mtime in data.get('mtimes', {}).items():
+            if _mtime(path) != mtime:
+                return False
+        return True
+
+    def save(self):
+        '''Write the manifest to :attr:`path`, return ``True`` on success.
+        '''
+        tmp = '%s.%s' % (self.path, os.getpid())
+        try:
+            with open(tmp, 'w') as file:
+                json.dump(self.data, file, indent=2)
+            os.replace(tmp, self.path)
+        except OSError:
+            return False
+        return True
+
+    @property
+    def commands(self):
+        '''Ordered dictionary of commands names in each extension
+        '''
+        return OrderedDict(((name, tuple(cmnds))
+                            for name, cmnds in self.data['commands']))
+
+    @property
+    def parameters(self):
+        '''Dictionary of parameter names and their ``default``, ``doc``
+        and ``extension``
+        '''
+        return self.data['parameters']
+
+    @property
+    def templates(self):
+        return self.data['templates']
+
+    @property
+    def media(self):
+        '''Dictionary of extension names and their media directory
+        '''
+        return self.data['media']
+
+    # ConsoleParser
+    @property
+    def config_module(self):
+        return self.data['config_module']
+
+    def get_version(self):
+        return self.data['version']
+
+    def get_parser(self, script=None, nargs='?', **params):
+        '''The command line parser of the :class:`.Application`
+        '''
+        params['usage'] = commands_usage(self.data['description'], script,
+                                         self.commands)
+        parser = super().get_parser(**params)
+        parser.add_argument('command', nargs=nargs, help='command to run')
+        return parser
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
@@ -1,12 +1,21 @@
-import json
+import re
+import hashlib
+from copy import deepcopy
+from datetime import datetime
+from email.utils import parsedate_tz, mktime_tz
+from functools import lru_cache
+from collections import Counter
 
 from pulsar.apps.wsgi import (route, wsgi_request, cached_property,
                               html_factory)
 from pulsar.apps import wsgi
-from pulsar.apps.wsgi import RouterParam, Router, render_error_debug
-from pulsar.apps.wsgi.utils import error_messages
-from pulsar.utils.httpurl import JSON_CONTENT_TYPES
+from pulsar import HttpException
+from pulsar.apps.wsgi import RouterParam, render_error_debug
+from pulsar.apps.wsgi.utils import error_messages, parse_accept_header
+from pulsar.apps.wsgi.structures import ContentAccept
+from pulsar.utils.httpurl import JSON_CONTENT_TYPES, http_date
 from pulsar.utils.structures import mapping_iterator
+from pulsar.utils.html import escape
 
 from lux.utils import unique_tuple
 from pulsar.utils.exceptions import MethodNotAllowed
@@ -15,7 +24,8 @@ __all__ = ['Html', 'WsgiRequest', 'Router', 'HtmlRouter',
            'JsonRouter', 'route', 'wsgi_request',
            'cached_property', 'html_factory', 'RedirectRouter',
            'RouterParam', 'JSON_CONTENT_TYPES',
-           'DEFAULT_CONTENT_TYPES']
+           'DEFAULT_CONTENT_TYPES', 'ErrorPages', 'not_modified',
+           'negotiate']
 
 Html = wsgi.Html
 
@@ -24,36 +34,58 @@ DEFAULT_CONTENT_TYPES = unique_tuple(('text/html', 'text/plain', 'text/csv'),
                                      JSON_CONTENT_TYPES)
 
 
+class bound_property:
+    '''A request property evaluated once per request wrapper.
+
+    The value is stored in the instance dictionary, bypassing the
+    descriptor on subsequent lookups, once it is not ``None``.
+    '''
+    def __init__(self, method):
+        self.method = method
+        self.name = method.__name__
+        self.__doc__ = method.__doc__
+
+    def __get__(self, request, cls=None):
+        if request is None:
+            return self
+        value = self.method(request)
+        if value is not None:
+            request.__dict__[self.name] = value
+        return value
+
+
 class WsgiRequest(wsgi.WsgiRequest):
     '''Extend pulsar :class:`~pulsar.apps.wsgi.wrappers.WsgiRequest` with
     additional methods and attributes.
+
+    The :attr:`app` and :attr:`config` attributes are bound to the
+    wrapper the first time they are accessed.
     '''
-    @property
+    @bound_property
     def app(self):
         '''The :class:`.Application` running the website.'''
         return self.cache.app
 
-    @property
+    @bound_property
     def config(self):
         '''The :attr:`.Application.config` dictionary'''
-        return self.cache.app.config
+        app = self.app
+        return app.config if app else None
 
     @property
     def logger(self):
         '''Shortcut to app logger'''
-        return self.cache.app.logger
+        return self.app.logger
 
     @cached_property
     def html_document(self):
         '''The HTML document for this request.'''
         return self.app.html_document(self)
 
-    @cached_property
+    @property
     def cache_server(self):
-        cache = self.config['CACHE_SERVER']
-        if isinstance(cache, str):
-            raise NotImplementedError
-        return cache
+        '''The :attr:`.Application.cache_server`'''
+        return self.app.cache_server
 
     def has_permission(self, action, model):
         '''Check if this request has permission on ``model`` to perform a
@@ -64,6 +96,80 @@ class WsgiRequest(wsgi.WsgiRequest):
 wsgi.set_wsgi_request_class(WsgiRequest)
 
 
+@lru_cache(maxsize=512)
+def negotiate(accept, content_types):
+    '''The response content type for an ``accept`` header and a tuple of
+    ``content_types`` served by a router.
+
+    Return ``None`` when the client accepts any content type and
+    ``False`` when none of the ``content_types`` is acceptable.
+    Results are memoised, clients send few distinct ``Accept`` headers.
+    '''
+    accept = parse_accept_header(accept, ContentAccept)
+    if accept:
+        ct = accept.best_match(content_types)
+        if ct and '*' in ct:
+            ct = None
+        if not ct and content_types:
+            return False
+        return ct
+
+
+class Router(wsgi.Router):
+    '''Extend pulsar :class:`~pulsar.apps.wsgi.routers.Router` with
+    memoised content negotiation
+    '''
+    def content_type(self, request):
+        accept = request.environ.get('HTTP_ACCEPT')
+        if accept:
+            content_types = self.response_content_types
+            ct = negotiate(accept, tuple(content_types or ()))
+            if ct is False:
+                raise HttpException(status=415, msg=request.content_types)
+            return ct
+
+
+def not_modified(request, validator):
+    '''Conditional GET for a resource with a cheap ``validator``.
+
+    The ``validator`` is either a version key string, sent as an ``ETag``
+    for the response content type, or a last modified ``datetime`` or
+    timestamp, sent as ``Last-Modified``.
+    Return ``True`` when the client copy of the resource is fresh, the
+    ``request`` response is then a ``304 Not Modified``.
+    '''
+    if validator is None:
+        return False
+    response = request.response
+    environ = request.environ
+    if isinstance(validator, str):
+        key = '%s:%s' % (validator, response.content_type or '')
+        etag = '"%s"' % hashlib.md5(key.encode('utf-8')).hexdigest()
+        response['ETag'] = etag
+        match = environ.get('HTTP_IF_NONE_MATCH')
+        fresh = bool(match) and (match.strip() == '*' or etag in (
+            m.strip().replace('W/', '', 1) for m in match.split(',')))
+    else:
+        if isinstance(validator, datetime):
+            validator = validator.timestamp()
+        timestamp = int(validator)
+        response['Last-Modified'] = http_date(timestamp)
+        since = _parse_http_date(environ.get('HTTP_IF_MODIFIED_SINCE'))
+        fresh = since is not None and timestamp <= since
+    if fresh:
+        response.status_code = 304
+        response.content = None
+    return fresh
+
+
+def _parse_http_date(value):
+    if value:
+        try:
+            return mktime_tz(parsedate_tz(value))
+        except (TypeError, ValueError, OverflowError):
+            pass
+
+
 class RedirectRouter(Router):
 
     def __init__(self, routefrom, routeto):
@@ -79,11 +185,19 @@ class JsonRouter(Router):
 
 class HtmlRouter(Router):
     '''Extend pulsar :class:`~pulsar.apps.wsgi.routers.Router`
-    with content management.'''
+    with content management.
+
+    .. attribute:: stream_html
+
+        When ``True`` the html response is streamed: the ``head`` element
+        is sent to the client before the body is rendered.
+        Default ``False``.
+    '''
     in_nav = False
     controller = None
     html_body_template = None
     form = None
+    stream_html = False
     response_content_types = DEFAULT_CONTENT_TYPES
 
     def get(self, request):
@@ -91,6 +205,8 @@ class HtmlRouter(Router):
         and content-type is text/html
         '''
         response = request.response
+        if not_modified(request, self.validator(request)):
+            return response
         ct = response.content_type or ''
         if ct.startswith('text/html'):
             app = request.app
@@ -99,12 +215,23 @@ class HtmlRouter(Router):
             if isinstance(html, Html):
                 html = html.render(request)
             context = {'html_main': html}
-            return app.html_response(request, template, context=context)
+            return app.html_response(request, template, context=context,
+                                     stream=self.stream_html)
         elif ct == 'application/json':
             return self.get_json(request)
         else:
             return self.get_text(request)
 
+    def validator(self, request):
+        '''A cheap validator of the resource served by this router,
+        a version key or a last modified time.
+
+        When available, conditional requests are answered with
+        ``304 Not Modified`` without rendering the resource.
+        By default it returns ``None``.
+        '''
+        return None
+
     def get_html(self, request):
         '''Must be implemented by subclasses
         '''
@@ -135,7 +262,7 @@ class HtmlRouter(Router):
 
     def add_api_urls(self, request, api):
         for r in self.routes:
-            if isinstance(r, Router):
+            if isinstance(r, wsgi.Router):
                 r.add_api_urls(request, api)
 
     def get_api_info(self, app):
@@ -189,8 +316,57 @@ class HeadMeta(object):
             return self.head.get_meta(entry, meta_key=meta_key)
 
 
+def clone_html(element, memo=None):
+    '''Clone an :class:`~pulsar.apps.wsgi.AsyncString` element.
+
+    The clone shares strings and other immutable values with ``element``
+    while the containers it owns (children, attributes, data, scripts,
+    ``jscontext`` and so forth) are copied so that the clone can be
+    modified without affecting ``element``.
+    '''
+    if memo is None:
+        memo = {}
+    clone = memo.get(id(element))
+    if clone is None:
+        clone = element.__class__.__new__(element.__class__)
+        memo[id(element)] = clone
+        attrs = element.__dict__.copy()
+        for name, value in attrs.items():
+            if name == '_parent':
+                attrs[name] = None
+            elif name == '_children':
+                children = []
+                for child in value:
+                    if isinstance(child, wsgi.AsyncString):
+                        child = clone_html(child, memo)
+                        child._parent = clone
+                    children.append(child)
+                attrs[name] = children
+            elif isinstance(value, wsgi.AsyncString):
+                attrs[name] = clone_html(value, memo)
+            elif isinstance(value, (dict, list, set)):
+                attrs[name] = _copy_container(value)
+        attrs['_streamed'] = False
+        clone.__dict__ = attrs
+    return clone
+
+
+def _copy_container(value):
+    if isinstance(value, dict):
+        value = value.copy()
+        for key, child in value.items():
+            if isinstance(child, (dict, list, set)):
+                value[key] = deepcopy(child)
+        return value
+    return value.copy()
+
+
 def error_handler(request, exc):
-    '''Default renderer for errors.'''
+    '''Default renderer for errors.
+
+    When not in debug mode, error bodies of standard status codes are
+    served from the :class:`.ErrorPages` of the application.
+    '''
     app = request.app
     response = request.response
     if not response.content_type:
@@ -201,25 +377,135 @@ def error_handler(request, exc):
     content_type = None
     if response.content_type:
         content_type = response.content_type.split(';')[0]
-    is_html = content_type == 'text/html'
+    status_code = response.status_code
+    error_pages = app.error_pages
+    error_pages.counters[status_code] += 1
 
     if app.debug:
-        msg = render_error_debug(request, exc, is_html)
+        msg = render_error_debug(request, exc, content_type == 'text/html')
+        return error_body(request, content_type, msg)
+    elif error_pages.cache and status_code in error_messages:
+        return error_pages.get(request, exc, content_type)
     else:
-        msg = error_messages.get(response.status_code) or str(exc)
-        if is_html:
-            msg = app.render_template(['%s.html' % response.status_code,
-                                       'error.html'],
-                                      {'status_code': response.status_code,
-                                       'status_message': msg})
-    #
-    if is_html:
+        return error_pages.render(request, exc, content_type)
+
+
+def error_body(request, content_type, msg):
+    '''The body of an error response with message ``msg``'''
+    if content_type == 'text/html':
         doc = request.html_document
-        doc.head.title = response.status
+        doc.head.title = request.response.status
         doc.body.append(msg)
         return doc.render(request)
     elif content_type in JSON_CONTENT_TYPES:
-        return json.dumps({'status': response.status_code,
-                           'message': msg})
+        return request.app.json_codec.dumps(
+            {'status': request.response.status_code, 'message': msg})
     else:
         return '\n'.join(msg) if isinstance(msg, (list, tuple)) else msg
+
+
+class ErrorPages:
+    '''Error bodies of an :class:`.Application` rendered once per status
+    code and content type and served from memory.
+
+    Pages are rendered either when workers warm up, for the
+    :setting:`ERROR_PAGES` status codes, or the first time an error is
+    served. Only the request independent part of html pages, the error
+    template, is kept in memory, the html document is built for each
+    request. Request specific content is added to the error template via
+    the :setting:`ERROR_FRAGMENTS`, callables with the ``request`` and
+    the exception as arguments available in the context of error templates.
+
+    .. attribute:: counters
+
+        A :class:`~collections.Counter` of errors served by status code
+    '''
+    content_types = ('text/html', 'application/json', 'text/plain')
+
+    def __init__(self, app):
+        self.app = app
+        self.cache = app.config['ERROR_PAGES_CACHE']
+        self.fragments = dict(app.config['ERROR_FRAGMENTS'])
+        self.counters = Counter()
+        self.hits = 0
+        self._pages = {}
+
+    def get(self, request, exc, content_type):
+        '''The error body for the status code of ``request`` response'''
+        key = (request.response.status_code, content_type)
+        page = self._pages.get(key)
+        if page is None:
+            page = self._pages[key] = self._prerender(*key)
+        else:
+            self.hits += 1
+        if content_type == 'text/html':
+            if not isinstance(page, str):
+                page = ''.join(self._fill(page, request, exc))
+            return error_body(request, content_type, page)
+        return page
+
+    def render(self, request, exc, content_type, fragments=None):
+        '''Render the error body for ``request`` without the cache'''
+        status_code = request.response.status_code
+        msg = error_messages.get(status_code) or str(exc)
+        if content_type == 'text/html':
+            if fragments is None:
+                fragments = dict(((name, escape(fragment(request, exc)))
+                                  for name, fragment
+                                  in self.fragments.items()))
+            msg = self._template(status_code, msg, fragments)
+        return error_body(request, content_type, msg)
+
+    def prerender(self, status_codes, content_types=None):
+        '''Render the error pages for ``status_codes`` and
+        ``content_types``. Return the number of pages in memory
+        '''
+        for status_code in status_codes:
+            if status_code not in error_messages:
+                continue
+            for content_type in content_types or self.content_types:
+                key = (status_code, content_type)
+                if key not in self._pages:
+                    self._pages[key] = self._prerender(*key)
+        return len(self._pages)
+
+    def clear(self):
+        self._pages.clear()
+
+    def stats(self):
+        return {'counters': dict(self.counters),
+                'pages': len(self._pages),
+                'hits': self.hits}
+
+    def _template(self, status_code, msg, fragments):
+        context = {'status_code': status_code,
+                   'status_message': msg}
+        context.update(fragments)
+        return self.app.render_template(['%s.html' % status_code,
+                                         'error.html'], context)
+
+    def _prerender(self, status_code, content_type):
+        msg = error_messages[status_code]
+        if content_type == 'text/html':
+            markers = dict(((name, _fragment_marker % name)
+                            for name in self.fragments))
+            body = self._template(status_code, msg, markers)
+            parts = _fragment_re.split(body)
+            return body if len(parts) == 1 else parts
+        elif content_type in JSON_CONTENT_TYPES:
+            return self.app.json_codec.dumps({'status': status_code,
+                                              'message': msg})
+        else:
+            return msg
+
+    def _fill(self, parts, request, exc):
+        fragments = self.fragments
+        for n, part in enumerate(parts):
+            if n % 2:
+                fragment = fragments.get(part)
+                part = escape(fragment(request, exc)) if fragment else ''
+            yield part
+
+
+_fragment_marker = '<!--lux-fragment:%s-->'
+_fragment_re = re.compile(r'<!--lux-fragment:(\w+)-->')
@@ -66,21 +66,21 @@ class Extension(lux.Extension):
         Parameter('NGMODULES', [], 'Angular module to load')
     ]
 
-    def on_html_document(self, app, request, doc):
+    def on_html_prototype(self, app, doc):
         min = '.min' if app.config['MINIFIED_MEDIA'] else ''
         js = app.template('lux.require%s.js' % min)
         doc.head.embedded_js.append(js)
         doc.body.data({'ng-model': 'page',
                        'ng-controller': 'Page',
                        'page': ''})
-        jscontext = doc.jscontext
-        #
         add_ng_modules(doc, app.config['NGMODULES'])
-        router = angular_router(request.app_handler)
-
         if app.config['HTML5_NAVIGATION']:
             doc.head.meta.append(Html('base', href=""))
 
+    def on_html_document(self, app, request, doc):
+        router = angular_router(request.app_handler)
+
+        if app.config['HTML5_NAVIGATION']:
             uirouter = app.config['ANGULAR_UI_ROUTER']
 
             if router and uirouter and request.cache.uirouter is not False:
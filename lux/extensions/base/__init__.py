@@ -21,13 +21,15 @@ import lux
 from lux import Parameter
 
 from .media import FileRouter, MediaRouter
+from .compress import GZipMiddleware
 
 
 class Extension(lux.Extension):
     _config = [
         Parameter('GZIP_MIN_LENGTH', 200,
                   'If a positive integer, a response middleware is added so '
-                  'that it encodes the response via the gzip algorithm.'),
+                  'that it encodes the response via the gzip algorithm. '
+                  'Streamed responses are compressed chunk by chunk.'),
         Parameter('USE_ETAGS', False, ''),
         Parameter('CLEAN_URL', False,
                   'When ``True``, requests on urls with consecutive slashes '
@@ -53,12 +55,12 @@ class Extension(lux.Extension):
         gzip = app.config['GZIP_MIN_LENGTH']
         middleware = []
         if gzip:
-            middleware.append(wsgi.GZipMiddleware(gzip))
+            middleware.append(GZipMiddleware(gzip))
         if app.config['USE_ETAGS']:
             middleware.append(self.etag)
         return middleware
 
-    def on_html_document(self, app, request, doc):
+    def on_html_prototype(self, app, doc):
         favicon = app.config['FAVICON']
         if favicon:
             parsed = urlparse(favicon)
@@ -75,7 +77,7 @@ class Extension(lux.Extension):
     def etag(self, environ, response):
         if response.has_header('ETag'):
             etag = response['ETag']
-        elif response.streaming:
+        elif response.is_streamed:
             etag = None
         else:
             etag = '"%s"' % hashlib.md5(response.content).hexdigest()
@@ -0,0 +1,50 @@
+import zlib
+
+from pulsar.apps import wsgi
+from pulsar.apps.wsgi.response import re_accepts_gzip, re_media_type
+
+
+class GZipMiddleware(wsgi.GZipMiddleware):
+    '''A :class:`~pulsar.apps.wsgi.GZipMiddleware` which compresses
+    streamed responses too.
+
+    Each chunk of a streamed response is compressed and flushed so that
+    the client receives data as soon as it is produced.
+    '''
+    def available(self, environ, response):
+        if not response.is_streamed:
+            return super().available(environ, response)
+        if response.status_code != 200:
+            return False
+        headers = response.headers
+        if 'Content-Encoding' in headers:
+            return False
+        ctype = headers.get('Content-Type', '').lower()
+        if "msie" in environ.get('HTTP_USER_AGENT', '').lower():
+            if not ctype.startswith("text/") or "javascript" in ctype:
+                return False
+        if not re_accepts_gzip.search(environ.get('HTTP_ACCEPT_ENCODING', '')):
+            return False
+        return not re_media_type.match(ctype)
+
+    def execute(self, environ, response):
+        if not response.is_streamed:
+            return super().execute(environ, response)
+        headers = response.headers
+        headers.add_header('Vary', 'Accept-Encoding')
+        headers['Content-Encoding'] = 'gzip'
+        response.content = self.compress_stream(response.content,
+                                                response.encoding or 'utf-8')
+
+    def compress_stream(self, stream, encoding):
+        '''Compress an iterable over strings or bytes into gzip chunks
+        '''
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in stream:
+            if not isinstance(chunk, bytes):
+                chunk = chunk.encode(encoding)
+            data = compressor.compress(chunk)
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
@@ -28,14 +28,6 @@ import lux
 from lux import Parameter
 from lux.core.wrappers import HeadMeta
 
-from . import dropbox
-from . import facebook
-from . import github
-from . import google
-from . import linkedin
-from . import twitter
-
-
 from .oauth import get_oauths
 from .ogp import OGP
 from .views import OAuthRouter, oauth_context
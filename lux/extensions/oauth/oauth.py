@@ -1,5 +1,6 @@
 '''OAuth account handling
 '''
+from importlib import import_module
 
 __all__ = ['OAuth1', 'OAuth2', 'register_oauth']
 
@@ -34,7 +35,7 @@ class OAuth1(object):
         owner_key = token.get('oauth_token')
         owner_secret = token.get('oauth_token_secret')
         cache = request.cache_server
-        cache.add(key=owner_key, value=owner_secret, time=600)
+        cache.add(owner_key, owner_secret, timeout=600)
         return oauth.authorization_url(self.auth_uri)
 
     def access_token(self, request, data, redirect_uri=None):
@@ -93,8 +94,13 @@ def register_oauth(cls):
 
 def oauths(config):
     '''Return a dictionary of OAuth handlers with configuration
+
+    Lux providers are imported the first time they are configured.
     '''
     global Accounts
+    for name in config:
+        if name not in Accounts and name in PROVIDERS:
+            import_module('lux.extensions.oauth.%s' % name)
     oauths = {}
     for name, cls in Accounts.items():
         oauths[name] = cls(config.get(name))
@@ -113,3 +119,4 @@ def get_oauths(request):
 
 
 Accounts = {}
+PROVIDERS = ('dropbox', 'facebook', 'github', 'google', 'linkedin', 'twitter')
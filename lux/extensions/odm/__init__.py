@@ -19,8 +19,6 @@ from lux import Parameter
 
 from .exc import *
 from .mapper import Odm
-from . import sql
-from . import nosql
 
 
 class Extension(lux.Extension):
@@ -34,3 +32,7 @@ class Extension(lux.Extension):
     def on_config(self, app):
         '''Initialise Object Data Mapper'''
         app.odm = Odm(app, app.config['DATASTORE'])
+
+    def on_warm_up(self, app):
+        '''Create engines and open database pools'''
+        app.odm.warm_up()
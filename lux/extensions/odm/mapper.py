@@ -11,6 +11,8 @@ from pulsar.utils.log import LocalMixin
 
 
 _mappers = OrderedDict()
+# Modules implementing mappers, imported the first time mappers are needed
+MAPPER_MODULES = ['lux.extensions.odm.sql', 'lux.extensions.odm.nosql']
 _camelcase_re = re.compile(r'([A-Z]+)(?=[a-z0-9])')
 
 
@@ -101,6 +103,11 @@ class Mapper(metaclass=MapperType):
         '''
         pass
 
+    def warm_up(self):
+        '''Create datastore engines before serving requests
+        '''
+        self.engines()
+
 
 class Odm(Mapper, LocalMixin):
     '''Lazy object data mapper container
@@ -163,6 +170,10 @@ class Odm(Mapper, LocalMixin):
         for mapper in self:
             mapper.close()
 
+    def warm_up(self):
+        for mapper in self:
+            mapper.warm_up()
+
     def register(self, module, label, **params):
         pass
 
@@ -182,12 +193,20 @@ class Odm(Mapper, LocalMixin):
             raise ImproperlyConfigured('default datastore not specified')
 
         self.binds = datastore
+        load_mappers()
         return register_applications(self.app,
                                      copy(datastore),
                                      self.app.config['EXTENSIONS'],
                                      green=self.app.config['GREEN_WSGI'])
 
 
+def load_mappers():
+    '''Import :data:`MAPPER_MODULES` so that their mappers are registered
+    '''
+    for name in MAPPER_MODULES:
+        import_module(name)
+
+
 def model_label(attrs):
     label = attrs.pop('__label__', None)
     if not label and '__module__' in attrs:
@@ -1 +1,5 @@
-from ._rethinkdb import RethinkDB
+from ..store import register_store
+
+# Imported when the first rethinkdb store is created
+register_store("rethinkdb",
+               "lux.extensions.odm.nosql.backends._rethinkdb.RethinkDB")
@@ -4,7 +4,7 @@ from collections import OrderedDict
 
 from pulsar import Pool
 
-from ...store import RemoteStore, REV_KEY, Command, register_store
+from ...store import RemoteStore, REV_KEY, Command
 
 try:
     from rethinkdb import ast
@@ -150,6 +150,3 @@ class RethinkDB(RemoteStore):
         if REV_KEY not in instance:
             instance[REV_KEY] = instance.id
         return instance
-
-
-register_store("rethinkdb", "lux.extensions.odm.nosql.RethinkDB")
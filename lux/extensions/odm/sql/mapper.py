@@ -138,6 +138,12 @@ class SQL(Mapper):
         for engine in self.engines():
             engine.dispose()
 
+    def warm_up(self):
+        '''Open a connection in the pool of each engine
+        '''
+        for engine in self.engines():
+            engine.connect().close()
+
     # INTERNALS
     def _setup(self):
         # Setup SQL Alchemy engines
@@ -1,11 +1,18 @@
+from datetime import datetime
+
 from pulsar import PermissionDenied
-from pulsar.apps.wsgi import Json
+from pulsar.utils.httpurl import patch_vary_headers
 
-from lux import route
+import lux
+from lux import route, Json
 from lux.extensions import rest
 
 
 class CRUD(rest.RestRouter):
+    validator_field = None
+    '''Optional name of a field of instances used as validator for
+    conditional requests, a revision number or a last modified time
+    '''
 
     def __init__(self, model, url=None, *args, **kwargs):
         url = url or model
@@ -53,6 +60,8 @@ class CRUD(rest.RestRouter):
         instance = self.manager.get(request, request.urlargs['id'])
         if not instance:
             raise Http404
+        if lux.not_modified(request, self.validator(request, instance)):
+            return request.response
         url = request.absolute_uri()
         data = self.manager.instance_data(request, instance, url=url)
         return Json(data).http_response(request)
@@ -93,5 +102,24 @@ class CRUD(rest.RestRouter):
                 raise Http404
         raise PermissionDenied
 
+    def validator(self, request, instance):
+        '''The validator of ``instance`` for conditional requests, a version
+        key from the :attr:`validator_field` value and the request user.
+
+        Responses vary on cookies since the data may depend on the user.
+        '''
+        if self.validator_field:
+            value = getattr(instance, self.validator_field, None)
+            if value is not None:
+                patch_vary_headers(request.response.headers, ['Cookie'])
+                if isinstance(value, datetime):
+                    value = value.timestamp()
+                user = request.cache.user
+                if user and user.is_authenticated():
+                    user = user.get_id()
+                else:
+                    user = ''
+                return '%s:%s' % (value, user)
+
     def collection(self, request, limit, offset, text):
         raise NotImplementedError
@@ -0,0 +1,193 @@
+'''Extension for caching full HTML pages served to anonymous users.
+
+When added to the :setting:`EXTENSIONS` list, ``GET`` and ``HEAD`` requests
+from anonymous users are served from a cache of full responses, keyed by
+path, query string and the wsgi environ keys in :setting:`PAGE_CACHE_VARY`.
+On a miss, the HTML response is stored for :setting:`PAGE_CACHE_TIMEOUT`
+seconds unless the response ``Cache-Control`` header says otherwise
+(``no-store``, ``no-cache``, ``private`` or a ``max-age``).
+Responses setting cookies or varying on cookies are never stored and
+requests carrying the session cookie are not served from the cache.
+
+Entries are stored in :setting:`PAGE_CACHE_SERVER`, a cache connection
+string or object, or in the :attr:`.Application.cache_server` if not
+given.
+
+The extension should be placed after authentication extensions, so that
+the request user is known, and before extensions serving html pages in the
+:setting:`EXTENSIONS` list.
+Hit rates per route are served as JSON at :setting:`PAGE_CACHE_URL`.
+'''
+import json
+import hashlib
+from collections import defaultdict
+
+import lux
+from lux import Parameter, JsonRouter, create_cache, wsgi_request
+
+
+__all__ = ['PageCache', 'PageCacheRouter']
+
+
+class PageCache:
+    '''Request and response middleware for caching full pages.
+
+    .. attribute:: cache
+
+        The cache server storing pages.
+
+    .. attribute:: routes
+
+        Dictionary of ``hits`` and ``misses`` counters for each route.
+    '''
+    content_types = ('text/html',)
+
+    def __init__(self, cache, timeout=300, vary=('HTTP_ACCEPT',),
+                 session_cookie=None):
+        self.cache = cache
+        self.timeout = timeout
+        self.vary = tuple(vary or ())
+        self.session_cookie = session_cookie
+        self.routes = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+    def key(self, environ):
+        '''The cache key for the wsgi ``environ``
+        '''
+        bits = [environ.get('PATH_INFO', '/'),
+                environ.get('QUERY_STRING', '')]
+        bits.extend((environ.get(name, '') for name in self.vary))
+        key = '\n'.join(bits).encode('utf-8')
+        return 'lux.page.%s' % hashlib.sha1(key).hexdigest()
+
+    def cacheable(self, request):
+        '''Check if the response of ``request`` can be cached
+        '''
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if self.session_cookie and self.session_cookie in request.cookies:
+            return False
+        user = request.cache.user
+        return not (user and user.is_authenticated())
+
+    def request(self, environ, start_response):
+        '''Request middleware serving cached pages'''
+        request = wsgi_request(environ)
+        if not self.cacheable(request):
+            return
+        key = self.key(environ)
+        entry = self.cache.get(key)
+        if entry is None:
+            request.cache.page_cache_key = key
+            return
+        route, status, encoding, headers, body = entry
+        self.routes[route]['hits'] += 1
+        response = request.response
+        response.status_code = status
+        response.encoding = encoding
+        for name, value in headers:
+            response.headers.add_header(name, value)
+        response.content = body
+        return response
+
+    def response(self, environ, response):
+        '''Response middleware storing pages'''
+        request = wsgi_request(environ)
+        key = request.cache.page_cache_key
+        if key:
+            handler = request.cache.app_handler
+            route = repr(handler) if handler else request.path
+            self.routes[route]['misses'] += 1
+            timeout = self.response_timeout(response)
+            if timeout:
+                headers = [(name, value) for name, value in response.headers
+                           if name.lower() != 'content-length']
+                body = b''.join(response.content)
+                self.cache.set(key, (route, response.status_code,
+                                     response.encoding, headers, body),
+                               timeout)
+        return response
+
+    def response_timeout(self, response):
+        '''Number of seconds ``response`` can be cached for, ``0`` if it
+        cannot be cached
+        '''
+        if (response.status_code != 200 or response.is_streamed or
+                response.cookies or
+                not (response.content_type or '').startswith(
+                    self.content_types)):
+            return 0
+        vary = response.headers.get('Vary')
+        if vary:
+            vary = [v.strip().lower() for v in vary.split(',')]
+            if 'cookie' in vary or '*' in vary:
+                return 0
+        timeout = self.timeout
+        control = response.headers.get('Cache-Control')
+        if control:
+            for directive in control.lower().split(','):
+                directive = directive.strip()
+                if directive in ('no-store', 'no-cache', 'private'):
+                    return 0
+                name, _, value = directive.partition('=')
+                if name in ('max-age', 's-maxage'):
+                    try:
+                        timeout = int(value)
+                    except ValueError:
+                        return 0
+        return timeout
+
+    def stats(self):
+        '''List of hit rates per route'''
+        stats = []
+        for route, counters in tuple(self.routes.items()):
+            total = counters['hits'] + counters['misses']
+            stats.append({'route': route,
+                          'hits': counters['hits'],
+                          'misses': counters['misses'],
+                          'hit_rate': counters['hits']/total if total else 0})
+        stats.sort(key=lambda s: s['hits'] + s['misses'], reverse=True)
+        return stats
+
+
+class PageCacheRouter(JsonRouter):
+    '''Serve the hit rates of the :class:`.PageCache`
+    '''
+    def get(self, request):
+        page_cache = request.app.extensions['pagecache'].page_cache
+        response = request.response
+        response.content = json.dumps({'routes': page_cache.stats()})
+        return response
+
+
+class Extension(lux.Extension):
+    _config = [
+        Parameter('PAGE_CACHE_SERVER', None,
+                  'Cache server for pages, a connection string or an object '
+                  'supporting the cache protocol. If not given the '
+                  ':setting:`CACHE_SERVER` is used or, if that is not '
+                  'available, an in-memory cache'),
+        Parameter('PAGE_CACHE_TIMEOUT', 300,
+                  'Default number of seconds pages are cached for'),
+        Parameter('PAGE_CACHE_VARY', ['HTTP_ACCEPT'],
+                  'List of wsgi environ keys, in addition to path and query '
+                  'string, used to build the cache key of a page'),
+        Parameter('PAGE_CACHE_URL', None,
+                  'Url of the JSON endpoint serving hit rates per route. '
+                  'Disabled by default')]
+
+    def middleware(self, app):
+        cfg = app.config
+        cache = cfg['PAGE_CACHE_SERVER'] or app.cache_server or 'memory://'
+        if isinstance(cache, str):
+            cache = create_cache(cache)
+        self.page_cache = PageCache(cache, cfg['PAGE_CACHE_TIMEOUT'],
+                                    cfg['PAGE_CACHE_VARY'],
+                                    cfg.get('SESSION_COOKIE_NAME'))
+        middleware = [self.page_cache.request]
+        url = cfg['PAGE_CACHE_URL']
+        if url:
+            middleware.insert(0, PageCacheRouter(url))
+        return middleware
+
+    def response_middleware(self, app):
+        return [self.page_cache.response]
@@ -0,0 +1,103 @@
+'''Extension for profiling requests served by a lux application.
+
+When added to the :setting:`EXTENSIONS` list, the time spent by each
+request in wsgi middleware, response middleware, template rendering and
+SQL queries is recorded into a bounded ring buffer, one per worker,
+of :setting:`PROFILE_BUFFER_SIZE` records. A fraction of requests,
+given by :setting:`PROFILE_SAMPLE_RATE`, is profiled with
+:mod:`cProfile`.
+
+Aggregated statistics per route, including percentiles, are served as
+JSON at :setting:`PROFILE_URL`, when set, and can be displayed via the
+``profile_report`` command::
+
+    python manage.py profile_report --url http://localhost:8060
+
+The endpoint exposes request paths and profiling data without any access
+control, set :setting:`PROFILE_URL` only on private deployments.
+The extension should be placed before extensions serving catch-all
+routes in the :setting:`EXTENSIONS` list.
+'''
+from functools import partial
+from time import perf_counter
+
+import lux
+from lux import Parameter, JsonRouter
+
+from .profiler import (Profiler, ProfileWsgiHandler, ProfileTemplateLoader,
+                       percentile)
+
+
+__all__ = ['Profiler', 'ProfileRouter', 'percentile']
+
+
+class ProfileRouter(JsonRouter):
+    '''Serve the aggregated statistics of the :class:`.Profiler`.
+
+    Pass ``?samples=1`` to include the latest :mod:`cProfile` samples.
+    '''
+    def get(self, request):
+        profiler = request.app.extensions['profile'].profiler
+        data = {'records': len(profiler.records),
+                'routes': profiler.stats()}
+        if request.url_data.get('samples'):
+            data['samples'] = list(profiler.samples)
+        response = request.response
+        response.content = request.app.json_codec.dumps(data)
+        return response
+
+
+class Extension(lux.Extension):
+    _config = [
+        Parameter('PROFILE_BUFFER_SIZE', 1000,
+                  'Maximum number of request records kept in memory '
+                  'by each worker'),
+        Parameter('PROFILE_SAMPLE_RATE', 0,
+                  'Fraction of requests, between 0 and 1, profiled '
+                  'with cProfile'),
+        Parameter('PROFILE_URL', None,
+                  'Url of the JSON endpoint serving profiling statistics, '
+                  'for example "/_profile". The endpoint has no access '
+                  'control and it is disabled by default')]
+
+    def on_config(self, app):
+        cfg = app.config
+        self.profiler = Profiler(cfg['PROFILE_BUFFER_SIZE'],
+                                 cfg['PROFILE_SAMPLE_RATE'])
+        app._WsgiHandler = partial(ProfileWsgiHandler, profiler=self.profiler)
+        app._TemplateLoader = partial(ProfileTemplateLoader,
+                                      profiler=self.profiler)
+
+    def middleware(self, app):
+        url = app.config['PROFILE_URL']
+        if url:
+            return [ProfileRouter(url)]
+
+    def on_loaded(self, app):
+        try:
+            from sqlalchemy import event
+            from sqlalchemy.engine import Engine
+        except ImportError:
+            return
+        if not event.contains(Engine, 'before_cursor_execute',
+                              _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute',
+                         _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute',
+                         _after_cursor_execute)
+        _profilers.append(self.profiler)
+
+
+_profilers = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault('lux_query_start', []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    elapsed = perf_counter() - conn.info['lux_query_start'].pop()
+    for profiler in _profilers:
+        profiler.add('odm', elapsed)
@@ -0,0 +1,45 @@
+from pulsar import Setting
+from pulsar.utils.httpurl import urllibr
+
+import lux
+from lux import CommandError
+
+
+class Command(lux.Command):
+    help = 'Display profiling statistics of a running lux application.'
+    option_list = (
+        Setting('url',
+                ['--url'],
+                default='http://127.0.0.1:8060',
+                desc='Base url of the running application.'),
+        Setting('breakdown',
+                ['--breakdown'],
+                action='store_true',
+                default=False,
+                desc='Display the time breakdown of each route.'))
+
+    def run(self, options, **params):
+        path = self.app.config['PROFILE_URL']
+        if not path:
+            raise CommandError('PROFILE_URL is not set')
+        url = '%s%s' % (options.url.rstrip('/'), path)
+        response = urllibr.urlopen(url)
+        data = self.app.json_codec.loads(response.read())
+        self.report(data, options.breakdown)
+        return data
+
+    def report(self, data, breakdown=False):
+        self.write('%d requests recorded' % data['records'])
+        self.write('%-40s %7s %9s %9s %9s %9s %9s' %
+                   ('route', 'count', 'mean ms', 'p50 ms', 'p90 ms',
+                    'p99 ms', 'max ms'))
+        for route in data['routes']:
+            self.write('%-40s %7d %9.2f %9.2f %9.2f %9.2f %9.2f' %
+                       (route['route'], route['count'], route['mean'],
+                        route['p50'], route['p90'], route['p99'],
+                        route['max']))
+            if breakdown:
+                items = sorted(route['breakdown'].items(),
+                               key=lambda item: item[1], reverse=True)
+                for name, value in items:
+                    self.write('    %-36s %35.2f' % (name, value))
@@ -0,0 +1,224 @@
+import cProfile
+import pstats
+from io import StringIO
+from time import perf_counter, time
+from random import random
+from threading import get_ident
+from collections import deque, defaultdict
+
+from pulsar import Http404, isfuture, chain_future
+from pulsar.apps.wsgi import WsgiResponse
+from pulsar.apps.wsgi.utils import handle_wsgi_error
+
+from lux.core.loader import TemplateLoader
+from lux.core.executor import WsgiHandler
+from lux.utils import percentile
+
+try:
+    from greenlet import getcurrent
+except ImportError:     # greenlet not installed
+    getcurrent = None
+
+
+def task_key():
+    '''Identify the thread, and greenlet, executing the current code'''
+    return get_ident(), getcurrent() if getcurrent else None
+
+
+def handler_name(handler):
+    name = getattr(handler, '__name__', None)
+    if name is None:
+        name = handler.__class__.__name__
+    return name
+
+
+class Profiler:
+    '''Collect timing records of requests into a bounded ring buffer.
+
+    .. attribute:: records
+
+        A :class:`~collections.deque` of at most ``size`` request records,
+        older records are discarded first.
+
+    .. attribute:: sample_rate
+
+        Fraction of requests, between 0 and 1, profiled with :mod:`cProfile`
+
+    The record of a request is stored in the wsgi environ. Timings added
+    without a record, such as template rendering and SQL queries, go to
+    the record activated in the thread, or greenlet, executing them.
+    '''
+    environ_key = 'lux.profile'
+
+    def __init__(self, size=1000, sample_rate=0, samples=20):
+        self.records = deque(maxlen=size)
+        self.samples = deque(maxlen=samples)
+        self.sample_rate = sample_rate
+        self._active = {}
+
+    def start(self, environ):
+        record = {'method': environ.get('REQUEST_METHOD'),
+                  'path': environ.get('PATH_INFO'),
+                  'time': time(),
+                  'breakdown': defaultdict(float)}
+        if self.sample_rate and random() < self.sample_rate:
+            profile = cProfile.Profile()
+            profile.enable()
+            record['profile'] = profile
+        record['start'] = perf_counter()
+        environ[self.environ_key] = record
+        return record
+
+    def activate(self, record):
+        '''Activate ``record`` in the current thread or greenlet'''
+        self._active[task_key()] = record
+
+    def deactivate(self):
+        self._active.pop(task_key(), None)
+
+    def add(self, name, elapsed, record=None):
+        '''Add ``elapsed`` seconds to the ``name`` entry of the breakdown
+        of ``record``, the active record if not given
+        '''
+        if record is None:
+            record = self._active.get(task_key())
+        if record is not None:
+            record['breakdown'][name] += elapsed
+
+    def finish(self, record, environ, response):
+        record['total'] = perf_counter() - record.pop('start')
+        profile = record.pop('profile', None)
+        cache = environ.get('pulsar.cache')
+        router = cache.get('app_handler') if cache else None
+        record['route'] = repr(router) if router else record['path']
+        record['status'] = getattr(response, 'status_code', None)
+        record['breakdown'] = dict(record['breakdown'])
+        if profile:
+            profile.disable()
+            stream = StringIO()
+            stats = pstats.Stats(profile, stream=stream)
+            stats.sort_stats('cumulative').print_stats(30)
+            self.samples.append({'route': record['route'],
+                                 'time': record['time'],
+                                 'profile': stream.getvalue()})
+        self.records.append(record)
+
+    def stats(self):
+        '''Aggregated statistics of :attr:`records` per route.
+
+        Times are in milliseconds.
+        '''
+        routes = defaultdict(list)
+        for record in tuple(self.records):
+            routes[record['route']].append(record)
+        stats = []
+        for route, records in routes.items():
+            totals = sorted(r['total'] for r in records)
+            breakdown = defaultdict(float)
+            for record in records:
+                for name, elapsed in record['breakdown'].items():
+                    breakdown[name] += elapsed
+            n = len(records)
+            stats.append({
+                'route': route,
+                'count': n,
+                'mean': 1000*sum(totals)/n,
+                'p50': 1000*percentile(totals, 50),
+                'p90': 1000*percentile(totals, 90),
+                'p99': 1000*percentile(totals, 99),
+                'max': 1000*totals[-1],
+                'breakdown': dict(((name, 1000*value/n)
+                                   for name, value in breakdown.items()))})
+        stats.sort(key=lambda s: s['mean']*s['count'], reverse=True)
+        return stats
+
+
+class ProfileWsgiHandler(WsgiHandler):
+    '''A :class:`.WsgiHandler` recording the time spent in each
+    middleware and response middleware.
+
+    The response of streamed responses is generated after the handler
+    returns, therefore it is not included in the timing. Requests whose
+    middleware returns a future are finished when the future is done.
+    '''
+    def __init__(self, *args, profiler=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.profiler = profiler
+
+    def __call__(self, environ, start_response):
+        profiler = self.profiler
+        record = profiler.start(environ)
+        profiler.activate(record)
+        response = None
+        pending = False
+        try:
+            try:
+                for middleware in self.dispatch or self.middleware:
+                    start = perf_counter()
+                    response = middleware(environ, start_response)
+                    profiler.add('middleware.%s' % handler_name(middleware),
+                                 perf_counter() - start, record)
+                    if response is not None:
+                        break
+                if response is None:
+                    raise Http404
+
+            except Exception as exc:
+                response = handle_wsgi_error(environ, exc)
+
+            if isfuture(response):
+                pending = True
+                return self.response_future(environ, start_response,
+                                            response)
+            response = self.finish_response(environ, start_response,
+                                            response)
+            return response
+        finally:
+            profiler.deactivate()
+            if not pending:
+                profiler.finish(record, environ, response)
+
+    def finish_response(self, environ, start_response, response):
+        profiler = self.profiler
+        record = environ.get(profiler.environ_key)
+        if isinstance(response, WsgiResponse) and not response.started:
+            for middleware in self.response_middleware:
+                start = perf_counter()
+                response = middleware(environ, response) or response
+                profiler.add('response.%s' % handler_name(middleware),
+                             perf_counter() - start, record)
+            response.start(start_response)
+        return response
+
+    def response_future(self, environ, start_response, future):
+        '''Finish the profiling record once the ``future`` response is
+        done'''
+        profiler = self.profiler
+        record = environ.get(profiler.environ_key)
+        future = super().response_future(environ, start_response, future)
+
+        def callback(response):
+            profiler.finish(record, environ, response)
+            return response
+
+        def errback(exc):
+            profiler.finish(record, environ, None)
+            raise exc
+
+        return chain_future(future, callback=callback, errback=errback)
+
+
+class ProfileTemplateLoader(TemplateLoader):
+    '''A :class:`.TemplateLoader` recording the time spent rendering
+    templates
+    '''
+    def __init__(self, *args, profiler=None):
+        super().__init__(*args)
+        self.profiler = profiler
+
+    def render(self, filename, context=None, engine=None):
+        start = perf_counter()
+        try:
+            return super().render(filename, context, engine)
+        finally:
+            self.profiler.add('templates', perf_counter() - start)
@@ -193,7 +193,7 @@ class Extension(AuthBackend):
     def has_permission(self, request, target, level):
         return self._apply_all('has_permission', request, target, level)
 
-    def on_html_document(self, app, request, doc):
+    def on_html_prototype(self, app, doc):
         add_ng_modules(doc, self.ngModules)
 
     def _apply_all(self, method, request, *args, **kwargs):
@@ -1,5 +1,4 @@
 import time
-import json
 
 from datetime import datetime, timedelta
 
@@ -245,5 +244,5 @@ class SessionBackend(BrowserBackend):
             form = Form(request, data=request.body_data())
             data = form.rawdata['message']
             body = {'success': session.remove_message(data)}
-            response.content = json.dumps(body)
+            response.content = request.app.json_codec.dumps(body)
             return response
@@ -3,7 +3,7 @@ import time
 
 from pulsar import HttpException, MethodNotAllowed, ImproperlyConfigured
 
-from lux import Parameter
+from lux import Parameter, Json
 from ..views import RestRouter
 
 try:
@@ -1,9 +1,9 @@
 import lux
-from lux import route, HtmlRouter
+from lux import route, HtmlRouter, Json
 from lux.forms import Form
 
 from pulsar import Http404, PermissionDenied, HttpRedirect, MethodNotAllowed
-from pulsar.apps.wsgi import Json, Router
+from pulsar.apps.wsgi import Router
 
 from .forms import (LoginForm, CreateUserForm, ChangePasswordForm,
                     EmailForm, PasswordForm)
@@ -3,9 +3,11 @@ import hashlib
 from random import randint
 
 from pulsar import HttpException
-from pulsar.apps.wsgi import Router, Json, route
+from pulsar.apps.wsgi import Router, route
 from pulsar.utils.httpurl import CacheControl
 
+from lux import Json
+
 from .transports.websocket import WebSocket
 from .utils import IFRAME_TEXT
 from .ws import LuxWs
@@ -1,5 +1,4 @@
 import time
-import json
 import hashlib
 import logging
 
@@ -28,6 +27,7 @@ class WsClient:
             session_id = hashlib.sha224(key.encode('utf-8')).hexdigest()
         self.session_id = session_id
         request.cache.websocket = self
+        self.json = request.app.json_codec
         transport.on_open(self)
 
     def __str__(self):
@@ -47,12 +47,13 @@ class WsClient:
                 data.update(kw)
             else:
                 data = kw
+        dumps = self.json.dumps
         if data:
             if not isinstance(data, str):
-                data = json.dumps(data)
+                data = dumps(data)
             msg['data'] = data
-        array = [json.dumps(msg)]
-        self.transport.write('a%s' % json.dumps(array))
+        # SockJS array frame with the encoded message as only element
+        self.transport.write('a[%s]' % dumps(dumps(msg)))
 
     def error_message(self, ws, exc):
         msg = {'event': LUX_ERROR}
@@ -80,7 +81,7 @@ class LuxWs(ws.WS):
     def on_message(self, websocket, message):
         ws = websocket.handshake.cache.websocket
         try:
-            msg = json.loads(message)
+            msg = ws.json.loads(message)
 
         except Exception as exc:
             ws.error_message(exc)
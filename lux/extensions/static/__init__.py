@@ -42,17 +42,19 @@ import shutil
 from datetime import datetime
 
 from pulsar import ImproperlyConfigured
-from pulsar.apps.wsgi import FileRouter, WsgiHandler, MediaRouter
+from pulsar.apps.wsgi import FileRouter, WsgiHandler, MediaRouter, Router
 from pulsar.utils.httpurl import urlparse
 from pulsar.utils.slugify import slugify
 
 import lux
-from lux import Parameter, Router
+from lux import Parameter
 
-from .builder import Builder, DirBuilder, ContextBuilder, DirContent
+from .builder import (Builder, DirBuilder, ContextBuilder, DirContent,
+                      BuildManifest, BuildPool)
 from .contents import Content, Article
 from .routers import (MediaBuilder, HtmlContent, Blog, ErrorRouter,
                       JsonRoot, JsonRedirect, Sitemap, HtmlFile)
+from .readers import MarkdownReader, MarkdownCache
 from .rst import SphinxDocs
 from .ui import add_css
 from . import slides
@@ -74,6 +76,10 @@ class Extension(lux.Extension):
                   'Default static template'),
         Parameter('STATIC_LOCATION', 'build',
                   'Directory where the static site is created'),
+        Parameter('STATIC_BUILD_LOCATION', '.lux-build',
+                  'Directory where data of incremental builds is kept '
+                  'between builds. It should be outside '
+                  ':setting:`STATIC_LOCATION` so that it is not published'),
         Parameter('CONTEXT_LOCATION', 'context',
                   'Directory where to find files to populate the context '
                   'dictionary'),
@@ -82,10 +88,12 @@ class Extension(lux.Extension):
                   ' navigation mode'),
         Parameter('STATIC_MEDIA', True, 'Add handler for media files'),
         Parameter('STATIC_SPECIALS', ('404',),
-                  "paths included in this list won't create the json api")
+                  "paths included in this list won't create the json api"),
+        Parameter('STATIC_CACHE', True,
+                  'Cache converted markdown in the ``markdown`` directory '
+                  'of :setting:`STATIC_BUILD_LOCATION`')
     ]
     _static_info = None
-    _global_context = None
 
     def middleware(self, app):
         try:
@@ -116,12 +124,21 @@ class Extension(lux.Extension):
         '''Once the app is fully loaded add API routes if required
         '''
         app.all_contents = {}
+        app.static_manifest = None
+        app.static_pool = None
+        app.static_context = None
+        app.markdown_cache = self.markdown_cache(app)
         middleware = app.handler.middleware
         app.handler.middleware = []
         for router in middleware:
             self.add_api(app, router)
             app.handler.middleware.append(router)
 
+    def on_warm_up(self, app):
+        '''Build the markdown links table'''
+        if MarkdownReader.enabled:
+            MarkdownReader(app).links()
+
     def on_request(self, app, request):
         if not app.debug and not isinstance(app.handler, StaticHandler):
             app.handler = StaticHandler()
@@ -138,27 +155,66 @@ class Extension(lux.Extension):
                                              file404,
                                              status_code=404))
 
-    def build(self, app):
-        '''Build the static site
+    def build(self, app, full=False, jobs=1):
+        '''Build the static site.
+
+        Pages whose inputs did not change since the previous build are not
+        rendered again unless ``full`` is ``True``. Full builds remove
+        markdown cache entries not used by the build. When ``jobs`` is greater
+        than one, the files of each :class:`.Builder` are built by a pool of
+        ``jobs`` processes.
         '''
         config = app.config
         location = os.path.abspath(config['STATIC_LOCATION'])
         if not os.path.isdir(location):
             os.makedirs(location)
+        app.static_manifest = BuildManifest(app, location, full)
+        app.markdown_cache = cache = self.markdown_cache(app)
+        app.static_context = None
+        if jobs > 1:
+            app.static_pool = BuildPool(jobs)
         #
         # Loop over middleware and build when instance of a Builder
-        for middleware in app.handler.middleware:
-            if isinstance(middleware, Builder):
-                middleware.build(app, location)
+        try:
+            for middleware in app.handler.middleware:
+                if isinstance(middleware, Builder):
+                    middleware.build(app, location)
+            app.static_manifest.finish()
+            if cache and app.static_manifest.full:
+                self.logger.info('Markdown cache: removed %d unused entries',
+                                 cache.prune())
+            if app.static_context is not None:
+                self.logger.info('Context: %d snippets read',
+                                 app.static_context.snippets_read)
+            if cache:
+                stats = cache.stats()
+                self.logger.info('Markdown cache: %d hits, %d misses, '
+                                 '%.0f%% hit rate', stats['hits'],
+                                 stats['misses'], 100*stats['hit_rate'])
+        finally:
+            app.static_manifest = None
+            app.static_context = None
+            if app.static_pool:
+                app.static_pool.shutdown()
+                app.static_pool = None
         #
         self.copy_redirects(app, location)
 
+    def markdown_cache(self, app):
+        '''The :class:`.MarkdownCache` of ``app``, ``None`` when
+        :setting:`STATIC_CACHE` is off'''
+        if app.config['STATIC_CACHE']:
+            location = os.path.abspath(app.config['STATIC_BUILD_LOCATION'])
+            return MarkdownCache(app, os.path.join(location, 'markdown'))
+
+    def on_html_prototype(self, app, doc):
+        doc.jscontext.update(self.build_info(app))
+
     def on_html_document(self, app, request, doc):
         '''Add api Urls
         '''
         app = request.app
         jscontext = doc.jscontext
-        jscontext.update(self.build_info(app))
         if request.config['STATIC_API']:
             apiUrls = jscontext.get('apiUrls', {})
             for middleware in app.handler.middleware:
@@ -172,15 +228,19 @@ class Extension(lux.Extension):
             content = request.cache.content
             app = request.app
             ctx = request.cache.static_context
-            if not ctx:
-                if not self._global_context:
-                    ctx = ContextBuilder(app)
-                    self._global_context = ctx.copy()
-                ctx = ContextBuilder(app, self._global_context,
-                                     content=content)
+            if ctx is None:
+                builder = app.static_context
+                if builder is None:
+                    builder = ContextBuilder(app)
+                    # In debug mode and outside a build of the site the
+                    # context is read for each request to pick up changes
+                    if not app.debug or app.static_manifest is not None:
+                        app.static_context = builder
+                if content:
+                    builder.wire(content)
+                ctx = builder.snapshot
                 request.cache.static_context = ctx
-            ctx.update(context)
-            return ctx
+            context.add_layer(ctx)
 
     def build_info(self, app):
         '''Return a dictionary with information about the build
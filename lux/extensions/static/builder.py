@@ -1,16 +1,23 @@
 import os
+import sys
+import hashlib
 from collections import namedtuple
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 import pulsar
 
 from pulsar.apps.wsgi import WsgiResponse
-from pulsar.utils.httpurl import remove_double_slash, urljoin
+from pulsar.utils.httpurl import (remove_double_slash, urljoin,
+                                  patch_vary_headers)
 
+import lux
 from lux import route
 
 from .contents import SkipBuild, BuildError, Unsupported, CONTENT_EXTENSIONS
 from .contents import Content, get_reader
+from .readers import MarkdownReader
 
 
 Item = namedtuple('Item', 'loc lastmod priority file content_type body')
@@ -45,6 +52,128 @@ def normpath(path):
         return path
 
 
+class BuildManifest:
+    '''Inputs and outputs of the pages built from source files, persisted
+    in the :setting:`STATIC_BUILD_LOCATION` directory between builds.
+
+    A page is rebuilt when its source file, the templates used to render
+    it, the context snippets or the build settings, which include the
+    hashes of the config file and of the markdown links table, changed
+    since the previous build. Outputs of pages whose source disappeared
+    are removed by :meth:`finish`. When ``full`` is ``True`` all pages
+    are rebuilt.
+    '''
+    filename = 'manifest.json'
+
+    def __init__(self, app, location, full=False):
+        self.app = app
+        self.location = location
+        self.full = full
+        self.path = os.path.join(
+            os.path.abspath(app.config['STATIC_BUILD_LOCATION']),
+            self.filename)
+        self.pages = {}
+        self.previous = {}
+        self.skipped = 0
+        self._hashes = {}
+        module = sys.modules.get(app.config_module)
+        links = MarkdownReader(app).links().encode('utf-8')
+        self.settings = {'lux': lux.__version__,
+                         'STATIC_LOCATION': location,
+                         'SITE_URL': app.config['SITE_URL'],
+                         'MINIFIED_MEDIA': app.config['MINIFIED_MEDIA'],
+                         'MD_EXTENSIONS': list(app.config['MD_EXTENSIONS']),
+                         'config': self.hash(getattr(module, '__file__', '')),
+                         'links': hashlib.sha1(links).hexdigest()}
+        if os.path.isfile(self.path):
+            with open(self.path, 'rb') as f:
+                data = app.json_codec.loads(f.read())
+            self.previous = data.get('pages', {})
+            if data.get('settings') != self.settings:
+                self.full = True
+        context = app.config['CONTEXT_LOCATION']
+        self.context_files = sorted(self._files(context)) if context else []
+
+    def key(self, builder, src):
+        return '%s %s' % (builder.full_route.rule, src)
+
+    def hash(self, path):
+        '''Hash of the file at ``path``, ``None`` if it does not exist'''
+        value = self._hashes.get(path, False)
+        if value is False:
+            value = None
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    value = hashlib.sha1(f.read()).hexdigest()
+            self._hashes[path] = value
+        return value
+
+    def fresh(self, key):
+        '''The previous entry of page ``key`` if none of its inputs
+        changed and its outputs exist, otherwise ``None``
+        '''
+        entry = self.previous.get(key)
+        if self.full or not entry:
+            return
+        for path, value in entry['inputs'].items():
+            if self.hash(path) != value:
+                return
+        if set(entry['inputs']) != set(entry['templates'] + [entry['src']] +
+                                       self.context_files):
+            return
+        if all((os.path.isfile(path) for path in entry['outputs'])):
+            self.skipped += 1
+            self.pages[key] = entry
+            return entry
+
+    def record(self, key, src, templates, item):
+        '''Record the inputs and the output :class:`Item` of page ``key``
+        '''
+        templates = sorted(templates)
+        inputs = [src] + templates + self.context_files
+        self.pages[key] = {'src': src,
+                           'templates': templates,
+                           'inputs': dict(((p, self.hash(p)) for p in inputs)),
+                           'outputs': [item.file],
+                           'item': [item.loc, item.lastmod.timestamp(),
+                                    item.priority, item.file,
+                                    item.content_type]}
+
+    def item(self, entry):
+        '''The :class:`Item` of a previously built page ``entry``'''
+        loc, lastmod, priority, file, content_type = entry['item']
+        with open(file, 'rb') as f:
+            body = f.read()
+        return Item(loc, datetime.fromtimestamp(lastmod), priority, file,
+                    content_type, body)
+
+    def finish(self):
+        '''Remove outputs of pages not built and save the manifest'''
+        outputs = set()
+        for entry in self.pages.values():
+            outputs.update(entry['outputs'])
+        for key, entry in self.previous.items():
+            if key in self.pages:
+                continue
+            for path in entry['outputs']:
+                if path not in outputs and os.path.isfile(path):
+                    self.app.logger.info('Removing "%s"', path)
+                    os.remove(path)
+        data = {'settings': self.settings, 'pages': self.pages}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'w') as f:
+            f.write(self.app.json_codec.dumps(data))
+        self.app.logger.info('Built %d pages, %d unchanged',
+                             len(self.pages) - self.skipped, self.skipped)
+
+    def _files(self, location):
+        if os.path.isdir(location):
+            for dirpath, _, filenames in os.walk(location):
+                for filename in filenames:
+                    if not skipfile(filename):
+                        yield os.path.join(dirpath, filename)
+
+
 class BaseBuilder(object):
     '''Base class for static site builders
     '''
@@ -97,6 +226,7 @@ class Builder(BaseBuilder):
     '''Include all subdirectories in the build'''
     _build_done = None
     _building = False
+    _shard = False
 
     @property
     def building(self):
@@ -113,8 +243,13 @@ class Builder(BaseBuilder):
             location = os.path.abspath(app.config['STATIC_LOCATION'])
         with self:
             if self.route.ordered_variables:
-                for name, src, _ in self.all_files(app):
-                    self.build_file(app, location, src, name)
+                files = list(self.all_files(app))
+                pool = getattr(app, 'static_pool', None)
+                if pool and len(files) > 1:
+                    self.build_shards(app, location, files, pool)
+                else:
+                    for name, src, _ in files:
+                        self.build_file(app, location, src, name)
             else:
                 self.build_file(app, location)
             if self._build_done:
@@ -187,11 +322,21 @@ class Builder(BaseBuilder):
         '''
         if not self.should_build(app, name):
             return
+        manifest = getattr(app, 'static_manifest', None)
+        key = None
+        if manifest and src and os.path.isfile(src):
+            key = manifest.key(self, src)
+            entry = manifest.fresh(key)
+            if entry:
+                self.built.append(manifest.item(entry))
+                return self.build_children(app, location)
         request = None
         response = None
         content = None
         path = None
         urlparams = {}
+        loader = app.template_loader
+        loader.tracking = set() if key else None
         try:
             if src:
                 content = self.read_file(app, src, name)
@@ -213,7 +358,12 @@ class Builder(BaseBuilder):
             app.logger.exception('Unhandled exception while building "%s"',
                                  content or path)
             content = None
-        return self.write(app, request, location, response)
+        templates, loader.tracking = loader.tracking, None
+        n = len(self.built)
+        built = self.write(app, request, location, response)
+        if key and len(built) > n:
+            manifest.record(key, src, templates, built[n])
+        return built
 
     def write(self, app, request, location, response):
         if request and (response or request.cache.content):
@@ -266,8 +416,44 @@ class Builder(BaseBuilder):
                     path = path[:-5]
             self.built.append(Item(url, lastmod, priority, dst_filename,
                                    content_type, body))
+        return self.build_children(app, location)
 
-        # Loop over child routes
+    def build_shards(self, app, location, files, pool):
+        '''Build ``files`` in the worker processes of ``pool``.
+
+        Each worker builds a shard of ``files`` without child routes,
+        which are built here once all shards have finished.
+        '''
+        manifest = app.static_manifest
+        config = app.config
+        params = dict(app.params)
+        params.update(SITE_URL=config['SITE_URL'],
+                      MINIFIED_MEDIA=config['MINIFIED_MEDIA'])
+        args = (app.callable._config_file, app.meta.argv, params,
+                self.full_route.rule, location,
+                manifest.full if manifest else True)
+        n = min(pool.jobs, len(files))
+        shards = [pool.submit(build_shard, *(args + (files[i::n],)))
+                  for i in range(n)]
+        cache = getattr(app, 'markdown_cache', None)
+        for shard in shards:
+            items, pages, skipped, hits, misses, used = shard.result()
+            if cache:
+                cache.hits += hits
+                cache.misses += misses
+                cache.used.update(used)
+            for item in items:
+                with open(item.file, 'rb') as f:
+                    self.built.append(item._replace(body=f.read()))
+            if manifest:
+                manifest.pages.update(pages)
+                manifest.skipped += skipped
+        return self.build_children(app, location)
+
+    def build_children(self, app, location):
+        '''Build child routes which are :class:`.Builder`'''
+        if self._shard:
+            return self.built
         for route in self.routes:
             if isinstance(route, Builder):
                 built = route.build(app, location)
@@ -300,9 +486,107 @@ class Builder(BaseBuilder):
         return filename, ext
 
 
+class BuildPool(ProcessPoolExecutor):
+    '''A process pool building the files of :class:`.Builder` routes
+    with ``jobs`` workers
+    '''
+    def __init__(self, jobs):
+        super().__init__(jobs)
+        self.jobs = jobs
+
+
+_shard_apps = {}
+
+
+def build_shard(config_file, argv, params, rule, location, full, files):
+    '''Build ``files`` of the :class:`.Builder` with ``rule`` in a
+    worker process of a :class:`.BuildPool`.
+
+    The application is loaded once per process. Return the built
+    :class:`Item` without body, the manifest pages, the number of
+    unchanged pages and the markdown cache hits, misses and used keys.
+    '''
+    app = _shard_apps.get(config_file)
+    if app is None:
+        app = lux.App(config_file, argv=argv, **params).setup()
+        _shard_apps[config_file] = app
+    router = find_builder(app.handler.middleware, rule)
+    if router is None:
+        raise BuildError('Builder "%s" not available' % rule)
+    app.static_manifest = BuildManifest(app, location, full)
+    router.built = []
+    router._shard = True
+    cache = app.markdown_cache
+    hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+    if cache:
+        cache.used.clear()
+    try:
+        for name, src, _ in files:
+            router.build_file(app, location, src, name)
+        manifest = app.static_manifest
+        used = set()
+        if cache:
+            hits, misses = cache.hits - hits, cache.misses - misses
+            used = cache.used
+        return ([item._replace(body=None) for item in router.built],
+                manifest.pages, manifest.skipped, hits, misses, used)
+    finally:
+        router.built = None
+        router._shard = False
+        app.static_manifest = None
+
+
+def find_builder(routers, rule):
+    '''Find the :class:`.Builder` with ``rule`` in ``routers`` and their
+    children
+    '''
+    for router in routers:
+        if isinstance(router, Builder) and router.full_route.rule == rule:
+            return router
+        router = find_builder(getattr(router, 'routes', ()), rule)
+        if router:
+            return router
+
+
 class FileBuilder(Builder):
     '''Build a static file within a :class:`.DirBuilder`
     '''
+    def source_validator(self, request):
+        '''Version key from the modification times of the source file and
+        of the templates loaded, and from the request user.
+
+        The source file is not read. Responses vary on cookies since they
+        depend on the session.
+        '''
+        patch_vary_headers(request.response.headers, ['Cookie'])
+        content = request.cache.content
+        src = content.src if content else self.source_file(request)
+        if not src or not os.path.isfile(src):
+            return
+        user = request.cache.user
+        user = user.get_id() if user and user.is_authenticated() else ''
+        return '%s:%s:%s:%s' % (src, os.stat(src).st_mtime,
+                                request.app.template_loader.last_modified(),
+                                user)
+
+    def source_file(self, request):
+        '''The source file of the content served to ``request``, ``None``
+        if not found'''
+        if self.src:
+            name = self.src
+        else:
+            dir = self.get_src() or (self.parent and self.parent.get_src())
+            if not dir:
+                return
+            urlargs = request.urlargs
+            name = (urlargs.get('slug') or urlargs.get('path') or
+                    urlargs.get('id') or 'index')
+            name = os.path.join(dir, name)
+        try:
+            return self.get_filename(name)
+        except BuildError:
+            pass
+
     def get_content(self, request):
         if not request.cache.content:
             if not self.src:
@@ -346,6 +630,9 @@ class ContextBuilder(dict, BaseBuilder):
         self.waiting = {}
         self.content = content
         self.render = render
+        self.context_for = []
+        self.snippets_read = 0
+        self._snapshot = None
         exclude = exclude or ()
         if ctx:
             self.update(ctx)
@@ -360,47 +647,95 @@ class ContextBuilder(dict, BaseBuilder):
                         continue
                     name, _ = os.path.join(rel_dir, filename).split('.', 1)
                     src = os.path.join(dirpath, filename)
+                    self.snippets_read += 1
                     self.add(self.read_file(app, src, name))
         elif location:
             app.logger.warning('Context location "%s" not available', location)
+        self.resolve()
         self._on_loaded()
 
-    def __setitem__(self, key, value):
-        super(ContextBuilder, self).__setitem__(key, value)
-        self._refresh()
-
-    def update(self, *args):
-        super(ContextBuilder, self).update(*args)
-        self._refresh()
-
-    def add(self, content, waiting=None):
-        if waiting is None:
-            ctx = content.context_for
-            content_for = self.content
-            if ctx or content_for:
-                if content_for and ctx:
-                    for name, values in ctx.items():
-                        if content_for.name in values:
-                            content_for.additional_context[name] = content
-                return
-            waiting = set(content._meta.require_context or ())
-        # Loop through the require context of content
-        for name in tuple(waiting):
-            if name in self:
-                waiting.discard(name)
+    def add(self, content):
+        '''Add a ``content`` snippet, rendered by :meth:`resolve`'''
+        ctx = content.context_for
+        content_for = self.content
+        if ctx or content_for:
+            if ctx:
+                self.context_for.append(content)
+                if content_for:
+                    self._wire(content_for, content)
+            return
+        requires = set(content._meta.require_context or ())
+        self.waiting[content.key()] = (content, requires)
 
-        if waiting:
-            self.waiting[content.key()] = (content, waiting)
-        elif self.render:
-            self[content.key()] = content.render(self)
-        else:
-            self[content.key()] = content
+    def resolve(self):
+        '''Render waiting snippets once each, after the snippets they
+        require.
+
+        Snippets are visited in key order. Snippets requiring missing keys
+        or with circular requirements are not rendered and remain in
+        :attr:`waiting`.
+        '''
+        waiting, self.waiting = self.waiting, {}
+        failed = {}
+        done = set()
+        path = []
+
+        def visit(key):
+            if key in done:
+                return True
+            if key in failed:
+                return False
+            if key in path:
+                cycle = path[path.index(key):] + [key]
+                self.app.logger.warning(
+                    'Circular context requirements %s',
+                    ' -> '.join(('"%s"' % k for k in cycle)))
+                for k in cycle:
+                    failed[k] = waiting[k]
+                return False
+            content, requires = waiting[key]
+            path.append(key)
+            ok = True
+            for name in sorted(requires):
+                if name in waiting:
+                    ok = visit(name) and ok
+                elif name not in self:
+                    self.app.logger.warning(
+                        'Context "%s" requires missing "%s"', key, name)
+                    ok = False
+            path.pop()
+            if ok and key not in failed:
+                if self.render:
+                    self[key] = content.render(self)
+                else:
+                    self[key] = content
+                done.add(key)
+                return True
+            failed[key] = waiting[key]
+            return False
+
+        for key in sorted(waiting):
+            visit(key)
+        self.waiting = failed
+
+    @property
+    def snapshot(self):
+        '''A read-only view of the resolved context'''
+        if self._snapshot is None:
+            self._snapshot = MappingProxyType(dict(self))
+        return self._snapshot
+
+    def wire(self, content):
+        '''Add snippets whose ``context_for`` metadata refers to
+        ``content`` to the additional context of ``content``
+        '''
+        for snippet in self.context_for:
+            self._wire(content, snippet)
 
-    def _refresh(self):
-        all = list(self.waiting.values())
-        self.waiting.clear()
-        for content, waiting in all:
-            self.add(content, waiting)
+    def _wire(self, content, snippet):
+        for name, values in snippet.context_for.items():
+            if content.name in values:
+                content.additional_context[name] = snippet
 
     def _on_loaded(self):
         waiting = self.waiting
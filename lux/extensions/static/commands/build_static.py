@@ -14,7 +14,19 @@ class Command(lux.Command):
                            ['--nominify'],
                            action="store_true",
                            default=False,
-                           desc="Don't use minified media files"))
+                           desc="Don't use minified media files"),
+                   Setting('full',
+                           ['--full'],
+                           action="store_true",
+                           default=False,
+                           desc='Rebuild all pages, including pages whose '
+                                'inputs did not change since the previous '
+                                'build'),
+                   Setting('jobs',
+                           ['--jobs'],
+                           type=int,
+                           default=1,
+                           desc='Number of processes building the pages'))
 
     help = "create the static site"
 
@@ -23,4 +35,6 @@ class Command(lux.Command):
             self.app.config['SITE_URL'] = ''
         if options.nominify:
             self.app.config['MINIFIED_MEDIA'] = False
-        return self.app.extensions['static'].build(self.app)
+        return self.app.extensions['static'].build(self.app,
+                                                   full=options.full,
+                                                   jobs=options.jobs)
@@ -14,7 +14,7 @@ from pulsar.utils.structures import AttributeDictionary, mapping_iterator
 from pulsar.utils.pep import to_string
 from pulsar.apps.wsgi import Links
 
-from lux import JSON_CONTENT_TYPES
+from lux import JSON_CONTENT_TYPES, TemplateContext
 from lux.utils import iso8601
 from lux.extensions.ui import CssLibraries
 
@@ -243,11 +243,14 @@ class Content(object):
         return 'html_%s' % name if self.is_html else name
 
     def context(self, context=None):
-        '''Extract the context dictionary for server side template rendering
+        '''Extract the context dictionary for server side template rendering.
+
+        When a ``context`` is given, it is layered over the content
+        metadata without being copied.
         '''
         ctx = dict(self._flatten(self._meta))
         if context:
-            ctx.update(context)
+            ctx = TemplateContext({}, context, ctx)
         return ctx
 
     def urlparams(self, names=None):
@@ -269,14 +272,14 @@ class Content(object):
         '''
         if self.is_html:
             context = self.context(context)
-            content = self._engine(self._content, context)
+            content = self._engine(self._content, context,
+                                   self._app.template_loader)
             if self.template:
                 template = self._app.template_full_path(self.template)
                 if template:
                     context[self.key('main')] = content
-                    with open(template, 'r') as file:
-                        template_str = file.read()
-                    raw = self._engine(template_str, context)
+                    raw = self._app.template_loader.render(
+                        template, context, self.template_engine)
                     reader = get_reader(self._app, template)
                     ct = reader.process(raw, template)
                     content = ct._content
@@ -413,7 +416,8 @@ class Content(object):
         elif isinstance(value, date):
             return value
         elif value is not None:
-            return self._engine(to_string(value), context)
+            return self._engine(to_string(value), context,
+                                self._app.template_loader)
 
     def _to_json(self, value):
         if isinstance(value, Mapping):
@@ -1,19 +1,18 @@
 import os
 import imp
+import hashlib
 import mimetypes
+import threading
 from itertools import chain
 
 from pulsar.apps.wsgi import AsyncString
 
+from lux.utils import module_available
+
 from .contents import (Content, METADATA_PROCESSORS, slugify, is_html,
                        SkipBuild, register_reader)
 from .urlwrappers import MultiValue
 
-try:
-    from markdown import Markdown
-except ImportError:
-    Markdown = False
-
 Restructured = False
 
 
@@ -117,11 +116,87 @@ class BaseReader(object):
         return content(self.app, body, meta, src, name, context, **params)
 
 
+class MarkdownCache:
+    '''On-disk cache of markdown bodies and metadata converted by the
+    :class:`.MarkdownReader`.
+
+    Entries are keyed by the hash of the markdown text, links table
+    included, and of the markdown extensions. Entries not used since the
+    cache was created are removed by :meth:`prune`.
+    '''
+    def __init__(self, app, location):
+        self.app = app
+        self.location = location
+        self.hits = 0
+        self.misses = 0
+        self.used = set()
+
+    def key(self, extensions, text):
+        '''Hash of ``text`` and ``extensions``, names or instances of
+        markdown extensions'''
+        names = (ext if isinstance(ext, str) else
+                 '%s.%s' % (type(ext).__module__, type(ext).__qualname__)
+                 for ext in extensions)
+        value = '%s\n%s' % (' '.join(names), text)
+        return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        '''The ``(body, meta)`` tuple of ``key``, ``None`` if not
+        available. Corrupt entries are removed'''
+        path = os.path.join(self.location, '%s.json' % key)
+        if os.path.isfile(path):
+            try:
+                with open(path, 'rb') as f:
+                    data = self.app.json_codec.loads(f.read())
+                entry = data['body'], data['meta']
+            except (ValueError, KeyError, TypeError):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            else:
+                self.hits += 1
+                self.used.add(key)
+                return entry
+        self.misses += 1
+
+    def set(self, key, body, meta):
+        if not os.path.isdir(self.location):
+            os.makedirs(self.location, exist_ok=True)
+        path = os.path.join(self.location, '%s.json' % key)
+        tmp = '%s.%d' % (path, os.getpid())
+        with open(tmp, 'w') as f:
+            f.write(self.app.json_codec.dumps({'body': body, 'meta': meta}))
+        os.replace(tmp, path)
+        self.used.add(key)
+
+    def prune(self):
+        '''Remove entries not in :attr:`used`, return the number of
+        entries removed'''
+        removed = 0
+        if os.path.isdir(self.location):
+            for filename in os.listdir(self.location):
+                key, ext = os.path.splitext(filename)
+                if ext == '.json' and key not in self.used:
+                    os.remove(os.path.join(self.location, filename))
+                    removed += 1
+        return removed
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0}
+
+
+_converters = threading.local()
+
+
 @register_reader
 class MarkdownReader(BaseReader):
     """Reader for Markdown files"""
 
-    enabled = bool(Markdown)
+    enabled = module_available('markdown')
     file_extensions = ['md', 'markdown', 'mkd', 'mdown']
 
     def __init__(self, *args, **kwargs):
@@ -133,13 +208,36 @@ class MarkdownReader(BaseReader):
     def process(self, raw, source_path, name=None, **params):
         if isinstance(raw, bytes):
             raw = raw.decode('utf-8')
-        self._md = md = Markdown(extensions=self.extensions)
         raw = '%s\n\n%s' % (raw, self.links())
-        body = md.convert(raw)
-        meta = self._md.Meta
+        cache = getattr(self.app, 'markdown_cache', None)
+        key = cache.key(self.extensions, raw) if cache else None
+        cached = cache.get(key) if key else None
+        if cached:
+            body, meta = cached
+        else:
+            md = self.markdown()
+            body = md.convert(raw)
+            meta = md.Meta
+            if key:
+                cache.set(key, body, meta)
         meta['content_type'] = 'text/html'
         return self.post_process(body, meta, source_path, name, **params)
 
+    def markdown(self):
+        '''A reset :class:`markdown.Markdown` converter, shared by readers
+        with the same extensions in the current thread'''
+        converters = getattr(_converters, 'value', None)
+        if converters is None:
+            converters = _converters.value = {}
+        key = tuple(self.extensions)
+        md = converters.get(key)
+        if md is None:
+            from markdown import Markdown
+            md = converters[key] = Markdown(extensions=self.extensions)
+        else:
+            md.reset()
+        return md
+
     def links(self):
         links = self.app.config.get('_MARKDOWN_LINKS_')
         if links is None:
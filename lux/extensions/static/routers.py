@@ -1,14 +1,13 @@
 import os
-import json
 from copy import copy
 
 import lux
-from lux import route, JSON_CONTENT_TYPES
+from lux import route, Json, JSON_CONTENT_TYPES
 from lux.extensions import base, sitemap
 
 from pulsar import ImproperlyConfigured
 from pulsar.utils.slugify import slugify
-from pulsar.apps.wsgi import Json, Html, Router
+from pulsar.apps.wsgi import Html, Router
 
 from .builder import (DirBuilder, FileBuilder, BuildError, SkipBuild,
                       Unsupported, normpath)
@@ -95,6 +94,8 @@ class JsonFile(Router, FileBuilder):
     def get(self, request):
         app = request.app
         response = request.response
+        if lux.not_modified(request, self.source_validator(request)):
+            return response
         content = self.get_content(request)
         # Get the JSON representation of the resource
         data = content.json(request)
@@ -122,8 +123,9 @@ class JsonFile(Router, FileBuilder):
     def all(self, app, html=True, draft=False):
         all = []
         o = 'modified' if draft else 'date'
+        loads = app.json_codec.loads
         for d in self.build(app):
-            data = json.loads(d.body.decode('utf-8'))
+            data = loads(d.body)
             if bool(data.get('priority') == '0') is not draft:
                 continue
             if not html:
@@ -199,6 +201,10 @@ class HtmlFile(HtmlRouter, FileBuilder):
     def html_router(self):
         return self.parent
 
+    def validator(self, request):
+        '''The :meth:`~.FileBuilder.source_validator`'''
+        return self.source_validator(request)
+
     def get_html(self, request):
         content = self.get_content(request)
         if content._meta.slug in request.config['STATIC_SPECIALS']:
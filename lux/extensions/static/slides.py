@@ -1,4 +1,4 @@
-from .readers import MarkdownReader, register_reader, Markdown
+from .readers import MarkdownReader, register_reader
 from .contents import Content
 
 reveal_src = '//cdnjs.cloudflare.com/ajax/libs/reveal.js/2.6.2'
@@ -22,13 +22,13 @@ class Slides(MarkdownReader):
         with open(source_path, encoding='utf-8') as text:
             raw = text.read()
             doc, slides = self.slides(raw)
-        md = Markdown(extensions=self.extensions)
+        md = self.markdown()
         info = md.convert(doc)
         meta = md.Meta
         body = ['<div class="slides">']
         for slide in slides:
             body.append('<section>')
-            md = Markdown(extensions=self.extensions)
+            md = self.markdown()
             slide = md.convert(slide)
             body.append(slide)
             body.append('</section>')
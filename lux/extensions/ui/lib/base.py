@@ -8,7 +8,6 @@ from datetime import datetime
 
 from pulsar import asyncio
 from pulsar.utils.structures import OrderedDict, mapping_iterator
-from pulsar.apps.http import HttpClient
 from pulsar.apps import wsgi
 
 __all__ = ['Css', 'Variable', 'Symbol', 'Mixin',
@@ -559,6 +558,7 @@ class Css(CssBase):
             return self._parent.http
         else:
             if self._http is None:
+                from pulsar.apps.http import HttpClient
                 self._http = HttpClient(loop=asyncio.new_event_loop())
             return self._http
 
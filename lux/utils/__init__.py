@@ -4,6 +4,7 @@ from random import choice
 from collections import Hashable
 from functools import partial
 from datetime import datetime, date
+from importlib.util import find_spec
 
 from pulsar.utils.httpurl import *
 from pulsar.utils.version import get_version
@@ -48,6 +49,17 @@ class memoized(object):
         return partial(self.__call__, obj)
 
 
+def module_available(name):
+    '''Check if module ``name`` can be imported without importing it.
+
+    Used for optional dependencies which are imported when first needed.
+    '''
+    try:
+        return find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
 def version_tuple(version):
     bits = version.split('-')
     version = bits[0].split('.')
@@ -78,5 +90,15 @@ def grouper(n, iterable, padvalue=None):
     return zip_longest(*[iter(iterable)]*n, fillvalue=padvalue)
 
 
+def percentile(values, p):
+    '''The ``p`` percentile (0 to 100) of a sorted list of ``values``
+    using the nearest-rank method
+    '''
+    if not values:
+        return 0
+    index = max(int(round(p * len(values) / 100.)) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
 def iso8601(dt):
     return dt.strftime('%Y-%m-%dT%H:%M:%S')
@@ -0,0 +1,205 @@
+import os
+import sys
+import subprocess
+
+from pulsar.apps.wsgi.utils import parse_accept_header
+from pulsar.apps.wsgi.structures import ContentAccept
+
+import lux
+from lux.utils import test
+from lux.core import (RouterDispatcher, negotiate, DEFAULT_CONTENT_TYPES,
+                      json_codec)
+
+from .dispatcher import site_routers, url_mix, linear_resolve
+
+
+STATIC_TEMPLATES = os.path.join(os.path.dirname(lux.__file__), 'extensions',
+                                'static', 'templates')
+
+
+class TemplateEnginesBenchmark(test.TestCase):
+    '''Compare the ``python`` and ``lux`` template engines.
+
+    Run with ``python runtests.py core.benchmarks --benchmark``
+    '''
+    __benchmark__ = True
+    __number__ = 1000
+    config_file = 'tests.config'
+    context = {'title': 'A benchmark',
+               'description': 'Rendering of article.html',
+               'author': 'lux',
+               'date': '2015-01-01',
+               'html_main': '<p>Paragraph</p>' * 50}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = cls().application()
+        loader = cls.app.template_loader
+        loader.directories.append(STATIC_TEMPLATES)
+        loader.index()
+        cls.home = cls.app.template_full_path('home.html')
+        cls.article = cls.app.template_full_path('article.html')
+
+    def render(self, filename, engine):
+        return self.app.template_loader.render(filename, self.context, engine)
+
+    def test_home_python(self):
+        self.render(self.home, 'python')
+
+    def test_home_lux(self):
+        self.render(self.home, 'lux')
+
+    def test_article_python(self):
+        self.render(self.article, 'python')
+
+    def test_article_lux(self):
+        self.render(self.article, 'lux')
+
+
+class HtmlDocumentBenchmark(test.TestCase):
+    '''Per request cost of building the html document from scratch
+    versus cloning the application html prototype.
+    '''
+    __benchmark__ = True
+    __number__ = 1000
+    config_file = 'tests.config'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = cls().application()
+        cls.request = cls.app.wsgi_request(path='/')
+
+    def test_build(self):
+        app = self.app
+        app.__dict__.pop('_lazy_html_prototype', None)
+        app.html_document(self.request)
+
+    def test_clone(self):
+        self.app.html_document(self.request)
+
+
+class RouterDispatchBenchmark(test.TestCase):
+    '''Resolve a mix of urls on a site with a few hundred routes via the
+    linear list of routers and via the :class:`.RouterDispatcher` trie.
+    '''
+    __benchmark__ = True
+    __number__ = 100
+    config_file = 'tests.config'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.routers = site_routers(100)
+        cls.dispatcher = RouterDispatcher(cls.routers)
+        cls.paths = url_mix(100)
+
+    def test_linear(self):
+        routers = self.routers
+        for path in self.paths:
+            linear_resolve(routers, path)
+
+    def test_trie(self):
+        resolve = self.dispatcher.resolve
+        for path in self.paths:
+            resolve(path)
+
+
+class RequestBenchmark(test.TestCase):
+    '''Per request cost of wrapping the environ, accessing the application
+    config and negotiating the response content type with and without the
+    memo of parsed ``Accept`` headers.
+    '''
+    __benchmark__ = True
+    __number__ = 10000
+    config_file = 'tests.config'
+    accept = ('text/html,application/xhtml+xml,application/xml;q=0.9,'
+              '*/*;q=0.8')
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = cls().application()
+        request = cls.app.wsgi_request(path='/',
+                                       extra={'HTTP_ACCEPT': cls.accept})
+        cls.environ = request.environ
+
+    def test_request(self):
+        lux.wsgi_request(self.environ)
+
+    def test_config(self):
+        request = lux.wsgi_request(self.environ)
+        for _ in range(5):
+            request.config['DEFAULT_TEMPLATE_ENGINE']
+
+    def test_negotiate_parse(self):
+        accept = parse_accept_header(self.accept, ContentAccept)
+        accept.best_match(DEFAULT_CONTENT_TYPES)
+
+    def test_negotiate_memo(self):
+        negotiate(self.accept, DEFAULT_CONTENT_TYPES)
+
+
+class JsonCodecBenchmark(test.TestCase):
+    '''Encode and decode a large REST collection with the standard
+    library codec and with the fastest codec installed (``auto``).
+    '''
+    __benchmark__ = True
+    __number__ = 20
+    config_file = 'tests.config'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = {'total': 5000,
+                    'result': [{'id': n,
+                                'title': 'Item %d' % n,
+                                'url': 'http://example.com/items/%d' % n,
+                                'tags': ['lux', 'json', str(n % 10)],
+                                'price': n * 1.25,
+                                'active': bool(n % 2)}
+                               for n in range(5000)]}
+        cls.json = json_codec('json')
+        cls.auto = json_codec('auto')
+        cls.text = cls.json.dumps(cls.data)
+
+    def test_dumps_json(self):
+        self.json.dumps(self.data)
+
+    def test_dumps_auto(self):
+        self.auto.dumps(self.data)
+
+    def test_loads_json(self):
+        self.json.loads(self.text)
+
+    def test_loads_auto(self):
+        self.auto.loads(self.text)
+
+
+class StartupBenchmark(test.TestCase):
+    '''Cold start of ``manage.py --version`` with and without the
+    startup manifest.
+    '''
+    __benchmark__ = True
+    __number__ = 10
+    config_file = 'tests.config'
+    script = ("import lux; lux.execute_from_config('tests.config', "
+              "argv=['manage.py', '--version'], STARTUP_MANIFEST=%s)")
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cwd = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        cls.manifest = lux.manifest_path('tests.config')
+        cls.start(True)
+
+    @classmethod
+    def tearDownClass(cls):
+        if os.path.isfile(cls.manifest):
+            os.remove(cls.manifest)
+
+    @classmethod
+    def start(cls, manifest):
+        subprocess.check_output([sys.executable, '-c', cls.script % manifest],
+                                cwd=cls.cwd)
+
+    def test_manifest(self):
+        self.start(True)
+
+    def test_no_manifest(self):
+        self.start(False)
@@ -0,0 +1,106 @@
+import os
+import time
+import shutil
+import tempfile
+
+import lux
+from lux.utils import test
+
+
+class MemoryCacheTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def test_create(self):
+        cache = lux.create_cache('memory://?max_entries=20&timeout=60')
+        self.assertIsInstance(cache, lux.MemoryCache)
+        self.assertEqual(cache.max_entries, 20)
+        self.assertEqual(cache.timeout, 60)
+
+    def test_protocol(self):
+        cache = lux.create_cache('memory://')
+        self.assertEqual(cache.get('foo'), None)
+        self.assertEqual(cache.get('foo', 3), 3)
+        cache.set('foo', 'bla')
+        self.assertEqual(cache.get('foo'), 'bla')
+        self.assertFalse(cache.add('foo', 'xxx'))
+        self.assertTrue(cache.add('bla', 'xxx'))
+        self.assertEqual(cache.get_many(['foo', 'bla', 'x']),
+                         {'foo': 'bla', 'bla': 'xxx'})
+        cache.set_many({'a': 1, 'b': 2})
+        self.assertEqual(cache.get('b'), 2)
+        cache.delete('b')
+        self.assertEqual(cache.get('b'), None)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_lru(self):
+        cache = lux.create_cache('memory://?max_entries=2')
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['entries'], 2)
+
+    def test_expiry(self):
+        cache = lux.create_cache('memory://')
+        cache.set('a', 1, timeout=0.01)
+        cache.set('b', 2)
+        time.sleep(0.02)
+        self.assertEqual(cache.get('a'), None)
+        self.assertEqual(cache.get('b'), 2)
+        self.assertTrue(cache.add('a', 3))
+
+    def test_application(self):
+        app = self.application(CACHE_SERVER='memory://')
+        self.assertIsInstance(app.cache_server, lux.MemoryCache)
+        request = app.wsgi_request(path='/')
+        self.assertEqual(request.cache_server, app.cache_server)
+
+
+class FileCacheTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.location)
+        return super().tearDown()
+
+    def test_protocol(self):
+        cache = lux.create_cache('file://%s' % self.location)
+        self.assertIsInstance(cache, lux.FileCache)
+        self.assertEqual(cache.get('foo'), None)
+        cache.set('foo', {'bla': 1})
+        self.assertEqual(cache.get('foo'), {'bla': 1})
+        self.assertFalse(cache.add('foo', 'xxx'))
+        cache.set('bla', 'x', timeout=0.01)
+        time.sleep(0.02)
+        self.assertEqual(cache.get('bla'), None)
+        self.assertEqual(cache.get_many(['foo', 'bla']), {'foo': {'bla': 1}})
+        cache.delete('foo')
+        self.assertEqual(cache.get('foo'), None)
+
+    def test_shared(self):
+        url = 'file://%s' % self.location
+        cache1 = lux.create_cache(url)
+        cache2 = lux.create_cache(url)
+        cache1.set('foo', 'bla')
+        self.assertEqual(cache2.get('foo'), 'bla')
+        cache2.clear()
+        self.assertEqual(cache1.get('foo'), None)
+
+    def test_cull(self):
+        cache = lux.create_cache('file://%s?max_entries=3&cull_frequency=1' %
+                                 self.location)
+        for n in range(5):
+            cache.set('key%s' % n, n)
+        self.assertEqual(len(os.listdir(self.location)), 3)
+        self.assertEqual(cache.stats()['evictions'], 2)
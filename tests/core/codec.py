@@ -0,0 +1,41 @@
+import json
+
+from pulsar import ImproperlyConfigured
+
+import lux
+from lux.utils import test
+from lux.core import json_codec, JsonCodec
+
+
+class JsonCodecTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def test_default(self):
+        codec = json_codec()
+        self.assertIsInstance(codec, JsonCodec)
+        self.assertEqual(codec.module, json)
+        self.assertEqual(json_codec('json'), codec)
+        self.assertEqual(codec.loads(b'{"a": [1, 2]}'), {'a': [1, 2]})
+        self.assertEqual(codec.loads(codec.dumps({'b': 'c'})), {'b': 'c'})
+
+    def test_auto(self):
+        codec = json_codec('auto')
+        self.assertEqual(codec.loads(codec.dumps([1, 'a'])), [1, 'a'])
+
+    def test_unknown(self):
+        self.assertRaises(ImproperlyConfigured, json_codec, 'foo')
+        self.assertRaises(ImproperlyConfigured, json_codec, 'lux.foo')
+
+    def test_dotted_path(self):
+        codec = json_codec('lux.core.codec.json')
+        self.assertEqual(codec.module, json)
+
+    def test_application(self):
+        app = self.application(JSON_CODEC='auto')
+        self.assertEqual(app.json_codec, json_codec('auto'))
+        request = app.wsgi_request(
+            path='/', extra={'HTTP_ACCEPT': 'application/json'})
+        response = lux.Json({'a': 1}).http_response(request)
+        self.assertEqual(response.content_type, 'application/json')
+        self.assertEqual(app.json_codec.loads(b''.join(response.content)),
+                         {'a': 1})
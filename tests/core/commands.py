@@ -1,9 +1,13 @@
 import os
 import io
+import json
+import tempfile
 import shutil
 from os import path
 
+from lux import CommandError
 from lux.utils import test
+from lux.core.commands.import_profile import parse_importtime
 
 
 class CommandTests(test.TestCase):
@@ -46,3 +50,62 @@ class CommandTests(test.TestCase):
         yield from command([])
         data = command.app.stdout.getvalue()
         self.assertTrue(data)
+
+    def test_event_stats(self):
+        command = self.fetch_command('event_stats')
+        self.assertTrue(command.help)
+        stats = yield from command(['--requests', '3'])
+        self.assertTrue(stats)
+        requests = [s for s in stats if s['event'] == 'on_request']
+        for s in requests:
+            self.assertEqual(s['calls'], 3)
+        data = command.app.stdout.getvalue()
+        self.assertTrue('handler' in data)
+
+    def test_bench(self):
+        command = self.fetch_command('bench')
+        self.assertTrue(command.help)
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'bench.json')
+            results = yield from command(['--paths', '/', '--requests', '10',
+                                          '--concurrency', '2',
+                                          '--output', output])
+            with open(output) as file:
+                data = json.load(file)
+        self.assertEqual(len(results), 1)
+        result = results[0]
+        self.assertEqual(result['path'], '/')
+        self.assertEqual(result['requests'], 10)
+        self.assertTrue(result['p50'] <= result['p95'] <= result['p99'])
+        self.assertEqual(data['concurrency'], 2)
+        self.assertEqual(data['results'], results)
+        self.assertTrue('req/s' in command.app.stdout.getvalue())
+
+    def test_import_profile(self):
+        command = self.fetch_command('import_profile')
+        self.assertTrue(command.help)
+        modules = yield from command(['--prefix', 'lux', '--top', '5'])
+        self.assertTrue(modules)
+        names = [m[0] for m in modules]
+        self.assertTrue('lux.core' in names)
+        data = command.app.stdout.getvalue()
+        self.assertTrue('Total import time' in data)
+        try:
+            yield from command(['--max-time', '0.001'])
+        except CommandError:
+            pass
+        else:
+            raise AssertionError('CommandError not raised')
+
+    def test_parse_importtime(self):
+        text = '\n'.join(('import time: self [us] | cumulative | imported '
+                          'package',
+                          'import time:       730 |       1015 |     '
+                          'json.scanner',
+                          'import time:      1347 |       1762 |   '
+                          'json.decoder',
+                          'import time:       400 |       2162 | json'))
+        self.assertEqual(parse_importtime(text),
+                         [('json.scanner', 730, 1015, 2),
+                          ('json.decoder', 1347, 1762, 1),
+                          ('json', 400, 2162, 0)])
@@ -0,0 +1,109 @@
+from pulsar.apps.wsgi import Router
+
+import lux
+from lux.utils import test
+from lux.core import RouterDispatcher, compile_middleware
+
+
+def ok(request):
+    return request.response
+
+
+def site_routers(sections=20):
+    '''A site with static sections, nested dynamic routes, an api
+    and catch-all routes
+    '''
+    routers = [Router('/', get=ok)]
+    for n in range(sections):
+        section = Router('section%d' % n, get=ok)
+        section.add_child(Router('<id>', get=ok))
+        section.add_child(Router('<id>/edit', get=ok))
+        routers.append(section)
+        if n == sections // 2:
+            # catch-all in the middle of the list
+            routers.append(Router('<page>', get=ok))
+    api = Router('api/', get=ok)
+    for n in range(sections):
+        items = api.add_child(Router('items%d' % n, get=ok))
+        items.add_child(Router('<int:id>', get=ok))
+    routers.append(api)
+    routers.append(Router('media/<path:path>', get=ok))
+    routers.append(Router('<path:path>', get=ok))
+    return routers
+
+
+def url_mix(sections=20):
+    paths = ['', 'api/', 'api/items3', 'media/lux/lux.js', 'blog/2015/a-post',
+             'section%d' % (sections - 1), 'section%d/edit' % sections]
+    for n in range(sections):
+        paths.extend(('section%d' % n, 'section%d/x%d' % (n, n),
+                      'section%d/x%d/edit' % (n, n),
+                      'api/items%d/%d' % (n, n), 'api/items%d/foo' % n))
+    return paths
+
+
+def linear_resolve(routers, path):
+    for router in routers:
+        args = router.resolve(path)
+        if args:
+            return args
+
+
+class DispatcherTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def test_same_resolution(self):
+        routers = site_routers()
+        dispatcher = RouterDispatcher(routers)
+        for path in url_mix():
+            expected = linear_resolve(routers, path)
+            self.assertEqual(dispatcher.resolve(path), expected, path)
+
+    def test_catch_all_order(self):
+        routers = site_routers(4)
+        dispatcher = RouterDispatcher(routers)
+        router, urlargs = dispatcher.resolve('section1')
+        self.assertEqual(router.route.rule, 'section1')
+        # section3 is after the <page> catch-all
+        router, urlargs = dispatcher.resolve('section3')
+        self.assertEqual(router.route.rule, '<page>')
+        self.assertEqual(urlargs, {'page': 'section3'})
+        router, urlargs = dispatcher.resolve('section3/foo')
+        self.assertEqual(router.route.rule, 'section3/<id>')
+        router, urlargs = dispatcher.resolve('whatever/foo')
+        self.assertEqual(router.route.rule, '<path:path>')
+
+    def test_compile_middleware(self):
+        def middleware(environ, start_response):
+            pass
+
+        class CustomRouter(Router):
+
+            def __call__(self, environ, start_response=None):
+                pass
+
+        a, b, c = Router('a'), Router('b'), CustomRouter('c')
+        compiled = compile_middleware([middleware, a, b, c])
+        self.assertEqual(len(compiled), 3)
+        self.assertEqual(compiled[0], middleware)
+        self.assertEqual(compiled[1].routers, (a, b))
+        self.assertEqual(compiled[2], c)
+
+    def test_handler(self):
+        app = self.application()
+        handler = lux.WsgiHandler(site_routers(4)[:-1])
+        handler.dispatch = compile_middleware(handler.middleware)
+        self.assertEqual(len(handler.dispatch), 1)
+        request, sr = self.request_start_response(app, path='/section3/x3')
+        response = handler(request.environ, sr)
+        self.assertEqual(response.status_code, 200)
+        request, sr = self.request_start_response(app, path='/a/b/c')
+        response = handler(request.environ, sr)
+        self.assertEqual(response.status_code, 404)
+
+    def test_application(self):
+        app = self.application(ROUTER_TRIE=True)
+        handler = app.handler
+        self.assertIsInstance(handler.dispatch, list)
+        self.assertFalse([m for m in handler.middleware
+                          if isinstance(m, RouterDispatcher)])
@@ -0,0 +1,64 @@
+import json
+
+from lux.utils import test
+
+
+def request_path(request, exc):
+    return request.path
+
+
+class ErrorPagesTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def error(self, app, path, accept='text/html'):
+        request, sr = self.request_start_response(app, path=path,
+                                                  HTTP_ACCEPT=accept)
+        response = app(request.environ, sr)
+        return response, b''.join(response.content).decode('utf-8')
+
+    def test_cached(self):
+        app = self.application()
+        pages = app.error_pages
+        self.assertTrue(pages.cache)
+        response, body = self.error(app, '/not-here')
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(body.startswith('<!DOCTYPE html>'))
+        self.assertEqual(pages.hits, 0)
+        response, body2 = self.error(app, '/not-here-either')
+        self.assertEqual(body2, body)
+        self.assertEqual(pages.hits, 1)
+        response, body = self.error(app, '/not-here', 'application/json')
+        self.assertEqual(json.loads(body)['status'], 404)
+        self.assertEqual(pages.stats()['pages'], 2)
+        self.assertEqual(pages.counters[404], 3)
+
+    def test_prerender(self):
+        app = self.application(ERROR_PAGES=[404, 500, 999],
+                               WARM_UP_PATHS=[])
+        app.warm_up()
+        pages = app.error_pages
+        self.assertEqual(pages.stats()['pages'],
+                         2*len(pages.content_types))
+        self.error(app, '/not-here')
+        self.assertEqual(pages.hits, 1)
+
+    def test_fragments(self):
+        app = self.application(ERROR_FRAGMENTS={'path': request_path})
+        pages = app.error_pages
+        page = pages.prerender([404], ['text/html'])
+        self.assertEqual(page, 1)
+        # the default error template does not use the path fragment
+        self.assertIsInstance(pages._pages[(404, 'text/html')], str)
+        pages._pages[(404, 'text/html')] = ['<p>', 'path', '</p>']
+        response, body = self.error(app, '/a&b')
+        self.assertTrue(body.startswith('<!DOCTYPE html>'))
+        self.assertTrue('<p>/a&amp;b</p>' in body)
+
+    def test_no_cache(self):
+        app = self.application(ERROR_PAGES_CACHE=False)
+        self.error(app, '/not-here')
+        self.error(app, '/not-here')
+        pages = app.error_pages
+        self.assertEqual(pages.stats(), {'counters': {404: 2},
+                                         'pages': 0,
+                                         'hits': 0})
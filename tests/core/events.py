@@ -0,0 +1,57 @@
+import lux
+from lux.utils import test
+
+
+class Listener(lux.Extension):
+
+    def __init__(self):
+        self.calls = []
+
+    def on_request(self, app, request):
+        self.calls.append(request)
+
+    def on_warm_up(self, app):
+        self.calls.append('warm_up')
+
+
+class EventTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def test_compiled(self):
+        app = self.application()
+        compiled = app._compiled_events
+        self.assertTrue(compiled)
+        self.assertIsInstance(compiled['on_request'], tuple)
+        listener = Listener()
+        app.bind_events(listener)
+        self.assertEqual(app._compiled_events, None)
+        app.fire('on_request', 'foo')
+        self.assertEqual(listener.calls, ['foo'])
+        self.assertEqual(app.event_stats(), [])
+
+    def test_timing(self):
+        app = self.application(EVENT_TIMING=True)
+        self.assertTrue(app.event_timing)
+        listener = Listener()
+        app.bind_events(listener)
+        app.fire('on_request', 'foo')
+        app.fire('on_request', 'bar')
+        self.assertEqual(listener.calls, ['foo', 'bar'])
+        stats = app.event_stats('on_request')
+        self.assertTrue(stats)
+        stats = [s for s in stats if s['handler'].endswith('on_request')
+                 and s['calls'] == 2]
+        self.assertTrue(stats)
+        self.assertTrue(stats[0]['max'] >= stats[0]['mean'])
+
+    def test_warm_up(self):
+        app = self.application(WARM_UP_PATHS=['/'])
+        listener = Listener()
+        app.bind_events(listener)
+        elapsed = app.warm_up()
+        self.assertTrue(elapsed > 0)
+        self.assertEqual(listener.calls[0], 'warm_up')
+        self.assertEqual(len(listener.calls), 2)
+        self.assertEqual(listener.calls[1].path, '/')
+        loader = app.template_loader
+        self.assertTrue(loader.full_path('home.html') in loader._sources)
@@ -0,0 +1,63 @@
+import threading
+
+from pulsar import ImproperlyConfigured, isfuture
+
+import lux
+from lux.utils import test
+
+
+class BlockingRouter(lux.Router):
+
+    @lux.in_executor()
+    def get(self, request):
+        response = request.response
+        response.content = threading.current_thread().name
+        return response
+
+
+def mark_response(environ, response):
+    response['X-Marked'] = 'yes'
+    return response
+
+
+class ExecutorTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def test_pool(self):
+        app = self.application(EXECUTOR_POOLS={'default': 2, 'db': 1})
+        pool = app.executor('db')
+        self.assertIsInstance(pool, lux.ExecutorPool)
+        self.assertEqual(app.executor('db'), pool)
+        result = yield from app.run_in_executor('db', sum, (1, 2, 3))
+        self.assertEqual(result, 6)
+        stats = pool.stats()
+        self.assertEqual(stats['size'], 1)
+        self.assertEqual(stats['served'], 1)
+        self.assertEqual(stats['queue'], 0)
+        self.assertEqual(stats['active'], 0)
+        self.assertRaises(ImproperlyConfigured, app.executor, 'foo')
+
+    def test_router(self):
+        app = self.application()
+        handler = lux.WsgiHandler([BlockingRouter('/blocking')],
+                                  response_middleware=[mark_response])
+        request, sr = self.request_start_response(app, path='/blocking')
+        response = handler(request.environ, sr)
+        self.assertTrue(isfuture(response))
+        response = yield from response
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Marked'], 'yes')
+        thread = b''.join(response.content).decode('utf-8')
+        self.assertNotEqual(thread, threading.current_thread().name)
+        self.assertEqual(app.executor().stats()['served'], 1)
+
+    def test_wrapper(self):
+        app = self.application()
+        router = lux.Router('/wrapped',
+                            response_wrapper=lux.executor_wrapper(),
+                            get=lambda request: request.response)
+        handler = lux.WsgiHandler([router])
+        request, sr = self.request_start_response(app, path='/wrapped')
+        response = yield from handler(request.environ, sr)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(app.executor().stats()['served'], 1)
@@ -0,0 +1,70 @@
+import json
+import asyncio
+
+from pulsar.apps.greenio import wait
+
+from lux.utils import test
+from lux.core.green import AdaptiveGreenPool, GreenWsgi
+
+
+def slow(value):
+    wait(asyncio.sleep(0.01))
+    return value
+
+
+class GreenTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def test_pool_stats(self):
+        pool = AdaptiveGreenPool(max_workers=3)
+        self.assertFalse(pool.adaptive)
+        results = yield from asyncio.gather(*[pool.submit(slow, n)
+                                              for n in range(6)])
+        self.assertEqual(results, list(range(6)))
+        stats = pool.stats()
+        self.assertEqual(stats['size'], 3)
+        self.assertEqual(stats['greenlets'], 3)
+        self.assertEqual(stats['queue'], 0)
+        self.assertEqual(stats['served'], 6)
+        self.assertTrue(stats['wait_max'] >= stats['wait_p50'])
+
+    def test_adaptive(self):
+        pool = AdaptiveGreenPool(max_workers=8, min_workers=2,
+                                 target_wait=0.001, window=4)
+        self.assertTrue(pool.adaptive)
+        self.assertEqual(pool.size, 2)
+        yield from asyncio.gather(*[pool.submit(slow, n) for n in range(12)])
+        self.assertTrue(pool.size > 2)
+        self.assertTrue(pool.resized)
+        # Greenlets were started for the queued tasks
+        self.assertTrue(len(pool._greenlets) > 2)
+        # Idle pool shrinks back
+        pool.target_wait = 10
+        for _ in range(3):
+            yield from asyncio.gather(*[pool.submit(slow, n)
+                                        for n in range(4)])
+        self.assertTrue(len(pool._greenlets) <= pool.size)
+
+    def test_application(self):
+        app = self.application(GREEN_WSGI=2, GREEN_WSGI_MAX=4,
+                               GREEN_WSGI_STATS_URL='/green-stats')
+        green = app.green_handler
+        self.assertIsInstance(green, GreenWsgi)
+        request, sr = self.request_start_response(
+            app, path='/green-stats', HTTP_ACCEPT='application/json')
+        response = yield from app(request.environ, sr)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(b''.join(response.content).decode('utf-8'))
+        self.assertEqual(data['rejected'], 0)
+
+    def test_max_queue(self):
+        app = self.application(GREEN_WSGI=1, GREEN_WSGI_MAX_QUEUE=1)
+        green = app.green_handler
+        request, sr = self.request_start_response(app, path='/')
+        yield from app(request.environ, sr)
+        green.pool.pending = 1
+        request, sr = self.request_start_response(app, path='/')
+        response = yield from app(request.environ, sr)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(green.stats()['rejected'], 1)
+        green.pool.pending = 0
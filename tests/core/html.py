@@ -0,0 +1,183 @@
+import gzip
+from datetime import datetime
+
+from pulsar import HttpException
+
+import lux
+from lux.utils import test
+from lux.core import negotiate
+from lux.extensions.base import GZipMiddleware
+
+
+class HtmlResponseTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def html_request(self, app, **extra):
+        return app.wsgi_request(path='/', extra=dict(HTTP_ACCEPT='text/html',
+                                                     **extra))
+
+    def test_stream(self):
+        app = self.application()
+        request = self.html_request(app)
+        response = app.html_response(request, 'home.html',
+                                     {'html_main': 'Hello'}, stream=True)
+        self.assertTrue(response.is_streamed)
+        chunks = list(response.content)
+        self.assertTrue(len(chunks) > 1)
+        self.assertTrue('</head>' in chunks[0])
+        self.assertFalse('Hello' in chunks[0])
+        html = ''.join(chunks)
+        self.assertTrue(html.endswith('</body>\n</html>'))
+        #
+        request = self.html_request(app)
+        response = app.html_response(request, 'home.html',
+                                     {'html_main': 'Hello'})
+        self.assertFalse(response.is_streamed)
+        self.assertEqual(b''.join(response.content).decode('utf-8'), html)
+
+    def test_stream_gzip(self):
+        app = self.application()
+        request = self.html_request(app, HTTP_ACCEPT_ENCODING='gzip')
+        response = app.html_response(request, 'home.html',
+                                     {'html_main': 'Hello'}, stream=True)
+        middleware = GZipMiddleware(200)
+        self.assertTrue(middleware.available(request.environ, response))
+        middleware(request.environ, response)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        data = gzip.decompress(b''.join(response.content)).decode('utf-8')
+        self.assertTrue(data.startswith('<!DOCTYPE html>'))
+        self.assertTrue('Hello' in data)
+
+
+class HtmlPrototypeTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def test_prototype(self):
+        app = self.application(HTML_TITLE='Prototype')
+        prototype = app.html_prototype
+        self.assertEqual(app.html_prototype, prototype)
+        request = app.wsgi_request(path='/')
+        doc = app.html_document(request)
+        self.assertNotEqual(doc, prototype)
+        self.assertNotEqual(doc.head, prototype.head)
+        self.assertEqual(doc.head.title, 'Prototype')
+        self.assertEqual(doc.jscontext, prototype.jscontext)
+        self.assertEqual(doc.meta.head, doc.head)
+
+    def test_clone_isolation(self):
+        app = self.application()
+        prototype = app.html_prototype
+        request = app.wsgi_request(path='/')
+        doc = app.html_document(request)
+        doc.head.title = 'Changed'
+        doc.jscontext['foo'] = 'bar'
+        doc.head.links.append('/foo.css')
+        doc.head.scripts.require.append('foo')
+        doc.body.append('<p>Hello</p>')
+        doc.attr('lang', 'it')
+        self.assertNotEqual(prototype.head.title, 'Changed')
+        self.assertFalse('foo' in prototype.jscontext)
+        self.assertFalse('foo' in prototype.head.scripts.require)
+        self.assertFalse(prototype.body.children)
+        self.assertEqual(prototype.attr('lang'), 'en')
+        html = app.html_document(request).render(request)
+        self.assertFalse('/foo.css' in html)
+        self.assertFalse('Hello' in html)
+
+    def test_clone_nested_jscontext(self):
+        app = self.application()
+        prototype = app.html_prototype
+        prototype.jscontext['nested'] = {'a': {'b': 1}}
+        request = app.wsgi_request(path='/')
+        doc = app.html_document(request)
+        doc.jscontext['nested']['a']['b'] = 2
+        self.assertEqual(prototype.jscontext['nested'], {'a': {'b': 1}})
+
+    def test_links_last(self):
+        app = self.application(HTML_LINKS=['/last.css'])
+        request = app.wsgi_request(path='/')
+        html = app.html_document(request).render(request)
+        self.assertTrue(html.rindex('<link') < html.index('last.css'))
+
+
+class Page(lux.HtmlRouter):
+    version = '1'
+    modified = None
+    rendered = 0
+
+    def validator(self, request):
+        return self.modified or self.version
+
+    def get_html(self, request):
+        Page.rendered += 1
+        return '<p>Page</p>'
+
+
+class ConditionalGetTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def get(self, app, router, **headers):
+        handler = lux.WsgiHandler([router])
+        request, sr = self.request_start_response(
+            app, path='/page', HTTP_ACCEPT='text/html', **headers)
+        return handler(request.environ, sr)
+
+    def test_etag(self):
+        app = self.application()
+        router = Page('/page')
+        rendered = Page.rendered
+        response = self.get(app, router)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Page.rendered, rendered + 1)
+        etag = response['ETag']
+        response = self.get(app, router, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(Page.rendered, rendered + 1)
+        router.version = '2'
+        response = self.get(app, router, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_last_modified(self):
+        app = self.application()
+        router = Page('/page', modified=datetime(2015, 3, 1, 12))
+        response = self.get(app, router)
+        self.assertEqual(response.status_code, 200)
+        last_modified = response['Last-Modified']
+        response = self.get(app, router,
+                            HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        router.modified = datetime(2015, 3, 2)
+        response = self.get(app, router,
+                            HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        response = self.get(app, router, HTTP_IF_MODIFIED_SINCE='bad date')
+        self.assertEqual(response.status_code, 200)
+
+
+class RequestTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def test_bound(self):
+        app = self.application()
+        request = app.wsgi_request(path='/')
+        self.assertEqual(request.app, app)
+        self.assertEqual(request.__dict__['app'], app)
+        self.assertEqual(request.config, app.config)
+
+    def test_negotiate(self):
+        types = ('text/html', 'application/json')
+        self.assertEqual(negotiate('application/json', types),
+                         'application/json')
+        self.assertEqual(negotiate('text/html,*/*;q=0.8', types),
+                         'text/html')
+        self.assertEqual(negotiate('*/*', ()), None)
+        self.assertEqual(negotiate('image/png', types), False)
+        hits = negotiate.cache_info().hits
+        negotiate('image/png', types)
+        self.assertEqual(negotiate.cache_info().hits, hits + 1)
+        app = self.application()
+        router = lux.Router('/foo', response_content_types=types)
+        request = app.wsgi_request(path='/foo',
+                                   extra={'HTTP_ACCEPT': 'image/png'})
+        self.assertRaises(HttpException, router.content_type, request)
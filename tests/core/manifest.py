@@ -0,0 +1,68 @@
+import os
+import tempfile
+
+import lux
+from lux.utils import test
+
+
+class ManifestTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def test_path(self):
+        path = lux.manifest_path('tests.config')
+        self.assertEqual(os.path.basename(path), '.config.manifest.json')
+        self.assertEqual(os.path.dirname(path),
+                         os.path.dirname(os.path.dirname(__file__)))
+        self.assertEqual(lux.manifest_path('tests.notavailable'), None)
+
+    def test_build(self):
+        app = self.application()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'manifest.json')
+            manifest = lux.Manifest.build(app, path)
+            self.assertTrue(manifest.is_valid())
+            self.assertEqual(manifest.commands, app.commands)
+            self.assertTrue('serve' in manifest)
+            self.assertFalse('foo' in manifest)
+            self.assertEqual(manifest.templates['index'],
+                             app.template_loader._index)
+            self.assertEqual(manifest.parameters['HTML_TITLE']['default'],
+                             'Lux')
+            self.assertTrue(manifest.save())
+            loaded = lux.Manifest.load(path)
+            self.assertEqual(loaded.data, manifest.data)
+            #
+            manifest.data['mtimes'][tmp] = os.stat(tmp).st_mtime
+            self.assertTrue(manifest.is_valid())
+            os.utime(tmp, (0, 0))
+            self.assertFalse(manifest.is_valid())
+        self.assertEqual(lux.Manifest.load(path), None)
+
+    def test_remove(self):
+        app = self.application()
+        path = lux.manifest_path('tests.config')
+        self.assertTrue(lux.Manifest.build(app, path).save())
+        app.callable.remove_manifest()
+        self.assertFalse(os.path.isfile(path))
+        self.assertEqual(app.callable.load_manifest(), None)
+
+    def test_parser(self):
+        app = self.application()
+        manifest = lux.Manifest.build(app, None)
+        parser = manifest.get_parser(app.meta.script, add_help=False)
+        opts, _ = parser.parse_known_args(['serve', '--debug'])
+        self.assertEqual(opts.command, 'serve')
+        self.assertEqual(parser.usage, app.get_parser().usage)
+
+    def test_application(self):
+        app = self.application()
+        manifest = lux.Manifest.build(app, None)
+        manifest.data['commands'] = [['lux', ['serve']]]
+        app.callable._manifest = manifest
+        app = app.callable.setup()
+        self.assertEqual(app.commands, manifest.commands)
+        self.assertEqual(app.template_loader._index,
+                         manifest.templates['index'])
+        self.assertEqual(app.get_command('serve').name, 'serve')
+        self.assertRaises(lux.CommandError, app.get_command,
+                          'generate_secret_key')
@@ -0,0 +1,214 @@
+import os
+import shutil
+import tempfile
+
+import lux
+from lux.utils import test
+
+
+STATIC_TEMPLATES = os.path.join(os.path.dirname(lux.__file__), 'extensions',
+                                'static', 'templates')
+
+
+class TemplateLoaderTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def loader_with_directory(self, app):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        loader = app.template_loader
+        loader.directories.insert(0, directory)
+        return loader, directory
+
+    def write(self, directory, name, text, mtime=None):
+        filename = os.path.join(directory, name)
+        with open(filename, 'w') as fp:
+            fp.write(text)
+        if mtime:
+            os.utime(filename, (mtime, mtime))
+        return filename
+
+    def test_index(self):
+        app = self.application()
+        filename = app.template_full_path('home.html')
+        self.assertTrue(filename)
+        self.assertEqual(app.template_full_path(['foo.html', 'home.html']),
+                         filename)
+        self.assertEqual(app.template_full_path('foo.html'), None)
+        self.assertEqual(app.template('foo.html'), '')
+
+    def test_render(self):
+        app = self.application()
+        text = app.render_template('home.html', {'html_main': 'Hello'})
+        self.assertEqual(text, 'Hello\n')
+        self.assertEqual(app.render_template('home.html'), '$html_main\n')
+
+    def test_compiled_cache(self):
+        app = self.application()
+        loader = app.template_loader
+        filename = app.template_full_path('error.html')
+        compiled = loader.compiled(filename)
+        self.assertTrue(compiled)
+        self.assertEqual(loader.compiled(filename), compiled)
+
+    def test_override(self):
+        app = self.application()
+        loader, directory = self.loader_with_directory(app)
+        filename = self.write(directory, 'home.html', '<p>$html_main</p>')
+        loader.index()
+        self.assertEqual(app.template_full_path('home.html'), filename)
+        text = app.render_template('home.html', {'html_main': 'Hello'})
+        self.assertEqual(text, '<p>Hello</p>')
+
+    def test_debug_invalidation(self):
+        app = self.application()
+        loader, directory = self.loader_with_directory(app)
+        self.write(directory, 'test.html', 'one $x', 1000)
+        loader.index()
+        self.assertEqual(app.render_template('test.html', {'x': 1}), 'one 1')
+        self.write(directory, 'test.html', 'two $x', 2000)
+        self.assertEqual(app.render_template('test.html', {'x': 1}), 'one 1')
+        # in debug mode changed templates are reloaded
+        app.debug = True
+        self.assertEqual(app.render_template('test.html', {'x': 1}), 'two 1')
+        self.assertEqual(app.render_template('test.html', {'x': 1}), 'two 1')
+        self.write(directory, 'test.html', 'three $x', 3000)
+        self.assertEqual(app.render_template('test.html', {'x': 1}),
+                         'three 1')
+
+
+class LuxEngineTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, text):
+        with open(os.path.join(self.directory, name), 'w') as fp:
+            fp.write(text)
+
+    def loader(self, **params):
+        app = self.application(DEFAULT_TEMPLATE_ENGINE='lux', **params)
+        app.template_loader.directories.insert(0, self.directory)
+        app.template_loader.index()
+        return app
+
+    def test_substitution(self):
+        engine = lux.template_engine('lux')
+        self.assertEqual(engine('$a ${b}c $$ $d', {'a': 1, 'b': 2}),
+                         '1 2c $ $d')
+        self.assertEqual(engine('100% $a', {'a': 1}), '100% 1')
+
+    def test_python_compatible(self):
+        app = self.application()
+        app.template_loader.directories.append(STATIC_TEMPLATES)
+        app.template_loader.index()
+        context = {'title': 'Hello', 'description': 'A test',
+                   'author': 'luca', 'date': '2015',
+                   'html_main': '<p>main</p>'}
+        filename = app.template_full_path('article.html')
+        self.assertTrue(filename)
+        loader = app.template_loader
+        text = loader.render(filename, context, 'lux')
+        self.assertTrue('<p>main</p>' in text)
+        self.assertEqual(text, loader.render(filename, context, 'python'))
+
+    def test_extends_and_include(self):
+        self.write('base.html', '<title>{% block title %}Base{% endblock %}'
+                                '</title>{% block body %}{% endblock %}'
+                                '{% include "footer.html" %}')
+        self.write('footer.html', '<footer>$year</footer>')
+        self.write('page.html', '{% extends "base.html" %}'
+                                '{% block body %}<p>$text</p>{% endblock %}')
+        app = self.loader()
+        text = app.render_template('page.html', {'text': 'Hi', 'year': 2015})
+        self.assertEqual(text, '<title>Base</title><p>Hi</p>'
+                               '<footer>2015</footer>')
+
+    def test_include_from_text(self):
+        self.write('footer.html', '<footer>$year</footer>')
+        app = self.loader()
+        engine = lux.template_engine('lux')
+        text = engine('<p>$text</p>{% include "footer.html" %}',
+                      {'text': 'Hi', 'year': 2015}, app.template_loader)
+        self.assertEqual(text, '<p>Hi</p><footer>2015</footer>')
+
+    def test_syntax_error(self):
+        engine = lux.template_engine('lux')
+        self.assertRaises(lux.TemplateError, engine.compile,
+                          '{% block foo %}')
+        self.assertRaises(lux.TemplateError, engine.compile,
+                          '{% foo %}')
+        self.assertRaises(lux.TemplateError, engine.compile,
+                          '{% include foo.html %}')
+
+    def test_bytecode_cache(self):
+        cache_dir = os.path.join(self.directory, 'cache')
+        self.write('test.html', '<p>$text</p>')
+        app = self.loader(TEMPLATE_CACHE_DIR=cache_dir)
+        text = app.render_template('test.html', {'text': 'Hi'})
+        self.assertEqual(text, '<p>Hi</p>')
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        engine = lux.LuxEngine()
+        code = engine.code('<p>$text</p>', cache_dir)
+        self.assertTrue(code)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+
+class TemplateContextTests(test.TestCase):
+    config_file = 'tests.config'
+
+    def test_layers(self):
+        app = self.application()
+        request = app.wsgi_request(path='/')
+        data = {'foo': 'bar'}
+        context = app.context(request, data)
+        self.assertIsInstance(context, lux.TemplateContext)
+        self.assertEqual(context.maps[0], data)
+        self.assertEqual(context['foo'], 'bar')
+        self.assertEqual(context['APP_NAME'], app.config['APP_NAME'])
+        self.assertFalse('APP_NAME' in data)
+        context['APP_NAME'] = 'Changed'
+        self.assertEqual(context['APP_NAME'], 'Changed')
+        self.assertNotEqual(app.config['APP_NAME'], 'Changed')
+
+    def test_add_layer(self):
+        context = lux.TemplateContext({'a': 1}, {'b': 2, 'c': 3})
+        context.add_layer({'b': 4})
+        self.assertEqual(context['a'], 1)
+        self.assertEqual(context['b'], 4)
+        self.assertEqual(context['c'], 3)
+
+    def test_lazy(self):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return 'lazy'
+
+        context = lux.TemplateContext({}, {'a': 1})
+        context.lazy('b', factory)
+        self.assertFalse(calls)
+        self.assertTrue('b' in context)
+        self.assertEqual(context.get('b'), 'lazy')
+        self.assertEqual(context['b'], 'lazy')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(context.get('c', 'd'), 'd')
+        self.assertRaises(KeyError, lambda: context['c'])
+
+    def test_render(self):
+        app = self.application(APP_NAME='Layered')
+        request = app.wsgi_request(path='/')
+        for engine in ('python', 'lux'):
+            text = app.render_template('home.html', {'html_main': '$APP_NAME'},
+                                       request=request, engine=engine)
+            self.assertEqual(text, '$APP_NAME\n')
+        engine = lux.template_engine('python')
+        context = app.context(request, {'x': 1})
+        context.lazy('y', lambda: 2)
+        self.assertEqual(engine('$x $y $APP_NAME $z', context),
+                         '1 2 Layered $z')
+        engine = lux.template_engine('lux')
+        self.assertEqual(engine('$x $y $APP_NAME $z', context),
+                         '1 2 Layered $z')
@@ -0,0 +1,34 @@
+import lux
+from lux import Router, Html
+
+from tests.config import *
+
+EXTENSIONS = ['lux.extensions.base',
+              'lux.extensions.pagecache']
+
+PAGE_CACHE_URL = '/_page_cache'
+
+
+class Extension(lux.Extension):
+    served = 0
+
+    def middleware(self, app):
+        return [Router('/', get=self.home),
+                Router('/private', get=self.private),
+                Router('/cookie', get=self.cookie)]
+
+    def home(self, request):
+        self.served += 1
+        doc = request.html_document
+        doc.body.append(Html('div', '<p>Served %s</p>' % self.served))
+        return doc.http_response(request)
+
+    def private(self, request):
+        response = self.home(request)
+        response['Cache-Control'] = 'private, max-age=60'
+        return response
+
+    def cookie(self, request):
+        response = self.home(request)
+        response.set_cookie('foo', value='bla')
+        return response
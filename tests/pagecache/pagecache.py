@@ -0,0 +1,100 @@
+import json
+
+from lux.utils import test
+from lux.extensions.pagecache import PageCache
+
+
+class User:
+
+    def is_authenticated(self):
+        return True
+
+
+class TestPageCache(test.TestCase):
+    config_file = 'tests.pagecache'
+
+    def html(self, request):
+        response = request.response
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.content).decode('utf-8')
+
+    def test_hit(self):
+        app = self.application()
+        ext = app.extensions['tests.pagecache']
+        html = self.html(self.request(app, path='/', HTTP_ACCEPT='text/html'))
+        self.assertTrue('Served 1' in html)
+        html2 = self.html(self.request(app, path='/',
+                                       HTTP_ACCEPT='text/html'))
+        self.assertEqual(html, html2)
+        self.assertEqual(ext.served, 1)
+        # Different query string
+        html = self.html(self.request(app, path='/?page=2',
+                                      HTTP_ACCEPT='text/html'))
+        self.assertTrue('Served 2' in html)
+        page_cache = app.extensions['pagecache'].page_cache
+        stats = page_cache.stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]['hits'], 1)
+        self.assertEqual(stats[0]['misses'], 2)
+
+    def test_vary(self):
+        app = self.application()
+        ext = app.extensions['tests.pagecache']
+        self.request(app, path='/', HTTP_ACCEPT='text/html')
+        self.request(app, path='/', HTTP_ACCEPT='text/plain')
+        self.assertEqual(ext.served, 2)
+
+    def test_cache_control(self):
+        app = self.application()
+        ext = app.extensions['tests.pagecache']
+        self.request(app, path='/private', HTTP_ACCEPT='text/html')
+        self.request(app, path='/private', HTTP_ACCEPT='text/html')
+        self.assertEqual(ext.served, 2)
+        self.request(app, path='/cookie', HTTP_ACCEPT='text/html')
+        self.request(app, path='/cookie', HTTP_ACCEPT='text/html')
+        self.assertEqual(ext.served, 4)
+
+    def test_response_timeout(self):
+        app = self.application()
+        page_cache = PageCache(None, timeout=100)
+        request = app.wsgi_request(path='/')
+        response = request.response
+        response.content_type = 'text/html'
+        response.content = 'Hello'
+        self.assertEqual(page_cache.response_timeout(response), 100)
+        response['Cache-Control'] = 'public, max-age=20'
+        self.assertEqual(page_cache.response_timeout(response), 20)
+        response['Cache-Control'] = 'no-store'
+        self.assertEqual(page_cache.response_timeout(response), 0)
+        response['Cache-Control'] = 'public'
+        response['Vary'] = 'Accept-Encoding, Cookie'
+        self.assertEqual(page_cache.response_timeout(response), 0)
+
+    def test_user(self):
+        app = self.application()
+        page_cache = app.extensions['pagecache'].page_cache
+        request = app.wsgi_request(path='/')
+        self.assertTrue(page_cache.cacheable(request))
+        request.cache.user = User()
+        self.assertFalse(page_cache.cacheable(request))
+        request = app.wsgi_request(path='/', method='POST')
+        self.assertFalse(page_cache.cacheable(request))
+
+    def test_session_cookie(self):
+        app = self.application()
+        page_cache = PageCache(None, session_cookie='LUX')
+        request = app.wsgi_request(path='/', extra={'HTTP_COOKIE': 'foo=1'})
+        self.assertTrue(page_cache.cacheable(request))
+        request = app.wsgi_request(path='/', extra={'HTTP_COOKIE': 'LUX=1'})
+        self.assertFalse(page_cache.cacheable(request))
+
+    def test_endpoint(self):
+        app = self.application()
+        self.request(app, path='/', HTTP_ACCEPT='text/html')
+        self.request(app, path='/', HTTP_ACCEPT='text/html')
+        request = self.request(app, path='/_page_cache',
+                               HTTP_ACCEPT='application/json')
+        data = json.loads(self.html(request))
+        route = data['routes'][0]
+        self.assertEqual(route['hits'], 1)
+        self.assertEqual(route['hit_rate'], 0.5)
@@ -0,0 +1,21 @@
+import lux
+from lux import Router, Html
+
+from tests.config import *
+
+EXTENSIONS = ['lux.extensions.base',
+              'lux.extensions.profile']
+
+PROFILE_SAMPLE_RATE = 1
+PROFILE_URL = '/_profile'
+
+
+class Extension(lux.Extension):
+
+    def middleware(self, app):
+        return [Router('/', get=self.home)]
+
+    def home(self, request):
+        doc = request.html_document
+        doc.body.append(Html('div', '<p>Profiled</p>'))
+        return doc.http_response(request)
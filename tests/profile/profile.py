@@ -0,0 +1,66 @@
+import json
+
+from lux.utils import test
+from lux.extensions.profile import percentile
+
+
+class TestProfile(test.TestCase):
+    config_file = 'tests.profile'
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 90), 90)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([3], 99), 3)
+        self.assertEqual(percentile([], 99), 0)
+
+    def test_records(self):
+        app = self.application()
+        profiler = app.extensions['profile'].profiler
+        self.request(app, path='/')
+        self.request(app, path='/')
+        self.assertEqual(len(profiler.records), 2)
+        record = profiler.records[-1]
+        self.assertEqual(record['status'], 200)
+        self.assertTrue(record['total'] > 0)
+        self.assertTrue(record['breakdown'])
+        self.assertEqual(len(profiler.samples), 2)
+        self.assertTrue(profiler.samples[0]['profile'])
+
+    def test_endpoint(self):
+        app = self.application()
+        self.request(app, path='/')
+        request = self.request(app, path='/_profile',
+                               HTTP_ACCEPT='application/json')
+        response = request.response
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(b''.join(response.content).decode('utf-8'))
+        self.assertEqual(data['records'], 1)
+        route = data['routes'][0]
+        self.assertEqual(route['count'], 1)
+        self.assertTrue(route['p99'] >= route['p50'])
+        self.assertFalse('samples' in data)
+
+    def test_report(self):
+        command = self.fetch_command('profile_report')
+        self.assertTrue(command.help)
+        app = command.app
+        self.request(app, path='/')
+        stats = app.extensions['profile'].profiler.stats()
+        command.report({'records': 1, 'routes': stats}, True)
+        data = app.stdout.getvalue()
+        self.assertTrue('p99' in data)
+
+    def test_concurrent_records(self):
+        app = self.application()
+        profiler = app.extensions['profile'].profiler
+        first = profiler.start({'PATH_INFO': '/a'})
+        second = profiler.start({'PATH_INFO': '/b'})
+        profiler.activate(first)
+        profiler.add('templates', 1)
+        profiler.add('odm', 2, second)
+        profiler.deactivate()
+        profiler.add('templates', 4)
+        self.assertEqual(dict(first['breakdown']), {'templates': 1})
+        self.assertEqual(dict(second['breakdown']), {'odm': 2})
@@ -17,6 +17,7 @@ EXTENSIONS = ['lux.extensions.base',
 cfgfile = 'tests/staticsite'
 base = cfgfile + '/'
 STATIC_LOCATION = base + 'build'
+STATIC_BUILD_LOCATION = base + 'build-data'
 CONTEXT_LOCATION = base + 'content/context'
 
 
@@ -26,9 +27,10 @@ class StaticSiteMixin(object):
     def tearDown(self):
         if self.apps:
             for app in self.apps:
-                dir = os.path.abspath(app.config['STATIC_LOCATION'])
-                if os.path.isdir(dir):
-                    shutil.rmtree(dir)
+                for name in ('STATIC_LOCATION', 'STATIC_BUILD_LOCATION'):
+                    dir = os.path.abspath(app.config[name])
+                    if os.path.isdir(dir):
+                        shutil.rmtree(dir)
 
 
 class Extension(lux.Extension):
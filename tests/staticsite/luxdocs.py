@@ -8,7 +8,9 @@ from . import StaticSiteMixin
 class StaticSiteTests(StaticSiteMixin, test.TestCase):
     config_file = 'luxsite'
     config_params = {'STATIC_LOCATION': os.path.join(os.path.dirname(__file__),
-                                                     'docs')}
+                                                     'docs'),
+                     'STATIC_BUILD_LOCATION': os.path.join(
+                         os.path.dirname(__file__), 'docs-data')}
 
     def test_build_site(self):
         app = self.application()
@@ -1,7 +1,12 @@
+import os
+import json
+import tempfile
+
 from pulsar.apps.wsgi import WsgiHandler
 
 from lux.utils import test
-from lux.extensions.static import HtmlContent
+from lux.extensions.static import (HtmlContent, HtmlFile, BuildManifest,
+                                   MarkdownCache, ContextBuilder)
 
 from . import StaticSiteMixin
 
@@ -31,3 +36,141 @@ class StaticSiteTests(StaticSiteMixin, test.TestCase):
             if item and item.file.endswith('/blog1.html'):
                 return
         raise Exception('Could not fine blog1.html')
+
+    def test_incremental_build(self):
+        app = self.application()
+        app.extensions['static'].build(app)
+        location = os.path.abspath(app.config['STATIC_LOCATION'])
+        filename = os.path.join(
+            os.path.abspath(app.config['STATIC_BUILD_LOCATION']),
+            BuildManifest.filename)
+        with open(filename) as f:
+            data = json.loads(f.read())
+        pages = data['pages']
+        self.assertTrue(pages)
+        outputs = [e['outputs'][0] for e in pages.values()]
+        for path in outputs:
+            os.utime(path, (0, 0))
+        # a page whose source disappeared
+        stale = os.path.join(location, 'stale.html')
+        with open(stale, 'w') as f:
+            f.write('stale')
+        pages['/foo %s' % stale] = {'src': stale, 'templates': [],
+                                    'inputs': {stale: None},
+                                    'outputs': [stale],
+                                    'item': ['/stale', 0, 0.5, stale,
+                                             'text/html']}
+        with open(filename, 'w') as f:
+            f.write(json.dumps(data))
+        # unchanged pages are not rendered, stale outputs are removed
+        app = self.application()
+        app.extensions['static'].build(app)
+        self.assertFalse(os.path.isfile(stale))
+        for path in outputs:
+            self.assertEqual(os.stat(path).st_mtime, 0)
+        # full build
+        app = self.application()
+        app.extensions['static'].build(app, full=True)
+        for path in outputs:
+            self.assertNotEqual(os.stat(path).st_mtime, 0)
+
+    def test_build_jobs(self):
+        app = self.application()
+        site = app.handler.middleware[-1]
+        app.extensions['static'].build(app, full=True)
+        expected = sorted((item.loc, item.file) for item in site.built)
+        app = self.application()
+        site = app.handler.middleware[-1]
+        app.extensions['static'].build(app, full=True, jobs=2)
+        self.assertIsNone(app.static_pool)
+        items = sorted((item.loc, item.file) for item in site.built)
+        self.assertEqual(items, expected)
+
+    def test_markdown_cache(self):
+        app = self.application()
+        app.extensions['static'].build(app, full=True)
+        stats = app.markdown_cache.stats()
+        self.assertEqual(stats['hits'], 0)
+        self.assertTrue(stats['misses'])
+        app = self.application()
+        app.extensions['static'].build(app, full=True)
+        self.assertEqual(app.markdown_cache.stats(),
+                         {'hits': stats['misses'], 'misses': 0,
+                          'hit_rate': 1})
+        cache = app.markdown_cache
+        self.assertIsInstance(cache, MarkdownCache)
+        location = os.path.abspath(app.config['STATIC_LOCATION'])
+        self.assertFalse(cache.location.startswith(location))
+        # full builds remove unused entries
+        stale = os.path.join(cache.location, 'stale.json')
+        with open(stale, 'w') as f:
+            f.write('{}')
+        app = self.application()
+        app.extensions['static'].build(app, full=True)
+        self.assertFalse(os.path.isfile(stale))
+        self.assertTrue(os.listdir(cache.location))
+        self.assertNotEqual(cache.key(['meta'], 'text'),
+                            cache.key(['meta', 'toc'], 'text'))
+        self.assertNotEqual(cache.key(['meta', object()], 'text'),
+                            cache.key(['meta'], 'text'))
+        # corrupt entries are misses and are removed
+        key = cache.key(['meta'], 'corrupt')
+        corrupt = os.path.join(cache.location, '%s.json' % key)
+        with open(corrupt, 'w') as f:
+            f.write('{"body": ')
+        self.assertEqual(cache.get(key), None)
+        self.assertFalse(os.path.isfile(corrupt))
+
+    def test_global_context(self):
+        app = self.application()
+        site = app.handler.middleware[-1]
+        self.assertTrue(len(site.build(app)) > 1)
+        ctx = app.static_context
+        self.assertEqual(ctx.snippets_read, 1)
+        self.assertIn('html_footer', ctx.snapshot)
+        with self.assertRaises(TypeError):
+            ctx.snapshot['html_footer'] = ''
+
+    def test_debug_context(self):
+        app = self.application()
+        app.debug = True
+        site = app.handler.middleware[-1]
+        self.assertTrue(len(site.build(app)) > 1)
+        self.assertEqual(app.static_context, None)
+
+    def test_context_requirements(self):
+        app = self.application()
+        snippets = {'a': 'html_b', 'b': 'html_c', 'c': '',
+                    'd': 'html_missing', 'e': 'html_f', 'f': 'html_e'}
+        with tempfile.TemporaryDirectory() as location:
+            for name, require in snippets.items():
+                with open(os.path.join(location, '%s.md' % name), 'w') as f:
+                    if require:
+                        f.write('require_context: %s\n' % require)
+                    f.write('\n%s' % name)
+            ctx = ContextBuilder(app, location=location)
+        self.assertEqual(ctx.snippets_read, 6)
+        self.assertEqual(sorted(ctx), ['html_a', 'html_b', 'html_c'])
+        self.assertEqual(sorted(ctx.waiting), ['html_d', 'html_e', 'html_f'])
+
+    def test_html_file_validator(self):
+        app = self.application()
+        site = app.handler.middleware[-1]
+        router = site.get_route(site.childname('view'))
+        self.assertIsInstance(router, HtmlFile)
+        src = os.path.join(site.get_src(), 'index.md')
+        request = app.wsgi_request(path='/')
+        request.cache.content = site.read_file(app, src, 'index')
+        key = router.validator(request)
+        self.assertTrue(key.startswith(src))
+        self.assertEqual(request.response['Vary'], 'Cookie')
+        # without content the source file is found from the url
+        request = app.wsgi_request(path='/')
+        self.assertEqual(router.source_file(request), src)
+        self.assertEqual(router.validator(request), key)
+        stat = os.stat(src)
+        os.utime(src, (0, 0))
+        try:
+            self.assertNotEqual(router.validator(request), key)
+        finally:
+            os.utime(src, (stat.st_atime, stat.st_mtime))